@@ -0,0 +1,26 @@
+# ai_assistant/api/serializers.py
+from rest_framework import serializers
+
+class AlexAnalyzeRequestSerializer(serializers.Serializer):
+    symbol = serializers.CharField()
+    timeframe = serializers.CharField()
+    bars = serializers.IntegerField(required=False, min_value=50, max_value=5000, default=300)
+
+class AlexBatchAnalyzeRequestSerializer(serializers.Serializer):
+    items = serializers.ListField(child=AlexAnalyzeRequestSerializer(), min_length=1, max_length=40)
+
+class AlexMultiTimeframeAnalyzeRequestSerializer(serializers.Serializer):
+    symbol = serializers.CharField()
+    timeframes = serializers.ListField(child=serializers.CharField(), min_length=1, max_length=8)
+    bars = serializers.IntegerField(required=False, min_value=50, max_value=5000, default=300)
+
+class AlexAnalyzeResponseSerializer(serializers.Serializer):
+    status = serializers.CharField()
+    action = serializers.CharField()
+    symbol = serializers.CharField()
+    timeframe = serializers.CharField()
+    confidence = serializers.IntegerField()
+    confirmation = serializers.BooleanField()
+    entry_price = serializers.FloatField(required=False, allow_null=True)
+    user_message = serializers.CharField()
+    raw = serializers.JSONField()
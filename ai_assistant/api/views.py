@@ -0,0 +1,363 @@
+# ai_assistant/api/views.py
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, is_dataclass
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from .serializers import (
+    AlexAnalyzeRequestSerializer,
+    AlexBatchAnalyzeRequestSerializer,
+    AlexMultiTimeframeAnalyzeRequestSerializer,
+)
+from .throttles import AnalyzeRateThrottle
+
+from ..services.container import get_services
+from ..engine.market_data import MarketDataProvider
+from ..engine.multi_tf import analyze_multi, plan_fetch
+from ..engine.series import CandleSeries
+from ..engine.worker import analyze_columns, jsonable, series_columns
+from ..engine.zone_engine import analyze_zones
+from ..services.analysis_pool import analysis_pool, reset_analysis_pool
+from ..services.decision_cache import decision_cache, decision_key
+from ..services.explanations import explanation_dispatcher
+from ..services.signals import extract_levels, notify_user, signal_message
+
+from ai_assistant.alex.execution_guard import check_execution_safety
+from dataclasses import is_dataclass, asdict
+from typing import Any, Dict, Tuple
+
+
+from notifications.models import (
+    NotificationPreference,
+    SignalEvent,
+)
+
+
+# higher timeframes needing more base bars than this are fetched on their own
+DEFAULT_MTF_MAX_BASE_BARS = 20_000
+
+
+
+
+def _decision_dict(decision: Any) -> Dict[str, Any]:
+    if is_dataclass(decision):
+        return asdict(decision)
+    if hasattr(decision, "to_dict"):
+        return decision.to_dict()
+    if isinstance(decision, dict):
+        return decision
+    return {"value": str(decision)}
+
+
+def _safe_to_dict(decision: Any, *, timeframe: str, auto_trade_enabled: bool) -> Dict[str, Any]:
+    # Convert decision to dict first
+    d = _decision_dict(decision)
+
+    # Add execution guard info
+    guard = check_execution_safety(
+        timeframe=timeframe,
+        decision=d,
+        auto_trade_enabled=auto_trade_enabled,
+    )
+
+    d.setdefault("meta", {})
+    d["meta"]["execution_guard"] = {
+        "allowed": guard.allowed,
+        "reason": guard.reason,
+        "meta": guard.meta,
+    }
+    d["execution_allowed"] = guard.allowed
+    return d
+
+
+def _shared_decision(*, symbol: str, timeframe: str, bars: int, candles) -> Dict[str, Any]:
+    """The deterministic decision: the same for every user on this bar."""
+    return jsonable(analyze_zones(candles=candles, symbol=symbol, timeframe=timeframe, bars=bars))
+
+
+def _ndjson(obj: Dict[str, Any]) -> bytes:
+    return (json.dumps(obj, default=str) + "\n").encode("utf-8")
+
+
+def _batch_stream(items, *, mt5, auto_trade_enabled: bool):
+    """
+    One NDJSON line per (symbol, timeframe, bars) as soon as its decision is ready,
+    then a final {"done": true, ...} line.
+    """
+    started = time.monotonic()
+    provider = MarketDataProvider(mt5_service=mt5)
+
+    # one candle fetch per (symbol, timeframe), deep enough for every item on it
+    depth: Dict[Tuple[str, str], int] = {}
+    for symbol, timeframe, bars in items:
+        depth[(symbol, timeframe)] = max(depth.get((symbol, timeframe), 0), bars)
+
+    series: Dict[Tuple[str, str], Any] = {}
+    for (symbol, timeframe), bars in depth.items():
+        try:
+            series[(symbol, timeframe)] = provider.get_candles(symbol=symbol, timeframe=timeframe, bars=bars)
+        except Exception as e:
+            series[(symbol, timeframe)] = e
+
+    def line(item, decision: Dict[str, Any], cached: bool) -> bytes:
+        symbol, timeframe, bars = item
+        d = _safe_to_dict(decision, timeframe=timeframe, auto_trade_enabled=auto_trade_enabled)
+        return _ndjson({"symbol": symbol, "timeframe": timeframe, "bars": bars, "cached": cached, "decision": d})
+
+    def error(item, e: Exception) -> bytes:
+        symbol, timeframe, bars = item
+        return _ndjson({"symbol": symbol, "timeframe": timeframe, "bars": bars, "error": f"{type(e).__name__}: {e}"})
+
+    pool = analysis_pool()
+    pending = {}
+    for item in items:
+        symbol, timeframe, bars = item
+        candles = series[(symbol, timeframe)]
+        if isinstance(candles, Exception):
+            yield error(item, candles)
+            continue
+        if len(candles) > bars:
+            candles = candles[-bars:]
+
+        key = decision_key(symbol, timeframe, bars, candles)
+        columns = series_columns(CandleSeries.coerce(candles))
+
+        def submit(symbol=symbol, timeframe=timeframe, bars=bars, columns=columns):
+            nonlocal pool
+            args = (analyze_columns, symbol, timeframe, bars, columns)
+            try:
+                return pool.submit(*args)
+            except BrokenProcessPool:
+                reset_analysis_pool()
+                pool = analysis_pool()
+                return pool.submit(*args)
+
+        # single-flight: a tile another request (or item) is already computing is shared, not resubmitted
+        try:
+            future, cached = decision_cache.get_or_submit(key, submit)
+        except Exception as e:
+            yield error(item, e)
+            continue
+        if cached and future.done() and future.exception() is None:
+            yield line(item, future.result(), True)
+            continue
+        pending[future] = (item, cached)
+
+    for future in as_completed(pending):
+        item, cached = pending[future]
+        try:
+            decision = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                reset_analysis_pool()
+            yield error(item, e)
+            continue
+        yield line(item, decision, cached)
+
+    yield _ndjson({"done": True, "count": len(items), "elapsed_ms": int((time.monotonic() - started) * 1000)})
+
+
+
+
+def _get_or_create_prefs(user) -> NotificationPreference:
+    prefs, _ = NotificationPreference.objects.get_or_create(user=user)
+    return prefs
+
+
+class AlexAnalyzeView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [AnalyzeRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        ser = AlexAnalyzeRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        user = request.user
+        symbol = ser.validated_data["symbol"].strip().upper()
+        timeframe = ser.validated_data["timeframe"].strip().upper()
+        bars = int(ser.validated_data.get("bars", 300))
+
+        # user-controlled: allow auto trade only when user explicitly asks
+        auto_trade_enabled = bool(request.data.get("auto_trade", False))
+
+        # MT5 + candles
+        services = get_services()
+        mt5 = services["mt5"]
+        provider = MarketDataProvider(mt5_service=mt5)
+        candles = provider.get_candles(symbol=symbol, timeframe=timeframe, bars=bars)
+
+        # Deterministic decision: shared by everyone asking on the same bar
+        key = decision_key(symbol, timeframe, bars, candles)
+        shared, cached = decision_cache.get_or_compute(
+            key,
+            lambda: _shared_decision(symbol=symbol, timeframe=timeframe, bars=bars, candles=candles),
+        )
+        decision = _safe_to_dict(
+            shared,
+            timeframe=timeframe,
+            auto_trade_enabled=auto_trade_enabled,
+        )
+
+        # Explain (LLM) off the request path: waits at most the mode's budget, otherwise
+        # returns {"pending": True, "job": ...} and the text arrives on ws/alex/
+        alex_block = explanation_dispatcher.request(
+            shared,
+            llm=services["llm"],
+            symbol=symbol,
+            timeframe=timeframe,
+            user_id=user.id,
+            wait=explanation_dispatcher.wait_budget(request.data.get("explain_mode")),
+        )
+
+        # Execution safeguards (final gate)
+        exec_guard = check_execution_safety(
+            timeframe=timeframe,
+            decision=decision,
+            auto_trade_enabled=auto_trade_enabled,
+        )
+        decision["execution_guard"] = {"allowed": exec_guard.allowed, "reason": exec_guard.reason, "meta": exec_guard.meta}
+
+        # Save signal + notify (only for BUY/SELL, and only if prefs allow)
+        prefs = _get_or_create_prefs(user)
+        action = str(decision.get("action", "WAIT")).upper()
+        confidence = int(decision.get("confidence") or 0)
+
+        if action in {"BUY", "SELL"}:
+            levels = extract_levels(decision)
+
+            SignalEvent.objects.create(
+                user=user,
+                symbol=symbol,
+                timeframe=timeframe,
+                action=action,
+                confidence=confidence,
+                sl=levels["sl"],
+                tp1=levels["tp1"],
+                tp2=levels["tp2"],
+                tp3=levels["tp3"],
+                payload=decision,
+            )
+
+            if prefs.signal_alerts_enabled:
+                title, body = signal_message(symbol, timeframe, action, confidence, levels)
+                notify_user(user, title=title, body=body, data={"symbol": symbol, "timeframe": timeframe, "action": action}, prefs=prefs)
+
+        return Response(
+            {
+                "decision": decision,
+                "alex": alex_block,
+                "prefs_locked": prefs.locked,
+                "cached": cached,
+            },
+            status=200,
+        )
+
+
+class AlexBatchAnalyzeView(APIView):
+    """
+    Watchlist analyze for dashboards: {"items": [{"symbol", "timeframe", "bars"?}, ...]}.
+
+    Duplicate items are answered once, candles are fetched once per symbol/timeframe,
+    decisions come from the shared decision cache or the analysis process pool, and the
+    response streams NDJSON lines as they complete (no LLM explanations here).
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [AnalyzeRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        ser = AlexBatchAnalyzeRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        auto_trade_enabled = bool(request.data.get("auto_trade", False))
+
+        items = []
+        seen = set()
+        for it in ser.validated_data["items"]:
+            item = (it["symbol"].strip().upper(), it["timeframe"].strip().upper(), int(it.get("bars", 300)))
+            if item not in seen:
+                seen.add(item)
+                items.append(item)
+
+        services = get_services()
+        resp = StreamingHttpResponse(
+            _batch_stream(items, mt5=services["mt5"], auto_trade_enabled=auto_trade_enabled),
+            content_type="application/x-ndjson",
+        )
+        resp["Cache-Control"] = "no-cache"
+        resp["X-Accel-Buffering"] = "no"  # let nginx pass lines through as they come
+        return resp
+
+
+class AlexMultiTimeframeAnalyzeView(APIView):
+    """
+    One symbol on several timeframes: {"symbol", "timeframes": [...], "bars"?}.
+
+    Candles are fetched once on the lowest timeframe and the others are resampled from it
+    (MT5 bar boundaries), so M5/M15/H1/H4 is one terminal round trip instead of four.
+    Each decision goes through the shared decision cache; "bias" gives every timeframe
+    the direction of the nearest higher one. No LLM explanations here.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [AnalyzeRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        ser = AlexMultiTimeframeAnalyzeRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        symbol = ser.validated_data["symbol"].strip().upper()
+        timeframes = [tf.strip().upper() for tf in ser.validated_data["timeframes"]]
+        bars = int(ser.validated_data.get("bars", 300))
+        auto_trade_enabled = bool(request.data.get("auto_trade", False))
+
+        max_base = int(getattr(settings, "ALEX_MTF_MAX_BASE_BARS", DEFAULT_MTF_MAX_BASE_BARS))
+        try:
+            base_tf, base_bars, derived, direct = plan_fetch(timeframes, bars, max_base)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        services = get_services()
+        provider = MarketDataProvider(mt5_service=services["mt5"])
+        base = CandleSeries.coerce(provider.get_candles(symbol=symbol, timeframe=base_tf, bars=base_bars))
+        extra = {
+            tf: CandleSeries.coerce(provider.get_candles(symbol=symbol, timeframe=tf, bars=bars))
+            for tf in direct
+        }
+
+        cached: Dict[str, bool] = {}
+
+        def decide(tf: str, n: int, candles) -> Dict[str, Any]:
+            key = decision_key(symbol, tf, n, candles)
+            shared, hit = decision_cache.get_or_compute(
+                key,
+                lambda: _shared_decision(symbol=symbol, timeframe=tf, bars=n, candles=candles),
+            )
+            cached[tf] = hit
+            return shared
+
+        result = analyze_multi(symbol, base_tf, base, derived, bars, decide=decide, extra=extra)
+        decisions = {
+            tf: _safe_to_dict(d, timeframe=tf, auto_trade_enabled=auto_trade_enabled)
+            for tf, d in result["decisions"].items()
+        }
+
+        return Response(
+            {
+                "symbol": symbol,
+                "base_timeframe": base_tf,
+                "decisions": {tf: decisions[tf] for tf in timeframes if tf in decisions},
+                "bias": result["bias"],
+                "bars": result["bars"],
+                "fetches": 1 + len(direct),
+                "cached": cached,
+            },
+            status=200,
+        )
@@ -0,0 +1,25 @@
+# ai_assistant/broadcast.py
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+channel_layer = get_channel_layer()
+
+
+def user_group(user_id: int) -> str:
+    return f"alex_user_{int(user_id)}"
+
+
+def broadcast_explanation(user_id: int, payload: dict):
+    """
+    Push a late Alex explanation to every websocket the user has open on ws/alex/.
+    """
+    async_to_sync(channel_layer.group_send)(
+        user_group(user_id),
+        {
+            "type": "alex.explanation",
+            "data": {
+                "type": "explanation",
+                **payload,
+            },
+        },
+    )
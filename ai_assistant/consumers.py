@@ -0,0 +1,44 @@
+import json
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.contrib.auth.models import AnonymousUser
+
+from .broadcast import user_group
+
+
+@database_sync_to_async
+def _auth_user(raw_token: str):
+    # get_user() is an ORM query: off the event loop, or Django raises SynchronousOnlyOperation
+    try:
+        jwt_auth = JWTAuthentication()
+        validated = jwt_auth.get_validated_token(raw_token)
+        return jwt_auth.get_user(validated)
+    except Exception:
+        return AnonymousUser()
+
+
+class AlexConsumer(AsyncWebsocketConsumer):
+    """Per-user channel for explanations that weren't ready when /alex/analyze/ answered."""
+
+    async def connect(self):
+        qs = parse_qs(self.scope["query_string"].decode())
+        token = (qs.get("token") or [""])[0]
+
+        user = await _auth_user(token)
+        if not user or user.is_anonymous:
+            await self.close(code=4401)  # unauthorized
+            return
+
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def alex_explanation(self, event):
+        await self.send(text_data=json.dumps(event["data"]))
+
@@ -0,0 +1,452 @@
+# ai_assistant/engine/backtest.py
+"""
+Backtester for the zone strategy over stored candle arrays (no terminal, no Django).
+
+Per bar t it reproduces what analyze_zones + confirm_entry see on candles[:t+1]:
+- zones: build_zones(lookback) -> top 6 by strength (same candidates, touches, strength, tie order)
+- best zone: nearest zone mid to the close, then strength
+- rejection: detect_rejection on bar t
+- confirmation: the timeframe's FAST / MEDIUM / LONG rule, ATR(14) tolerance
+
+...but computed for all bars at once: every zone candidate lives for a fixed window of bars,
+so touches/strength are one cumsum per candidate and the per-bar top-6/best picks are sorts.
+
+Entries fill at the next bar's open (ask for buys: + spread), SL beyond the zone by
+sl_atr_buffer * ATR, TP at rr * risk, stops fill with slippage (gaps fill at the open),
+max_hold_bars closes at market. One position at a time.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .indicators import true_ranges
+from .series import COLUMNS, CandleSeries
+from .zone_engine import pick_confirmation_mode
+from .zone_refined import base_impulse_candidates, body_ratios
+
+# analyze_zones needs 20 bars, build_zones 30
+MIN_BARS = 30
+TOP_ZONES = 6
+# time chunk for the per-bar zone selection (bounds the candidate x age matrix)
+CHUNK_BARS = 100_000
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    timeframe: str = "M15"
+    lookback: int = 150
+    atr_period: int = 14
+    rr: float = 2.0
+    sl_atr_buffer: float = 0.25
+    spread: float = 0.0        # price units, paid on the ask side
+    slippage: float = 0.0      # price units, against us on market fills (entry, stop, timeout)
+    max_hold_bars: int = 500
+    mode: Optional[str] = None  # FAST / MEDIUM / LONG; default: pick_confirmation_mode(timeframe)
+    # zone engine thresholds (defaults = the live build_zones)
+    base_body_ratio: float = 0.35
+    impulse_body_ratio: float = 0.6
+    freshness_bars: float = 120.0
+    touch_limit: float = 6.0
+    # ConfirmationConfig.min_zone_quality: best zone's strength must reach this (0 = off, like analyze_zones)
+    min_zone_strength: float = 0.0
+
+
+@dataclass(frozen=True)
+class Features:
+    """Parameter-independent arrays of one dataset: computed once, shared by every config run on it."""
+    series: CandleSeries
+    body_ratio: np.ndarray
+    atr: Dict[int, np.ndarray]
+
+    @classmethod
+    def build(cls, series: CandleSeries, atr_periods: Sequence[int] = (14,)) -> "Features":
+        h, l, c = series.high, series.low, series.close
+        tr = true_ranges(h, l, c)
+        return cls(
+            series=series,
+            body_ratio=body_ratios(series.open, h, l, c),
+            atr={int(p): _atr_at(tr, len(c), int(p)) for p in atr_periods},
+        )
+
+    def atr_for(self, period: int) -> np.ndarray:
+        if period not in self.atr:
+            s = self.series
+            self.atr[period] = _atr_at(true_ranges(s.high, s.low, s.close), len(s), period)
+        return self.atr[period]
+
+
+# -----------------------------
+# Signals
+# -----------------------------
+def _atr_at(tr: np.ndarray, n: int, period: int) -> np.ndarray:
+    """atr() on candles[:t+1] for every t, from true_ranges() (NaN where fewer than period+1 bars)."""
+    out = np.full(n, np.nan)
+    if len(tr) >= period:
+        out[period:] = sliding_window_view(tr, period).sum(axis=1) / float(period)
+    return out
+
+
+def _best_zones(o, h, l, c, ratio, t0: int, t1: int, cfg: BacktestConfig, offset: int):
+    """
+    For every bar t in [t0, t1): the best zone analyze_zones would pick on candles[:t+1].
+    Returns (t, zone_low, zone_high, bullish, strength) for the bars that have zones.
+    `offset` is the absolute index of bar 0 (for the MIN_BARS rule on sliced data).
+    """
+    n = len(c)
+    empty = (np.empty(0, np.int64), np.empty(0), np.empty(0), np.empty(0, bool), np.empty(0))
+    max_age = cfg.lookback - 4   # candidate i is inside build_zones' window until t = i + lookback - 4
+    min_age = 3              # ...and from t = i + 3 (the last 3 bars can't be impulses)
+
+    first = max(3, t0 - max_age)
+    last = min(t1 - min_age, n - 4)
+    if last < first:
+        return empty
+    at, zlow, zhigh, bullish = base_impulse_candidates(
+        o, h, l, c, np.arange(first, last + 1), cfg.base_body_ratio, cfg.impulse_body_ratio, ratio=ratio,
+    )
+    if not len(at):
+        return empty
+
+    # closes after each candidate, one row per candidate: row k, col a-1 = close[at[k] + a]
+    padded = np.concatenate([c, np.full(max_age, np.nan)])
+    later = sliding_window_view(padded, max_age)[at + 1]
+    inside = (later >= zlow[:, None]) & (later <= zhigh[:, None])
+    touches = np.cumsum(inside, axis=1)
+
+    ages = np.arange(min_age, max_age + 1)
+    tt = at[:, None] + ages[None, :]
+    touches = touches[:, ages - 1]
+
+    freshness = np.clip(1.0 - (ages / cfg.freshness_bars), 0.0, 1.0)[None, :]
+    touch_factor = np.clip(1.0 - (touches / cfg.touch_limit), 0.0, 1.0)
+    strength = np.clip(0.65 * freshness + 0.35 * touch_factor, 0.0, 1.0)
+
+    k = np.broadcast_to(np.arange(len(at))[:, None], tt.shape)
+    valid = (tt >= t0) & (tt < t1) & (tt + offset >= MIN_BARS - 1)
+    tt, k, strength = tt[valid], k[valid], strength[valid]
+    if not len(tt):
+        return empty
+
+    # top 6 per bar: strength desc, ties in creation order
+    order = np.lexsort((at[k], -strength, tt))
+    tt, k, strength = tt[order], k[order], strength[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(tt)) + 1]
+    rank = np.arange(len(tt)) - np.repeat(starts, np.diff(np.r_[starts, len(tt)]))
+    keep = rank < TOP_ZONES
+    tt, k, strength, rank = tt[keep], k[keep], strength[keep], rank[keep]
+
+    # best of those: nearest mid, then strength, then list order (like min())
+    mid = (zlow[k] + zhigh[k]) / 2.0
+    dist = np.abs(c[tt] - mid)
+    order = np.lexsort((rank, -strength, dist, tt))
+    tt, k, strength = tt[order], k[order], strength[order]
+    first_of_bar = np.r_[True, tt[1:] != tt[:-1]]
+    tt, k, strength = tt[first_of_bar], k[first_of_bar], strength[first_of_bar]
+    return tt, zlow[k], zhigh[k], bullish[k], strength
+
+
+def find_signals(
+    series: CandleSeries,
+    cfg: BacktestConfig,
+    t0: int = 0,
+    t1: Optional[int] = None,
+    offset: int = 0,
+    features: Optional[Features] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Confirmed entries for bars t in [t0, t1): t, side (+1 buy / -1 sell), zone low/high, atr.
+    `features`: Features.build(series) when running many configs over the same data.
+    """
+    o, h, l, c = series.open, series.high, series.low, series.close
+    n = len(c)
+    t1 = n if t1 is None else min(t1, n)
+    if features is None:
+        features = Features.build(series, (cfg.atr_period,))
+    atr = features.atr_for(cfg.atr_period)
+    mode = (cfg.mode or pick_confirmation_mode(cfg.timeframe)).upper()
+
+    parts: List[Tuple[np.ndarray, ...]] = []
+    for a in range(t0, t1, CHUNK_BARS):
+        parts.append(_best_zones(o, h, l, c, features.body_ratio, a, min(t1, a + CHUNK_BARS), cfg, offset))
+    t = np.concatenate([p[0] for p in parts])
+    zl = np.concatenate([p[1] for p in parts])
+    zh = np.concatenate([p[2] for p in parts])
+    bull = np.concatenate([p[3] for p in parts])
+    strength = np.concatenate([p[4] for p in parts])
+
+    mid = (zl + zh) / 2.0
+    ct, ot, ht, lt = c[t], o[t], h[t], l[t]
+
+    # rejection (detect_rejection): bar t trades into the zone and closes away from its mid
+    traded_into = (lt <= zh) & (ht >= zl)
+    rejected = traded_into & np.where(bull, (ct > mid) & (ct > ot), (ct < mid) & (ct < ot))
+
+    # confirmation (confirm_entry)
+    tol = np.maximum(np.nan_to_num(atr[t], nan=0.0), 1e-6)
+    if mode == "FAST":
+        confirmed = np.where(bull, ct > mid + tol * 0.10, ct < mid - tol * 0.10)
+    elif mode == "LONG":
+        confirmed = np.abs(ct - mid) >= tol
+    else:
+        prev = np.maximum(t - 1, 0)
+        po, pc = o[prev], c[prev]
+        bull_engulf = (ct > ot) & (pc < po) & (ct >= po) & (ot <= pc)
+        bear_engulf = (ct < ot) & (pc > po) & (ot >= pc) & (ct <= po)
+        confirmed = np.where(bull, bull_engulf, bear_engulf)
+
+    hit = rejected & confirmed & (t >= 4) & (strength >= cfg.min_zone_strength)
+    return {
+        "t": t[hit],
+        "side": np.where(bull[hit], 1, -1),
+        "zone_low": zl[hit],
+        "zone_high": zh[hit],
+        "atr": tol[hit],
+    }
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+# signals per simulate() block (bounds the signal x bars matrices)
+SIM_CHUNK = 8192
+# most trades resolve quickly: scan this many bars first, the full max_hold_bars only for the rest
+SIM_FIRST_BARS = 48
+
+
+def _first_exit(high, low, e, sl, tp, long_: bool, spread: float, hold: int):
+    """First bar (offset from e) where SL or TP triggers: (offset, hit, stopped)."""
+    n = len(high)
+    m = len(e)
+    offset = np.minimum(e + hold, n) - 1 - e  # timeout bar unless something hits
+    hit = np.zeros(m, dtype=bool)
+    stopped = np.zeros(m, dtype=bool)
+
+    todo = np.arange(m)
+    start = 0
+    for width in (min(SIM_FIRST_BARS, hold), hold):
+        if not len(todo) or start >= width:
+            continue
+        for a in range(0, len(todo), SIM_CHUNK):
+            rows = todo[a:a + SIM_CHUNK]
+            bars = e[rows, None] + np.arange(start, width)[None, :]
+            inside = bars < n
+            bars = np.minimum(bars, n - 1)
+            if long_:
+                sl_hit = low[bars] <= sl[rows, None]
+                tp_hit = high[bars] >= tp[rows, None]
+            else:
+                # a short's stop/target trigger on the ask (bid bar + spread)
+                sl_hit = high[bars] + spread >= sl[rows, None]
+                tp_hit = low[bars] + spread <= tp[rows, None]
+            any_hit = (sl_hit | tp_hit) & inside
+            got = any_hit.any(axis=1)
+            j = np.argmax(any_hit, axis=1)
+            r = rows[got]
+            offset[r] = start + j[got]
+            hit[r] = True
+            # stop first when both are inside one bar
+            stopped[r] = sl_hit[np.flatnonzero(got), j[got]]
+        todo = todo[~hit[todo] & (offset[todo] >= width)]
+        start = width
+    return offset, hit, stopped
+
+
+def simulate(series: CandleSeries, signals: Dict[str, np.ndarray], cfg: BacktestConfig) -> Dict[str, np.ndarray]:
+    """
+    Every signal as if it were the only trade (entry/exit bars, prices, R).
+    select_trades() then applies the one-position-at-a-time rule.
+
+    Bars are bid prices: longs enter on the ask and exit on the bid, shorts the other way round.
+    """
+    o, h, l, c = series.open, series.high, series.low, series.close
+    n = len(c)
+
+    t = signals["t"]
+    keep = t + 1 < n
+    t = t[keep]
+    side = signals["side"][keep]
+    e = t + 1
+    buf = cfg.sl_atr_buffer * signals["atr"][keep]
+    long_ = side > 0
+
+    # slippage is always against us
+    entry = np.where(long_, o[e] + cfg.spread, o[e]) + side * cfg.slippage
+    sl = np.where(long_, signals["zone_low"][keep] - buf, signals["zone_high"][keep] + buf)
+    risk = side * (entry - sl)
+    ok = risk > 0
+    t, e, side, entry, sl, risk, long_ = t[ok], e[ok], side[ok], entry[ok], sl[ok], risk[ok], long_[ok]
+    tp = entry + side * cfg.rr * risk
+
+    hold = max(1, int(cfg.max_hold_bars))
+    offset = np.empty(len(t), dtype=np.int64)
+    hit = np.empty(len(t), dtype=bool)
+    stopped = np.empty(len(t), dtype=bool)
+    for is_long in (True, False):
+        m = long_ == is_long
+        offset[m], hit[m], stopped[m] = _first_exit(h, l, e[m], sl[m], tp[m], is_long, cfg.spread, hold)
+
+    x = e + offset
+    bar_open = np.where(long_, o[x], o[x] + cfg.spread)
+    # a gap through the stop fills at the open
+    stop_fill = np.where(long_, np.minimum(bar_open, sl), np.maximum(bar_open, sl))
+    market = np.where(long_, c[x], c[x] + cfg.spread)
+    exit_price = np.where(stopped, stop_fill - side * cfg.slippage, np.where(hit, tp, market - side * cfg.slippage))
+    reason = np.where(stopped, 0, np.where(hit, 1, 2))
+
+    pnl = side * (exit_price - entry)
+    return {
+        "signal_bar": t.astype(np.int64), "entry_bar": e.astype(np.int64), "exit_bar": x.astype(np.int64),
+        "side": side.astype(np.int64), "entry": entry, "sl": sl, "tp": tp, "exit": exit_price,
+        "pnl": pnl, "r": pnl / risk, "reason": reason.astype(np.int64),
+    }
+
+
+def select_trades(candidates: Dict[str, np.ndarray]) -> np.ndarray:
+    """Indices of the trades actually taken: signals while a position is open are skipped."""
+    order = np.argsort(candidates["signal_bar"], kind="stable")
+    taken: List[int] = []
+    busy_until = -1
+    for i in order.tolist():
+        if candidates["signal_bar"][i] >= busy_until:
+            taken.append(i)
+            busy_until = int(candidates["exit_bar"][i])
+    return np.array(taken, dtype=np.int64)
+
+
+# -----------------------------
+# Stats
+# -----------------------------
+EXIT_REASONS = ("sl", "tp", "timeout")
+
+
+def stats(pnl: np.ndarray, r: np.ndarray) -> Dict[str, Any]:
+    n = len(pnl)
+    if not n:
+        return {"trades": 0}
+    wins = pnl > 0
+    gross_win = float(pnl[wins].sum())
+    gross_loss = float(-pnl[~wins].sum())
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity
+
+    # longest losing streak
+    losing = np.r_[0, (~wins).astype(np.int8), 0]
+    edges = np.flatnonzero(np.diff(losing))
+    streak = int((edges[1::2] - edges[::2]).max()) if len(edges) else 0
+
+    return {
+        "trades": n,
+        "wins": int(wins.sum()),
+        "win_rate": round(float(wins.mean()), 4),
+        "net": float(equity[-1]),
+        "gross_profit": gross_win,
+        "gross_loss": gross_loss,
+        "profit_factor": round(gross_win / gross_loss, 4) if gross_loss > 0 else None,
+        "avg_r": round(float(r.mean()), 4),
+        "expectancy": float(pnl.mean()),
+        "max_drawdown": float(drawdown.max()),
+        "max_losing_streak": streak,
+    }
+
+
+# -----------------------------
+# Runners
+# -----------------------------
+def _ranges(n: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, n // 1000 or 1))
+    edges = np.linspace(0, n, parts + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _candidates_for_range(columns: Sequence[np.ndarray], cfg_dict: Dict[str, Any], offset: int, t0: int, t1: int) -> Dict[str, np.ndarray]:
+    """Worker: signals for bars [t0, t1) of a slice starting at absolute bar `offset`, simulated."""
+    cfg = BacktestConfig(**cfg_dict)
+    series = CandleSeries(*columns)
+    sig = find_signals(series, cfg, t0, t1, offset=offset)
+    out = simulate(series, sig, cfg)
+    for name in ("signal_bar", "entry_bar", "exit_bar"):
+        out[name] = out[name] + offset
+    return out
+
+
+def run_backtest(candles: Any, cfg: Optional[BacktestConfig] = None, workers: int = 1) -> Dict[str, Any]:
+    """
+    Backtest one symbol/timeframe. workers > 1 splits the bars into date ranges, each worker
+    getting its range plus `lookback` bars of warm-up and `max_hold_bars` of run-off, so the
+    result is identical to workers=1.
+    """
+    started = time.monotonic()
+    cfg = cfg or BacktestConfig()
+    series = CandleSeries.coerce(candles)
+    n = len(series)
+
+    cfg_dict = asdict(cfg)
+    ranges = _ranges(n, workers)
+    jobs = []
+    for a, b in ranges:
+        lo = max(0, a - cfg.lookback)
+        hi = min(n, b + cfg.max_hold_bars + 1)
+        columns = tuple(getattr(series, col)[lo:hi] for col in COLUMNS)
+        jobs.append((columns, cfg_dict, lo, a - lo, b - lo))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(_candidates_for_range, *zip(*jobs)))
+    else:
+        parts = [_candidates_for_range(*job) for job in jobs]
+
+    cand = {name: np.concatenate([p[name] for p in parts]) for name in parts[0]} if parts else {}
+    if not cand or not len(cand["signal_bar"]):
+        return {"bars": n, "signals": 0, "trades": [], "equity": [], "stats": {"trades": 0},
+                "elapsed_ms": int((time.monotonic() - started) * 1000)}
+
+    taken = select_trades(cand)
+    trades = {name: arr[taken] for name, arr in cand.items()}
+
+    times = series.time
+    equity = np.cumsum(trades["pnl"])
+    trade_rows = [
+        {
+            "signal_time": int(times[s]), "entry_time": int(times[e]), "exit_time": int(times[x]),
+            "side": "BUY" if side > 0 else "SELL",
+            "entry": float(en), "sl": float(sl), "tp": float(tp), "exit": float(ex),
+            "pnl": float(p), "r": float(r), "exit_reason": EXIT_REASONS[reason],
+        }
+        for s, e, x, side, en, sl, tp, ex, p, r, reason in zip(
+            trades["signal_bar"].tolist(), trades["entry_bar"].tolist(), trades["exit_bar"].tolist(),
+            trades["side"].tolist(), trades["entry"].tolist(), trades["sl"].tolist(), trades["tp"].tolist(),
+            trades["exit"].tolist(), trades["pnl"].tolist(), trades["r"].tolist(), trades["reason"].tolist(),
+        )
+    ]
+    return {
+        "bars": n,
+        "signals": int(len(cand["signal_bar"])),
+        "trades": trade_rows,
+        "equity": [(int(times[x]), float(eq)) for x, eq in zip(trades["exit_bar"].tolist(), equity.tolist())],
+        "stats": stats(trades["pnl"], trades["r"]),
+        "elapsed_ms": int((time.monotonic() - started) * 1000),
+    }
+
+
+def _run_one(job: Tuple[str, Sequence[np.ndarray], Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    name, columns, cfg_dict = job
+    return name, run_backtest(CandleSeries(*columns), BacktestConfig(**cfg_dict), workers=1)
+
+
+def run_many(jobs: Dict[str, Tuple[Any, BacktestConfig]], workers: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Several symbols/timeframes at once, one process per job: {name: (candles, cfg)} -> {name: result}."""
+    payload = [
+        (name, tuple(getattr(CandleSeries.coerce(candles), col) for col in COLUMNS), asdict(cfg))
+        for name, (candles, cfg) in jobs.items()
+    ]
+    if workers <= 1 or len(payload) <= 1:
+        return dict(_run_one(p) for p in payload)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return dict(pool.map(_run_one, payload))
@@ -0,0 +1,351 @@
+# ai_assistant/engine/bench.py
+"""
+Benchmarks for the analysis engine (no Django, MT5 or LLM needed).
+
+    python -m ai_assistant.engine.bench                          # synthetic 100 .. 100k bars
+    python -m ai_assistant.engine.bench --fixtures data/         # + recorded .npy/.npz/.csv candles
+    python -m ai_assistant.engine.bench --save bench.json        # write a baseline
+    python -m ai_assistant.engine.bench --baseline bench.json    # compare, exit 1 on regressions
+
+The market_data.* cases (rates -> CandleSeries through the MarketDataProvider) import the
+Django apps: they run when DJANGO_SETTINGS_MODULE is set and are skipped otherwise.
+
+Per case: ops/sec, per-call latency p50/p95/p99 and allocations of one call (tracemalloc peak
++ blocks still allocated afterwards). Baselines are machine-specific: compare on the box that
+wrote them. Record a fixture from a live terminal with --record SYMBOL:TF:BARS.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .indicators import atr
+from .series import COLUMNS, CandleSeries
+from .zone_engine import analyze_zones, confirm_entry
+from .zone_refined import build_zones, detect_rejection
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+DEFAULT_TIMEFRAME = "M15"
+# a case runs for about this long (after warm-up), but at least MIN_CALLS times
+TARGET_SECONDS = 0.5
+MIN_CALLS = 5
+MAX_CALLS = 10_000
+# slower than baseline by more than this = regression (p50 latency, peak allocation)
+DEFAULT_TOLERANCE = 0.25
+
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+
+# -----------------------------
+# Fixtures
+# -----------------------------
+def synthetic_rates(n: int, seed: int = 7, timeframe_seconds: int = 900) -> np.ndarray:
+    """
+    MT5-shaped rates: a random walk with a base/impulse pattern every ~40 bars,
+    so build_zones has zones to rank at every size.
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, 1.0, n)
+    pattern = np.arange(n) % 40
+    steps[pattern == 38] *= 0.1
+    steps[pattern == 39] *= 0.1
+    steps[pattern == 0] = np.sign(steps[pattern == 0]) * 6.0
+    close = 1900.0 + np.cumsum(steps)
+    open_ = np.r_[close[0], close[:-1]]
+    wick = rng.uniform(0.2, 1.2, (2, n))
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    rates["time"] = 1_700_000_000 + np.arange(n) * timeframe_seconds
+    rates["open"] = open_
+    rates["high"] = np.maximum(open_, close) + wick[0]
+    rates["low"] = np.minimum(open_, close) - wick[1]
+    rates["close"] = close
+    rates["tick_volume"] = rng.integers(1, 500, n)
+    return rates
+
+
+def as_rates(series: CandleSeries) -> np.ndarray:
+    rates = np.zeros(len(series), dtype=RATES_DTYPE)
+    for name in COLUMNS:
+        rates[name] = getattr(series, name)
+    return rates
+
+
+def load_fixtures(folder: Optional[str], sizes: Iterable[int]) -> Dict[str, np.ndarray]:
+    """{label: rates}. Synthetic ones per size, recorded ones as <file stem>@<bars>."""
+    out = {f"synthetic@{n}": synthetic_rates(n) for n in sizes}
+    if folder:
+        for path in sorted(Path(folder).iterdir()):
+            if path.suffix.lower() in (".npy", ".npz", ".csv"):
+                rates = as_rates(CandleSeries.load(path))
+                out[f"{path.stem}@{len(rates)}"] = rates
+    return out
+
+
+def record_fixture(spec: str, folder: str) -> Path:
+    """SYMBOL:TF:BARS from the terminal -> <folder>/<symbol>_<tf>_<bars>.npy (needs the Django/MT5 stack)."""
+    symbol, timeframe, bars = spec.split(":")
+    from trading.mt5.service import MT5Service
+
+    rates = MT5Service().get_symbol_rates(symbol=symbol.upper(), timeframe=timeframe.upper(), bars=int(bars))
+    if rates is None or not len(rates):
+        raise RuntimeError(f"No rates for {spec}")
+    path = Path(folder) / f"{symbol.lower()}_{timeframe.lower()}_{len(rates)}.npy"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, rates)
+    return path
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+class _RatesService:
+    """Stands in for MT5Service: returns the fixture rates (conversion is what's measured)."""
+
+    def __init__(self, rates: np.ndarray):
+        self.rates = rates
+
+    def get_symbol_rates(self, symbol: str, timeframe: str, bars: int = 300):
+        return self.rates
+
+    def get_candles(self, symbol: str, timeframe: str, bars: int):
+        return self.rates
+
+
+def _django_ready() -> bool:
+    """django.setup() once when settings are available (the providers import models)."""
+    try:
+        import django
+        from django.apps import apps
+    except ImportError:
+        return False
+    if apps.ready:
+        return True
+    if not os.environ.get("DJANGO_SETTINGS_MODULE"):
+        return False
+    try:
+        django.setup()
+    except Exception:
+        return False
+    return True
+
+
+def _provider(module: str, rates: np.ndarray) -> Optional[Any]:
+    """MarketDataProvider from `module` around the fixture, or None when its imports aren't available."""
+    if not _django_ready():
+        return None
+    try:
+        mod = __import__(module, fromlist=["MarketDataProvider"])
+    except Exception:
+        return None
+    provider = mod.MarketDataProvider.__new__(mod.MarketDataProvider)  # skip __init__ (MT5 service, stream hooks)
+    provider.mt5_service = _RatesService(rates)
+    return provider
+
+
+def _quiet(fn: Callable[[], Any]) -> Callable[[], Any]:
+    # the providers print per call
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+
+def build_cases(rates: np.ndarray, timeframe: str = DEFAULT_TIMEFRAME) -> Dict[str, Optional[Callable[[], Any]]]:
+    """{case: zero-arg callable} on one fixture; None = not runnable here (reported as skipped)."""
+    series = CandleSeries.from_rates(rates)
+    n = len(series)
+    zones = build_zones(series)
+    zone = zones[0] if zones else None
+    mid = (zone.low + zone.high) / 2.0 if zone else float(series.close[-1])
+    # dict zone/rejection: the shape confirm_entry reads, so the whole check runs
+    zone_view = {"type": zone.zone_type if zone else "DEMAND", "level": mid}
+    hit = {"hit": True}
+
+    engine_provider = _provider("ai_assistant.engine.market_data", rates)
+    services_provider = _provider("ai_assistant.services.market_data", rates)
+
+    return {
+        "atr": lambda: atr(series, 14),
+        "build_zones": lambda: build_zones(series),
+        "detect_rejection": (lambda: detect_rejection(series, zone)) if zone else None,
+        "confirm_entry": lambda: confirm_entry(timeframe, series, zone_view, hit),
+        "analyze_zones": lambda: analyze_zones("BENCH", timeframe, n, series),
+        "from_rates": lambda: CandleSeries.from_rates(rates),
+        "market_data.engine": (
+            _quiet(lambda: engine_provider.get_candles("BENCH", timeframe, n)) if engine_provider else None
+        ),
+        "market_data.services": (
+            _quiet(lambda: services_provider.get_candles("BENCH", timeframe, n)) if services_provider else None
+        ),
+    }
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+@dataclass
+class Result:
+    calls: int
+    ops_per_sec: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    alloc_peak_kb: float
+    alloc_blocks: int
+
+
+def measure(fn: Callable[[], Any], target_seconds: float = TARGET_SECONDS) -> Result:
+    fn()  # warm-up (imports, caches)
+
+    # allocations of one call, measured apart from the timing (tracemalloc slows everything down)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    kept = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del kept
+
+    samples: List[int] = []
+    started = time.perf_counter()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(samples) < MAX_CALLS:
+            t0 = time.perf_counter_ns()
+            fn()
+            samples.append(time.perf_counter_ns() - t0)
+            if len(samples) >= MIN_CALLS and time.perf_counter() - started >= target_seconds:
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    ns = np.asarray(samples, dtype=np.float64)
+    p50, p95, p99 = np.percentile(ns, (50, 95, 99)) / 1_000.0
+    return Result(
+        calls=len(samples),
+        ops_per_sec=round(1e9 / ns.mean(), 2),
+        p50_us=round(float(p50), 2),
+        p95_us=round(float(p95), 2),
+        p99_us=round(float(p99), 2),
+        alloc_peak_kb=round(peak / 1024.0, 1),
+        alloc_blocks=int(blocks),
+    )
+
+
+def run(
+    fixtures: Dict[str, np.ndarray],
+    only: Optional[Iterable[str]] = None,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    target_seconds: float = TARGET_SECONDS,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """{"meta": {...}, "results": {"case@fixture": Result dict}, "skipped": [...]}"""
+    wanted = set(only or ())
+    results: Dict[str, Dict[str, Any]] = {}
+    skipped: List[str] = []
+    for label, rates in fixtures.items():
+        for case, fn in build_cases(rates, timeframe).items():
+            if wanted and case not in wanted:
+                continue
+            key = f"{case}@{label}"
+            if fn is None:
+                skipped.append(key)
+                continue
+            res = measure(fn, target_seconds)
+            results[key] = asdict(res)
+            log(_row(key, res))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "created": int(time.time()),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def _row(key: str, r: Result) -> str:
+    return (
+        f"{key:<44} {r.ops_per_sec:>12,.1f} ops/s  p50 {r.p50_us:>11,.1f}us  p95 {r.p95_us:>11,.1f}us"
+        f"  p99 {r.p99_us:>11,.1f}us  peak {r.alloc_peak_kb:>9,.1f}KB  blocks {r.alloc_blocks}"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Regressions vs the baseline: p50 latency or peak allocation above baseline * (1 + tolerance)."""
+    out: List[str] = []
+    base = baseline.get("results", {})
+    for key, cur in current.get("results", {}).items():
+        ref = base.get(key)
+        if not ref:
+            continue
+        for field, unit in (("p50_us", "us"), ("alloc_peak_kb", "KB")):
+            old, new = float(ref[field]), float(cur[field])
+            if old > 0 and new > old * (1.0 + tolerance):
+                out.append(f"{key}: {field} {old:,.1f}{unit} -> {new:,.1f}{unit} (+{(new / old - 1.0) * 100:.0f}%)")
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ai_assistant.engine.bench", description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES), help="Synthetic fixture sizes.")
+    parser.add_argument("--fixtures", help="Folder with recorded candles (.npy/.npz/.csv).")
+    parser.add_argument("--only", help="Comma-separated cases (e.g. build_zones,analyze_zones).")
+    parser.add_argument("--timeframe", default=DEFAULT_TIMEFRAME)
+    parser.add_argument("--seconds", type=float, default=TARGET_SECONDS, help="Time per case.")
+    parser.add_argument("--save", help="Write the results as a baseline JSON.")
+    parser.add_argument("--baseline", help="Compare with this baseline; exit 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--record", help="SYMBOL:TF:BARS: save live rates into --fixtures and exit.")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        print(record_fixture(args.record, args.fixtures or "."))
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+    current = run(load_fixtures(args.fixtures, sizes), only, args.timeframe.upper(), args.seconds)
+    for key in current["skipped"]:
+        print(f"{key:<44} skipped (not importable here)")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(current, indent=2))
+        print(f"Baseline written to {args.save}")
+
+    if args.baseline:
+        regressions = compare(current, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
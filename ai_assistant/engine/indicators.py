@@ -0,0 +1,155 @@
+# ai_assistant/alex/engine/indicators.py
+from __future__ import annotations
+from typing import List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .types import Candle
+from .series import CandleSeries
+
+def true_range(curr: Candle, prev: Candle) -> float:
+    return max(
+        curr.high - curr.low,
+        abs(curr.high - prev.close),
+        abs(curr.low - prev.close),
+    )
+
+def atr(candles: List[Candle], period: int = 14) -> float:
+    if isinstance(candles, CandleSeries):
+        return atr_np(candles, period)
+    if len(candles) < period + 1:
+        return 0.0
+    trs = []
+    for i in range(1, len(candles)):
+        trs.append(true_range(candles[i], candles[i - 1]))
+    window = trs[-period:]
+    return sum(window) / float(period)
+
+def is_pivot_high(candles: List[Candle], idx: int, left: int = 2, right: int = 2) -> bool:
+    if idx - left < 0 or idx + right >= len(candles):
+        return False
+    h = candles[idx].high
+    for i in range(idx - left, idx + right + 1):
+        if i == idx:
+            continue
+        if candles[i].high >= h:
+            return False
+    return True
+
+def is_pivot_low(candles: List[Candle], idx: int, left: int = 2, right: int = 2) -> bool:
+    if idx - left < 0 or idx + right >= len(candles):
+        return False
+    l = candles[idx].low
+    for i in range(idx - left, idx + right + 1):
+        if i == idx:
+            continue
+        if candles[i].low <= l:
+            return False
+    return True
+
+
+# -----------------------------
+# Vectorized (columnar) versions
+# Same results as the scalar functions above, on CandleSeries / NumPy columns.
+# -----------------------------
+def true_ranges(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """TR for bars 1..n-1 (same values/order as [true_range(c[i], c[i-1]) for i in 1..n-1])."""
+    if len(close) < 2:
+        return np.empty(0, dtype=np.float64)
+    h, l, pc = high[1:], low[1:], close[:-1]
+    return np.maximum(h - l, np.maximum(np.abs(h - pc), np.abs(l - pc)))
+
+
+def atr_sma(series: CandleSeries, period: int = 14) -> np.ndarray:
+    """Rolling SMA of TR. out[k] = ATR ending at bar k+period (len = n - period)."""
+    tr = true_ranges(series.high, series.low, series.close)
+    if len(tr) < period:
+        return np.empty(0, dtype=np.float64)
+    c = np.concatenate(([0.0], np.cumsum(tr)))
+    return (c[period:] - c[:-period]) / float(period)
+
+
+def _ema_recursive(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    # the recursion itself is inherently sequential; run it over plain floats
+    out = np.empty(len(values), dtype=np.float64)
+    prev = seed
+    keep = 1.0 - alpha
+    for i, x in enumerate(values.tolist()):
+        prev = alpha * x + keep * prev
+        out[i] = prev
+    return out
+
+
+def atr_wilder(series: CandleSeries, period: int = 14) -> np.ndarray:
+    """Wilder's ATR: SMA of the first `period` TRs, then atr = (prev*(p-1) + tr) / p. len = n - period."""
+    tr = true_ranges(series.high, series.low, series.close)
+    if len(tr) < period:
+        return np.empty(0, dtype=np.float64)
+    seed = float(tr[:period].mean())
+    rest = _ema_recursive(tr[period:], 1.0 / period, seed)
+    return np.concatenate(([seed], rest))
+
+
+def atr_np(series: CandleSeries, period: int = 14) -> float:
+    """Scalar ATR, identical to atr() (plain float sum over the last `period` TRs)."""
+    if len(series) < period + 1:
+        return 0.0
+    n = len(series)
+    tr = true_ranges(series.high[n - period - 1:], series.low[n - period - 1:], series.close[n - period - 1:])
+    return sum(tr.tolist()) / float(period)
+
+
+def _pivot_mask(values: np.ndarray, left: int, right: int, high: bool) -> np.ndarray:
+    n = len(values)
+    mask = np.zeros(n, dtype=bool)
+    width = left + right + 1
+    if n < width:
+        return mask
+    win = sliding_window_view(values, width)
+    center = win[:, left]
+    sides = [w for w in (win[:, :left], win[:, left + 1:]) if w.shape[1]]
+    if not sides:
+        mask[left:n - right] = True
+        return mask
+    if high:
+        others = np.max(np.concatenate(sides, axis=1), axis=1)
+        mask[left:n - right] = center > others
+    else:
+        others = np.min(np.concatenate(sides, axis=1), axis=1)
+        mask[left:n - right] = center < others
+    return mask
+
+
+def pivot_high_mask(series: CandleSeries, left: int = 2, right: int = 2) -> np.ndarray:
+    """mask[i] == is_pivot_high(candles, i, left, right) for every i."""
+    return _pivot_mask(series.high, left, right, high=True)
+
+
+def pivot_low_mask(series: CandleSeries, left: int = 2, right: int = 2) -> np.ndarray:
+    """mask[i] == is_pivot_low(candles, i, left, right) for every i."""
+    return _pivot_mask(series.low, left, right, high=False)
+
+
+def body_ratio(series: CandleSeries) -> np.ndarray:
+    """|close - open| / (high - low); NaN where the range is <= 0."""
+    rng = series.high - series.low
+    body = np.abs(series.close - series.open)
+    out = np.full(len(rng), np.nan)
+    ok = rng > 0
+    out[ok] = body[ok] / rng[ok]
+    return out
+
+
+def bar_range(series: CandleSeries) -> np.ndarray:
+    return series.high - series.low
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """EMA with alpha = 2/(period+1), seeded with the first value (same length as `values`)."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.float64)
+    alpha = 2.0 / (period + 1.0)
+    out = _ema_recursive(values[1:], alpha, float(values[0]))
+    return np.concatenate(([values[0]], out))
@@ -0,0 +1,47 @@
+# ai_assistant/engine/market_data.py
+from __future__ import annotations
+from typing import Optional, Any
+
+from .series import CandleSeries
+from .streaming import indicator_states
+from trading.mt5.service import MT5Service  # adjust import to your actual MT5Service location
+
+
+class MarketDataProvider:
+    def __init__(self, mt5_service: Optional[MT5Service] = None):
+        self.mt5_service = mt5_service or MT5Service()
+        # keep per-pair indicator state in step with the live candles
+        indicator_states.attach()
+
+    @staticmethod
+    def _rate_value(r: Any, key: str, default=None):
+        """
+        MT5 returns numpy structured array rows (numpy.void).
+        Access is r["open"], NOT r.get("open").
+        This helper makes it safe.
+        """
+        try:
+            return r[key]
+        except Exception:
+            return default
+
+    def get_candles(self, symbol: str, timeframe: str, bars: int = 300) -> CandleSeries:
+        symbol = (symbol or "").strip().upper()
+        timeframe = (timeframe or "").strip().upper()
+        bars = int(bars or 0)
+
+        rates = self.mt5_service.get_symbol_rates(symbol=symbol, timeframe=timeframe, bars=bars)
+
+        # IMPORTANT: avoid "truth value of array is ambiguous"
+        raw_len = 0 if rates is None else len(rates)
+        print(f"[MarketDataProvider] symbol={symbol} timeframe={timeframe} bars={bars} raw_rates_len={raw_len}",
+              flush=True)
+
+        if rates is None or raw_len == 0:
+            return CandleSeries.empty()
+
+        # columns of the MT5 structured array, no per-bar objects (rows still read like Candle)
+        candles = CandleSeries.from_rates(rates)
+
+        print(f"[MarketDataProvider] candles_len={len(candles)}", flush=True)
+        return candles
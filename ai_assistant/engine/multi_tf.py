@@ -0,0 +1,192 @@
+# ai_assistant/engine/multi_tf.py
+"""
+Multi-timeframe analysis from one base-timeframe array.
+
+resample() builds higher-timeframe bars from lower ones (open of the first, max high,
+min low, close of the last, summed tick volume) on MT5's bar boundaries, so
+M5 -> M15/H1/H4 gives the bars copy_rates_from_pos would have returned.
+One base fetch then serves every timeframe of a symbol, and analyze_multi() adds a
+top-down bias per timeframe from the decisions above it.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .series import CandleSeries
+from .worker import jsonable
+from .zone_engine import analyze_zones
+
+# same boundaries as trading.mt5.candles.bar_open (kept here: the engine doesn't import MT5)
+TIMEFRAME_SECONDS = {
+    "M1": 60, "M2": 120, "M3": 180, "M5": 300, "M10": 600, "M15": 900, "M30": 1800,
+    "H1": 3600, "H2": 7200, "H4": 14400, "H6": 21600, "H8": 28800, "H12": 43200,
+    "D1": 86400,
+    "W1": 604800,
+    "MN1": 31 * 86400,  # calendar month; only used for ordering / bar estimates
+}
+# 1970-01-01 was a Thursday; MT5 weekly bars open on Sunday
+_WEEK_OFFSET = 3 * 86400
+
+BULLISH = "BULLISH"
+BEARISH = "BEARISH"
+NEUTRAL = "NEUTRAL"
+
+
+def tf_seconds(timeframe: str) -> int:
+    try:
+        return TIMEFRAME_SECONDS[timeframe]
+    except KeyError:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+
+def bar_open_times(times: np.ndarray, timeframe: str) -> np.ndarray:
+    """Open time of the `timeframe` bar containing each timestamp (server-time seconds)."""
+    ts = np.asarray(times, dtype=np.int64)
+    if timeframe == "MN1":
+        return ts.astype("datetime64[s]").astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+    if timeframe == "W1":
+        return (ts - _WEEK_OFFSET) // 604800 * 604800 + _WEEK_OFFSET
+    step = tf_seconds(timeframe)
+    return ts - ts % step
+
+
+def can_resample(base: str, target: str) -> bool:
+    """Every target bar is a whole number of base bars."""
+    b, t = tf_seconds(base), tf_seconds(target)
+    if target in ("W1", "MN1"):
+        return 86400 % b == 0
+    return t >= b and t % b == 0
+
+
+def resample(series: CandleSeries, base: str, target: str) -> CandleSeries:
+    """
+    `target` bars from `base` bars. The first target bar is dropped when the base data
+    starts inside it (its high/low would be partial); the last one is the forming bar.
+    """
+    if target == base:
+        return series
+    if not can_resample(base, target):
+        raise ValueError(f"Can't build {target} bars from {base}")
+    if not len(series):
+        return CandleSeries.empty()
+
+    keys = bar_open_times(series.time, target)
+    starts = np.r_[0, np.flatnonzero(np.diff(keys)) + 1]
+    if int(series.time[0]) != int(keys[0]):
+        starts = starts[1:]
+        if not len(starts):
+            return CandleSeries.empty()
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    return CandleSeries(
+        keys[starts],
+        series.open[starts],
+        np.maximum.reduceat(series.high, starts),
+        np.minimum.reduceat(series.low, starts),
+        series.close[ends],
+        np.add.reduceat(series.tick_volume, starts),
+    )
+
+
+def pick_base(timeframes: Sequence[str]) -> str:
+    """Lowest requested timeframe (everything else is built from it)."""
+    return min(timeframes, key=tf_seconds)
+
+
+def base_bars_needed(base: str, timeframe: str, bars: int) -> int:
+    """Base bars to fetch so `timeframe` gets `bars` complete bars (+1 for a partial first one)."""
+    ratio = tf_seconds(timeframe) / tf_seconds(base)
+    return int(math.ceil((bars + 1) * ratio))
+
+
+def plan_fetch(timeframes: Sequence[str], bars: int, max_base_bars: int) -> Tuple[str, int, List[str], List[str]]:
+    """
+    (base timeframe, base bars, timeframes built from it, timeframes fetched directly).
+    A timeframe goes direct when building it would need more than max_base_bars base bars.
+    """
+    tfs = list(dict.fromkeys(tf.upper() for tf in timeframes))
+    base = pick_base(tfs)
+    derived, direct = [], []
+    need = bars
+    for tf in tfs:
+        n = base_bars_needed(base, tf, bars) if tf != base else bars
+        if tf == base or (can_resample(base, tf) and n <= max_base_bars):
+            derived.append(tf)
+            need = max(need, n)
+        else:
+            direct.append(tf)
+    return base, need, derived, direct
+
+
+def _direction(decision: Dict[str, Any]) -> str:
+    action = str(decision.get("action", "")).upper()
+    if action == "BUY":
+        return BULLISH
+    if action == "SELL":
+        return BEARISH
+    zone = (decision.get("raw") or {}).get("best_zone") or {}
+    ztype = str(zone.get("zone_type") or zone.get("type") or "").upper()
+    if ztype == "DEMAND":
+        return BULLISH
+    if ztype == "SUPPLY":
+        return BEARISH
+    return NEUTRAL
+
+
+def htf_bias(decisions: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per timeframe: its own direction (BUY/SELL, else the side of its best zone) and the bias
+    from above: the nearest higher timeframe with a direction.
+    """
+    order = sorted(decisions, key=tf_seconds)
+    own = {tf: _direction(decisions[tf]) for tf in order}
+    out: Dict[str, Dict[str, Any]] = {}
+    for i, tf in enumerate(order):
+        above = next(((h, own[h]) for h in order[i + 1:] if own[h] != NEUTRAL), (None, NEUTRAL))
+        out[tf] = {"direction": own[tf], "htf": above[0], "htf_bias": above[1],
+                   "aligned": own[tf] != NEUTRAL and own[tf] == above[1]}
+    return out
+
+
+def analyze_multi(
+    symbol: str,
+    base_timeframe: str,
+    base: CandleSeries,
+    timeframes: Sequence[str],
+    bars: int,
+    decide: Optional[Callable[[str, int, CandleSeries], Dict[str, Any]]] = None,
+    extra: Optional[Dict[str, CandleSeries]] = None,
+) -> Dict[str, Any]:
+    """
+    Decisions for every timeframe from one base array (+ `extra` series fetched directly),
+    each on its last `bars` bars, and the top-down bias between them.
+    decide(timeframe, bars, candles) -> decision dict; default runs analyze_zones.
+    """
+    if decide is None:
+        def decide(tf: str, n: int, candles: CandleSeries) -> Dict[str, Any]:
+            return jsonable(analyze_zones(symbol=symbol, timeframe=tf, bars=n, candles=candles))
+
+    base_timeframe = base_timeframe.upper()
+    series: Dict[str, CandleSeries] = dict(extra or {})
+    for tf in timeframes:
+        tf = tf.upper()
+        if tf not in series:
+            series[tf] = resample(base, base_timeframe, tf)
+
+    decisions: Dict[str, Dict[str, Any]] = {}
+    for tf, candles in series.items():
+        if len(candles) > bars:
+            candles = candles[-bars:]
+        series[tf] = candles
+        decisions[tf] = decide(tf, bars, candles)
+
+    return {
+        "symbol": symbol,
+        "base_timeframe": base_timeframe,
+        "decisions": decisions,
+        "bias": htf_bias(decisions),
+        "bars": {tf: len(c) for tf, c in series.items()},
+    }
@@ -0,0 +1,234 @@
+# ai_assistant/engine/optimize.py
+"""
+Parameter sweep + walk-forward validation for the zone engine thresholds, on the backtester.
+
+- every dataset's parameter-independent arrays (body ratios, TR/ATR) are built once per
+  worker process (Features), not once per config
+- one backtest per (config, dataset) over the whole history; signals only look back, so
+  slicing the candidate trades by signal bar gives each walk-forward segment's result
+- walk-forward: the bars are cut into folds + train_segments segments; fold k picks the
+  config with the best train score on segments [k, k + train_segments) and reports it
+  on the next segment (out of sample)
+- results are per timeframe bucket (FAST / MEDIUM / LONG, like ConfirmationConfig)
+"""
+from __future__ import annotations
+
+import itertools
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backtest import BacktestConfig, Features, find_signals, select_trades, simulate
+from .confirmation import pick_confirmation_config, timeframe_bucket
+from .series import COLUMNS, CandleSeries
+
+# 3^5 x 4 = 972 configs per bucket
+DEFAULT_GRID: Dict[str, Sequence[Any]] = {
+    "base_body_ratio": (0.25, 0.35, 0.45),
+    "impulse_body_ratio": (0.5, 0.6, 0.7),
+    "freshness_bars": (60.0, 120.0, 240.0),
+    "touch_limit": (3.0, 6.0, 10.0),
+    "rr": (1.5, 2.0, 3.0),
+}
+
+SUMMARY_KEYS = ("trades", "wins", "sum_r", "net", "gross_profit", "gross_loss")
+
+
+def bucket_grid(bucket: str, grid: Optional[Dict[str, Sequence[Any]]] = None) -> Dict[str, Sequence[Any]]:
+    """DEFAULT_GRID (or `grid`) plus min_zone_strength around the bucket's ConfirmationConfig.min_zone_quality."""
+    out = dict(DEFAULT_GRID if grid is None else grid)
+    if "min_zone_strength" not in out:
+        q = pick_confirmation_config(bucket).min_zone_quality
+        out["min_zone_strength"] = (0.0, round(q - 0.1, 2), q, round(q + 0.1, 2))
+    return out
+
+
+def param_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of the grid -> list of BacktestConfig overrides."""
+    known = {f.name for f in fields(BacktestConfig)}
+    unknown = sorted(set(grid) - known)
+    if unknown:
+        raise ValueError(f"Unknown BacktestConfig fields in grid: {unknown}")
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[k] for k in names))]
+
+
+def segment_edges(n: int, segments: int) -> np.ndarray:
+    return np.linspace(0, n, segments + 1).astype(np.int64)
+
+
+def summarize(pnl: np.ndarray, r: np.ndarray) -> Dict[str, float]:
+    """Additive per-segment numbers (segments are summed into train/test windows)."""
+    wins = pnl > 0
+    return {
+        "trades": int(len(pnl)),
+        "wins": int(wins.sum()),
+        "sum_r": float(r.sum()),
+        "net": float(pnl.sum()),
+        "gross_profit": float(pnl[wins].sum()),
+        "gross_loss": float(-pnl[~wins].sum()),
+    }
+
+
+def combine(parts: Iterable[Dict[str, float]]) -> Dict[str, Any]:
+    total = {k: 0.0 for k in SUMMARY_KEYS}
+    for p in parts:
+        for k in SUMMARY_KEYS:
+            total[k] += p[k]
+    n = int(total["trades"])
+    total["trades"] = n
+    total["wins"] = int(total["wins"])
+    total["win_rate"] = round(total["wins"] / n, 4) if n else 0.0
+    total["avg_r"] = round(total["sum_r"] / n, 4) if n else 0.0
+    total["profit_factor"] = round(total["gross_profit"] / total["gross_loss"], 4) if total["gross_loss"] > 0 else None
+    return total
+
+
+def score(summary: Dict[str, Any], min_trades: int) -> float:
+    """Train objective: total R, with too few trades ruled out."""
+    if summary["trades"] < min_trades:
+        return -math.inf
+    return float(summary["sum_r"])
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+# name -> (bucket, timeframe, Features, segment edges); filled once per worker process
+_DATASETS: Dict[str, Tuple[str, str, Features, np.ndarray]] = {}
+
+
+def _init_worker(datasets: Dict[str, Tuple[str, Sequence[np.ndarray]]], atr_period: int, segments: int) -> None:
+    _DATASETS.clear()
+    for name, (timeframe, columns) in datasets.items():
+        series = CandleSeries(*columns)
+        _DATASETS[name] = (
+            timeframe_bucket(timeframe),
+            timeframe,
+            Features.build(series, (atr_period,)),
+            segment_edges(len(series), segments),
+        )
+
+
+def _evaluate(task: Tuple[str, int, Dict[str, Any], Dict[str, Any]]) -> Tuple[str, int, List[Dict[str, float]]]:
+    """One config over every dataset of its bucket -> per-segment summaries (summed over datasets)."""
+    bucket, combo_id, params, base = task
+    per_segment: List[List[Dict[str, float]]] = []
+    for name, (b, timeframe, features, edges) in _DATASETS.items():
+        if b != bucket:
+            continue
+        cfg = BacktestConfig(**{**base, **params, "timeframe": timeframe})
+        series = features.series
+        cand = simulate(series, find_signals(series, cfg, features=features), cfg)
+        seg = np.searchsorted(edges, cand["signal_bar"], side="right") - 1
+        for s in range(len(edges) - 1):
+            m = seg == s
+            sub = {k: v[m] for k, v in cand.items()}
+            taken = select_trades(sub) if m.any() else np.empty(0, dtype=np.int64)
+            if len(per_segment) <= s:
+                per_segment.append([])
+            per_segment[s].append(summarize(sub["pnl"][taken], sub["r"][taken]))
+    return bucket, combo_id, [combine(parts) for parts in per_segment]
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def optimize(
+    datasets: Dict[str, Tuple[str, Any]],
+    *,
+    grid: Optional[Dict[str, Sequence[Any]]] = None,
+    base: Optional[BacktestConfig] = None,
+    folds: int = 4,
+    train_segments: int = 2,
+    min_trades: int = 30,
+    workers: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    datasets: {name: (timeframe, candles)}. Returns {bucket: report}:
+      best: the config picked on the most recent train_segments segments (the one to deploy)
+      oos: out-of-sample totals over all folds (each fold with its own pick)
+      folds: per fold the picked config, its train and test numbers
+    """
+    started = time.monotonic()
+    base = base or BacktestConfig()
+    base_dict = asdict(base)
+    segments = folds + train_segments
+
+    payload = {
+        name: (tf.upper(), tuple(getattr(CandleSeries.coerce(candles), col) for col in COLUMNS))
+        for name, (tf, candles) in datasets.items()
+    }
+    buckets = sorted({timeframe_bucket(tf) for tf, _ in payload.values()})
+
+    combos = {b: param_grid(bucket_grid(b, grid)) for b in buckets}
+    tasks = [(b, i, params, base_dict) for b in buckets for i, params in enumerate(combos[b])]
+    total = len(tasks)
+
+    results: Dict[str, Dict[int, List[Dict[str, Any]]]] = {b: {} for b in buckets}
+
+    def collect(it):
+        for done, (b, i, seg) in enumerate(it, 1):
+            results[b][i] = seg
+            if progress:
+                progress(done, total)
+
+    if workers > 1 and total > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(payload, base.atr_period, segments),
+        ) as pool:
+            collect(pool.map(_evaluate, tasks, chunksize=max(1, total // (workers * 8))))
+    else:
+        _init_worker(payload, base.atr_period, segments)
+        try:
+            collect(map(_evaluate, tasks))
+        finally:
+            _DATASETS.clear()
+
+    def pick(b: str, train_idx: range) -> Optional[int]:
+        # best train score; ties go to the earlier config in the grid
+        best_score, _, best_i = max(
+            (score(combine(seg[s] for s in train_idx), min_trades), -i, i) for i, seg in results[b].items()
+        )
+        return best_i if best_score > -math.inf else None
+
+    reports: Dict[str, Dict[str, Any]] = {}
+    for b in buckets:
+        fold_rows = []
+        for k in range(folds):
+            train_idx = range(k, k + train_segments)
+            test_idx = k + train_segments
+            best_i = pick(b, train_idx)
+            seg = results[b][0 if best_i is None else best_i]
+            fold_rows.append({
+                "train_segments": [train_idx.start, train_idx.stop - 1],
+                "test_segment": test_idx,
+                "params": None if best_i is None else combos[b][best_i],
+                "train": combine(seg[s] for s in train_idx),
+                "test": combine([seg[test_idx]]),
+            })
+
+        picked = [row for row in fold_rows if row["params"] is not None]
+        # the config to deploy: picked on the most recent train_segments segments
+        latest = pick(b, range(segments - train_segments, segments))
+        reports[b] = {
+            "datasets": sorted(name for name, (tf, _) in payload.items() if timeframe_bucket(tf) == b),
+            "combos": len(combos[b]),
+            "best": None if latest is None else combos[b][latest],
+            "oos": combine(row["test"] for row in picked),
+            "folds": fold_rows,
+        }
+
+    for report in reports.values():
+        report["elapsed_s"] = round(time.monotonic() - started, 1)
+    return reports
+
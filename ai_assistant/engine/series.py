@@ -0,0 +1,193 @@
+# ai_assistant/engine/series.py
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Union
+
+import numpy as np
+
+from .types import Candle
+
+COLUMNS = ("time", "open", "high", "low", "close", "tick_volume")
+
+
+class CandleView:
+    """
+    Candle-compatible row of a CandleSeries (same attribute names as Candle).
+    Nothing is copied: attributes read straight from the series columns.
+    """
+    __slots__ = ("_s", "_i")
+
+    def __init__(self, series: "CandleSeries", index: int):
+        self._s = series
+        self._i = index
+
+    @property
+    def time(self) -> int:
+        return int(self._s.time[self._i])
+
+    @property
+    def open(self) -> float:
+        return float(self._s.open[self._i])
+
+    @property
+    def high(self) -> float:
+        return float(self._s.high[self._i])
+
+    @property
+    def low(self) -> float:
+        return float(self._s.low[self._i])
+
+    @property
+    def close(self) -> float:
+        return float(self._s.close[self._i])
+
+    @property
+    def tick_volume(self) -> int:
+        return int(self._s.tick_volume[self._i])
+
+    def to_candle(self) -> Candle:
+        return Candle(self.time, self.open, self.high, self.low, self.close, self.tick_volume)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (CandleView, Candle)):
+            return all(getattr(self, c) == getattr(other, c) for c in COLUMNS)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return (f"CandleView(time={self.time}, open={self.open}, high={self.high}, "
+                f"low={self.low}, close={self.close}, tick_volume={self.tick_volume})")
+
+
+class CandleSeries:
+    """
+    Columnar candles: one NumPy array per field instead of one Candle object per bar.
+
+    from_rates() takes the structured array MT5 returns and keeps *views* of its
+    time/open/high/low/close/tick_volume columns (no per-bar conversion).
+    Behaves like List[Candle] for existing engine code: len(), indexing and iteration
+    give CandleView rows, slicing gives another (zero-copy) CandleSeries.
+    """
+    __slots__ = COLUMNS
+
+    def __init__(self, time, open, high, low, close, tick_volume=None):
+        self.time = np.asarray(time)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.tick_volume = (
+            np.zeros(len(self.close), dtype=np.int64) if tick_volume is None else np.asarray(tick_volume)
+        )
+
+    # ---------- constructors ----------
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        z = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), z, z, z, z, np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_rates(cls, rates: Any) -> "CandleSeries":
+        """
+        MT5 structured array (zero copy), or a list of dict rows (e.g. the live candle buffers).
+        """
+        if rates is None or len(rates) == 0:
+            return cls.empty()
+
+        names = getattr(getattr(rates, "dtype", None), "names", None)
+        if names:
+            tv = "tick_volume" if "tick_volume" in names else ("real_volume" if "real_volume" in names else None)
+            return cls(
+                rates["time"], rates["open"], rates["high"], rates["low"], rates["close"],
+                rates[tv] if tv else None,
+            )
+
+        rows = list(rates)
+        n = len(rows)
+
+        def col(key: str, dtype, default=0):
+            return np.fromiter((r.get(key, default) or default for r in rows), dtype=dtype, count=n)
+
+        return cls(
+            col("time", np.int64), col("open", np.float64), col("high", np.float64),
+            col("low", np.float64), col("close", np.float64), col("tick_volume", np.int64),
+        )
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Candle]) -> "CandleSeries":
+        rows = list(candles)
+        n = len(rows)
+        return cls(*(
+            np.fromiter((getattr(c, name) for c in rows), dtype=np.int64 if name in ("time", "tick_volume") else np.float64, count=n)
+            for name in COLUMNS
+        ))
+
+    @classmethod
+    def coerce(cls, candles: Union["CandleSeries", Iterable[Candle], Any]) -> "CandleSeries":
+        """Whatever the engine was handed -> CandleSeries (no copy if it already is one)."""
+        if isinstance(candles, CandleSeries):
+            return candles
+        if getattr(getattr(candles, "dtype", None), "names", None):
+            return cls.from_rates(candles)
+        rows = list(candles or [])
+        if rows and isinstance(rows[0], dict):
+            return cls.from_rates(rows)
+        return cls.from_candles(rows)
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"]) -> "CandleSeries":
+        """
+        Stored candles:
+        .npy: MT5 rates array (np.save(copy_rates_range(...)))
+        .npz: one array per column (what save() writes)
+        .csv: header row with the column names
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix == ".npy":
+            return cls.from_rates(np.load(path))
+        if suffix == ".npz":
+            with np.load(path) as data:
+                return cls(*(data[name] if name in data else None for name in COLUMNS))
+        if suffix == ".csv":
+            return cls.from_rates(np.genfromtxt(path, delimiter=",", names=True, dtype=np.float64))
+        raise ValueError(f"{path}: expected .npy, .npz or .csv")
+
+    def save(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        np.savez(Path(path), **{name: getattr(self, name) for name in COLUMNS})
+
+    # ---------- list-like ----------
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return CandleSeries(*(getattr(self, c)[key] for c in COLUMNS))
+        n = len(self.close)
+        i = int(key)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("CandleSeries index out of range")
+        return CandleView(self, i)
+
+    def __iter__(self) -> Iterator[CandleView]:
+        for i in range(len(self.close)):
+            yield CandleView(self, i)
+
+    def to_candles(self) -> List[Candle]:
+        return [
+            Candle(int(t), float(o), float(h), float(l), float(c), int(v))
+            for t, o, h, l, c, v in zip(
+                self.time.tolist(), self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.tick_volume.tolist(),
+            )
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        # for views over MT5 rates this is the size of the referenced columns, not a copy
+        return sum(getattr(self, c).nbytes for c in COLUMNS)
+
+    def __repr__(self) -> str:
+        return f"CandleSeries(len={len(self)})"
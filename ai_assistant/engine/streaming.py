@@ -0,0 +1,289 @@
+# ai_assistant/engine/streaming.py
+"""
+Incremental indicators: O(1) per update instead of recomputing over the whole history.
+
+Every object takes bars through update(bar, closed):
+- closed=False: the forming bar changed (value is provisional, nothing is committed)
+- closed=True:  the bar closed (committed; the next update starts a new bar)
+
+Values include the forming bar, like the batch functions do on MT5 rates
+(where the last row is the forming bar).
+"""
+from __future__ import annotations
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .indicators import atr as atr_batch
+
+
+def _f(bar: Any, key: str) -> float:
+    return float(bar[key] if isinstance(bar, dict) else getattr(bar, key))
+
+
+class StreamingATR:
+    """SMA of the last `period` true ranges; same number as indicators.atr() on the same bars."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._trs: Deque[float] = deque(maxlen=period)   # closed bars only
+        self._prev_close: Optional[float] = None          # close of the last closed bar
+        self._forming_tr: Optional[float] = None
+        self.count = 0                                    # bars seen (closed + forming)
+
+    @staticmethod
+    def _tr(h: float, l: float, pc: float) -> float:
+        return max(h - l, abs(h - pc), abs(l - pc))
+
+    def update(self, bar: Any, closed: bool) -> float:
+        h, l, c = _f(bar, "high"), _f(bar, "low"), _f(bar, "close")
+        tr = self._tr(h, l, self._prev_close) if self._prev_close is not None else None
+        if closed:
+            if tr is not None:
+                self._trs.append(tr)
+            self._prev_close = c
+            self._forming_tr = None
+            self.count += 1
+        else:
+            self._forming_tr = tr
+        return self.value
+
+    @property
+    def value(self) -> float:
+        n_bars = self.count + (1 if self._forming_tr is not None else 0)
+        if n_bars < self.period + 1:
+            return 0.0
+        if self._forming_tr is None:
+            return sum(self._trs) / float(self.period)
+        # last period-1 closed TRs + the forming one, in bar order (matches atr() exactly)
+        tail = list(islice(self._trs, len(self._trs) - (self.period - 1), len(self._trs)))
+        return sum(tail + [self._forming_tr]) / float(self.period)
+
+
+class StreamingEMA:
+    """EMA over closes, alpha = 2/(period+1) (or 1/period with wilder=True), seeded with the first close."""
+
+    def __init__(self, period: int, wilder: bool = False):
+        self.period = period
+        self.alpha = (1.0 / period) if wilder else 2.0 / (period + 1.0)
+        self._committed: Optional[float] = None
+        self._value: Optional[float] = None
+
+    def update(self, bar: Any, closed: bool) -> float:
+        x = _f(bar, "close") if not isinstance(bar, (int, float)) else float(bar)
+        v = x if self._committed is None else self.alpha * x + (1.0 - self.alpha) * self._committed
+        self._value = v
+        if closed:
+            self._committed = v
+        return v
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class RollingHighLow:
+    """Highest high / lowest low over the last `window` bars (monotonic deques, amortized O(1))."""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self._i = 0  # index of the next closed bar
+        self._maxq: Deque[Tuple[int, float]] = deque()
+        self._minq: Deque[Tuple[int, float]] = deque()
+        self._forming: Optional[Tuple[float, float]] = None
+
+    def update(self, bar: Any, closed: bool) -> Tuple[float, float]:
+        h, l = _f(bar, "high"), _f(bar, "low")
+        if not closed:
+            self._forming = (h, l)
+            return self.value
+        i = self._i
+        while self._maxq and self._maxq[-1][1] <= h:
+            self._maxq.pop()
+        self._maxq.append((i, h))
+        while self._minq and self._minq[-1][1] >= l:
+            self._minq.pop()
+        self._minq.append((i, l))
+        self._i += 1
+        self._forming = None
+        return self.value
+
+    def _evict(self, last_index: int) -> None:
+        lo = last_index - self.window + 1
+        while self._maxq and self._maxq[0][0] < lo:
+            self._maxq.popleft()
+        while self._minq and self._minq[0][0] < lo:
+            self._minq.popleft()
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float]]:
+        # the forming bar takes one slot of the window
+        if self._forming is not None:
+            self._evict(self._i)
+            hi = max(self._maxq[0][1], self._forming[0]) if self._maxq else self._forming[0]
+            lo = min(self._minq[0][1], self._forming[1]) if self._minq else self._forming[1]
+            return hi, lo
+        self._evict(self._i - 1)
+        hi = self._maxq[0][1] if self._maxq else None
+        lo = self._minq[0][1] if self._minq else None
+        return hi, lo
+
+
+class PivotDetector:
+    """
+    Same rule as is_pivot_high/is_pivot_low, on closed bars only: a bar is confirmed as a pivot
+    once `right` bars have closed after it. update() returns the pivots confirmed by this bar.
+    """
+
+    def __init__(self, left: int = 2, right: int = 2, keep: int = 50):
+        self.left = left
+        self.right = right
+        self._win: Deque[Tuple[int, float, float]] = deque(maxlen=left + right + 1)  # (time, high, low)
+        self.highs: Deque[Tuple[int, float]] = deque(maxlen=keep)
+        self.lows: Deque[Tuple[int, float]] = deque(maxlen=keep)
+
+    def update(self, bar: Any, closed: bool) -> List[Tuple[str, int, float]]:
+        if not closed:
+            return []
+        t = int(bar["time"] if isinstance(bar, dict) else getattr(bar, "time"))
+        self._win.append((t, _f(bar, "high"), _f(bar, "low")))
+        if len(self._win) < self._win.maxlen:
+            return []
+
+        w = list(self._win)
+        ct, ch, cl = w[self.left]
+        others = w[: self.left] + w[self.left + 1:]
+        found: List[Tuple[str, int, float]] = []
+        if all(o[1] < ch for o in others):
+            self.highs.append((ct, ch))
+            found.append(("high", ct, ch))
+        if all(o[2] > cl for o in others):
+            self.lows.append((ct, cl))
+            found.append(("low", ct, cl))
+        return found
+
+
+class IndicatorState:
+    """The per (symbol, timeframe) bundle the zone engine and scanners read."""
+
+    def __init__(self, atr_period: int = 14, ema_period: int = 20, hl_window: int = 20):
+        self.atr = StreamingATR(atr_period)
+        self.ema = StreamingEMA(ema_period)
+        self.hl = RollingHighLow(hl_window)
+        self.pivots = PivotDetector()
+        # (time, high, low, close) of the newest bar applied
+        self.last_bar: Optional[Tuple[int, float, float, float]] = None
+        # the bars the ATR value depends on: last atr_period closed ones (+ the forming one)
+        self._closed: Deque[Tuple[int, float, float, float]] = deque(maxlen=atr_period + 1)
+        self._forming: Optional[Tuple[int, float, float, float]] = None
+
+    def update(self, bar: Any, closed: bool) -> None:
+        self.atr.update(bar, closed)
+        self.ema.update(bar, closed)
+        self.hl.update(bar, closed)
+        self.pivots.update(bar, closed)
+        t = int(bar["time"] if isinstance(bar, dict) else getattr(bar, "time"))
+        self.last_bar = (t, _f(bar, "high"), _f(bar, "low"), _f(bar, "close"))
+        if closed:
+            self._closed.append(self.last_bar)
+            self._forming = None
+        else:
+            self._forming = self.last_bar
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return self.last_bar[0] if self.last_bar else None
+
+    def seed(self, candles: Iterable[Any]) -> "IndicatorState":
+        """All but the last bar are closed; the last one is the forming bar (MT5 rates convention)."""
+        rows = list(candles)
+        for bar in rows[:-1]:
+            self.update(bar, closed=True)
+        if rows:
+            self.update(rows[-1], closed=False)
+        return self
+
+    def in_sync_with(self, candles) -> bool:
+        """
+        True when the bars our ATR is built from (the last atr.period + 1) are the same
+        (time and prices) as the tail of `candles`, so atr.value is what atr() gives on them.
+        Checking only the newest bar isn't enough: candles from MT5 rates can share the last
+        bar with the aggregator's buffer and still differ further back.
+        """
+        if self.last_bar is None or not len(candles):
+            return False
+        window = list(self._closed) + ([self._forming] if self._forming is not None else [])
+        k = min(len(candles), self.atr.period + 1)
+        if len(window) < k:
+            return False
+        tail = [candles[i] for i in range(len(candles) - k, len(candles))]
+        return window[-k:] == [(int(c.time), float(c.high), float(c.low), float(c.close)) for c in tail]
+
+
+class IndicatorRegistry:
+    """
+    IndicatorState per (symbol, timeframe), fed by the live candle aggregator's bar events.
+    attach() once per process; states are created the first time atr() misses on a pair.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._attached = False
+
+        self.hits = 0
+        self.misses = 0
+
+    def attach(self) -> None:
+        if self._attached:
+            return
+        from trading.mt5.candles import candle_aggregator
+
+        candle_aggregator.subscribe(self.on_bar)
+        self._attached = True
+
+    def on_bar(self, event: str, symbol: str, timeframe: str, bar: Dict[str, Any]) -> None:
+        state = self._states.get((symbol, timeframe))
+        if state is None:
+            return
+        with self._lock:
+            state.update(bar, closed=(event == "bar_close"))
+
+    def get(self, symbol: str, timeframe: str) -> Optional[IndicatorState]:
+        return self._states.get(((symbol or "").upper(), (timeframe or "").upper()))
+
+    def atr(self, symbol: str, timeframe: str, candles, period: int = 14) -> float:
+        """
+        ATR for the decision on `candles`: the live value when our state is on the same bar,
+        else one batch atr() over the candles. While attached to the aggregator, a miss seeds
+        the state so the next decision on this pair is O(1).
+        """
+        if len(candles) < period + 1:
+            return atr_batch(candles, period)
+
+        key = ((symbol or "").upper(), (timeframe or "").upper())
+        state = self._states.get(key)
+        if state is not None and state.atr.period == period and state.in_sync_with(candles):
+            self.hits += 1
+            return state.atr.value
+
+        self.misses += 1
+        if not self._attached:
+            return atr_batch(candles, period)
+
+        state = IndicatorState(atr_period=period).seed(candles)
+        with self._lock:
+            self._states[key] = state
+        return state.atr.value
+
+    def stats(self) -> Dict[str, Any]:
+        return {"states": len(self._states), "attached": self._attached, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+# one registry per process (next to the candle aggregator)
+indicator_states = IndicatorRegistry()
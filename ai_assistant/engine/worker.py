@@ -0,0 +1,43 @@
+# ai_assistant/engine/worker.py
+"""
+Process-pool entry points. Pure engine code only (no Django, no MT5), so they work with
+the "spawn" start method and stay isolated from the web/stream threads.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from .series import COLUMNS, CandleSeries
+from .zone_engine import analyze_zones
+
+
+
+def _json_default(obj: Any) -> Any:
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def jsonable(decision: Any) -> Dict[str, Any]:
+    """Decision -> plain JSON types (zones are dataclasses), safe for JSONField / websockets."""
+    if is_dataclass(decision):
+        decision = asdict(decision)
+    return json.loads(json.dumps(decision, default=_json_default))
+
+
+def series_columns(candles: CandleSeries) -> Sequence[np.ndarray]:
+    """What gets pickled to the worker: the six columns, not per-bar objects."""
+    return tuple(getattr(candles, c) for c in COLUMNS)
+
+
+def analyze_columns(symbol: str, timeframe: str, bars: int, columns: Sequence[np.ndarray]) -> Dict[str, Any]:
+    candles = CandleSeries(*columns)
+    return jsonable(analyze_zones(symbol=symbol, timeframe=timeframe, bars=bars, candles=candles))
@@ -0,0 +1,186 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional, Literal, Dict, Any
+
+import numpy as np
+
+from .series import CandleSeries
+from .types import Candle
+
+ZoneType = Literal["DEMAND", "SUPPLY"]
+
+@dataclass(frozen=True)
+class Zone:
+    zone_type: ZoneType
+    low: float
+    high: float
+    created_index: int
+    touches: int
+    strength: float  # 0..1
+    meta: Dict[str, Any]
+
+def _in_zone(price: float, z: Zone) -> bool:
+    return z.low <= price <= z.high
+
+def _count_later_in_range(close: np.ndarray, after: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+    """
+    For each query q: how many j > after[q] have lows[q] <= close[j] <= highs[q].
+    Offline sweep from the last bar backwards with a Fenwick tree over close ranks:
+    O((bars + queries) * log bars) instead of re-scanning every later bar per zone.
+    """
+    out = np.zeros(len(after), dtype=np.int64)
+    if not len(after):
+        return out
+
+    values = np.unique(close)
+    rank = np.searchsorted(values, close)  # 0-based rank of every close
+    lo_r = np.searchsorted(values, lows, side="left")     # first rank with close >= low
+    hi_r = np.searchsorted(values, highs, side="right")   # one past the last rank with close <= high
+
+    size = len(values)
+    tree = [0] * (size + 1)
+
+    def prefix(k: int) -> int:
+        # number of inserted closes with rank < k
+        total = 0
+        while k > 0:
+            total += tree[k]
+            k -= k & -k
+        return total
+
+    order = np.argsort(after, kind="stable")[::-1].tolist()
+    rank_l = rank.tolist()
+    j = len(close) - 1
+    for q in order:
+        a = int(after[q])
+        while j > a:
+            k = rank_l[j] + 1
+            while k <= size:
+                tree[k] += 1
+                k += k & -k
+            j -= 1
+        if hi_r[q] > lo_r[q]:
+            out[q] = prefix(int(hi_r[q])) - prefix(int(lo_r[q]))
+    return out
+
+
+def body_ratios(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """|close - open| / (high - low) per bar, NaN for zero-range bars."""
+    body = np.abs(c - o)
+    rng = h - l
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rng > 0, body / np.where(rng > 0, rng, 1.0), np.nan)
+
+
+def base_impulse_candidates(
+    o: np.ndarray,
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    idx: np.ndarray,
+    base_ratio: float = 0.35,
+    impulse_ratio: float = 0.6,
+    ratio: Optional[np.ndarray] = None,
+):
+    """
+    Which impulse indices in `idx` form a zone: the 2 candles before i are a small-bodied base,
+    candle i is a strong-bodied impulse. Returns (at, zone_low, zone_high, bullish).
+    `ratio`: body_ratios() if the caller already has them.
+    """
+    if ratio is None:
+        ratio = body_ratios(o, h, l, c)
+
+    r1, r2, ri = ratio[idx - 2], ratio[idx - 1], ratio[idx]
+    mask = (r1 < base_ratio) & (r2 < base_ratio) & (ri > impulse_ratio)  # NaN (zero range) compares False
+    at = idx[mask]
+    zlow = np.minimum(l[at - 2], l[at - 1])
+    zhigh = np.maximum(h[at - 2], h[at - 1])
+    bullish = c[at] > o[at]
+    return at, zlow, zhigh, bullish
+
+
+def build_zones(candles: List[Candle], lookback: Optional[int] = 150) -> List[Zone]:
+    """
+    Simple refined zones:
+    - Find 'base' candles (small bodies) followed by impulse
+    - Demand: base then strong bullish impulse
+    - Supply: base then strong bearish impulse
+
+    Candidates come from one vectorized mask, touches from an interval count over the
+    later closes, so this stays near-linear in bars (lookback=None scans the whole history).
+    """
+    if len(candles) < 30:
+        return []
+
+    s = CandleSeries.coerce(candles)
+    o, h, l, c = s.open, s.high, s.low, s.close
+    n = len(c)
+
+    start = 0 if lookback is None else max(0, n - lookback)
+    idx = np.arange(start + 3, n - 3)
+    if not len(idx):
+        return []
+
+    at, zlow, zhigh, bullish = base_impulse_candidates(o, h, l, c, idx)
+    if not len(at):
+        return []
+
+    touches = _count_later_in_range(c, at, zlow, zhigh)
+
+    # Freshness: newer zones stronger
+    age = (n - 1) - at
+    freshness = np.clip(1.0 - (age / 120.0), 0.0, 1.0)
+    # Touch penalty: too many touches weakens zone
+    touch_factor = np.clip(1.0 - (touches / 6.0), 0.0, 1.0)
+    strength = np.clip(0.65 * freshness + 0.35 * touch_factor, 0.0, 1.0)
+
+    # keep top 6 strongest (stable: ties stay in creation order, like list.sort(reverse=True))
+    top = np.argsort(-strength, kind="stable")[:6]
+
+    final: List[Zone] = []
+    for k in top.tolist():
+        i = int(at[k])
+        final.append(Zone(
+            zone_type="DEMAND" if bullish[k] else "SUPPLY",
+            low=float(zlow[k]),
+            high=float(zhigh[k]),
+            created_index=i,
+            touches=int(touches[k]),
+            strength=float(strength[k]),
+            meta={
+                "base_index": i - 1,
+                "impulse_index": i,
+                "age": int(age[k]),
+                "freshness": float(freshness[k]),
+                "touch_factor": float(touch_factor[k]),
+            },
+        ))
+    return final
+
+def detect_rejection(candles: List[Candle], zone: Zone) -> bool:
+    """
+    Rejection heuristic:
+    - last candle enters zone but closes away in direction of zone bias
+    """
+    if len(candles) < 3:
+        return False
+    last = candles[-1]
+    mid = (zone.low + zone.high) / 2.0
+
+    # must have traded into zone
+    traded_into = (last.low <= zone.high and last.high >= zone.low)
+
+    if not traded_into:
+        return False
+
+    if zone.zone_type == "DEMAND":
+        # bullish rejection: wick into zone and close above mid
+        return last.close > mid and last.close > last.open
+    else:
+        # bearish rejection
+        return last.close < mid and last.close < last.open
+
+def zones_refined(candles, symbol: str, timeframe: str):
+    zones = build_zones(candles)
+    rejection = detect_rejection(candles, zones[0]) if zones else False
+    return zones, rejection
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from openai import OpenAI
+from openai import AuthenticationError, RateLimitError, BadRequestError, APIError
+from requests.compat import integer_types
+
+
+DEFAULT_TIMEOUT_SECONDS = 15.0
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_RESET_SECONDS = 30.0
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive failures; while open every call is refused
+    (no network). After `reset_after` seconds one trial call is let through (half-open):
+    success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, failures: Optional[int] = None, reset_after: Optional[float] = None):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+        self.rejected = 0
+
+    def _failures(self) -> int:
+        if self.failures is not None:
+            return int(self.failures)
+        return int(getattr(settings, "ALEX_LLM_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES))
+
+    def _reset_after(self) -> float:
+        if self.reset_after is not None:
+            return float(self.reset_after)
+        return float(getattr(settings, "ALEX_LLM_BREAKER_RESET_SECONDS", DEFAULT_BREAKER_RESET_SECONDS))
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._trial else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self._opened_at >= self._reset_after():
+                self._trial = True  # exactly one caller gets to probe
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._count += 1
+            if self._trial or self._count >= self._failures():
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self.state, "consecutive_failures": self._count, "rejected": self.rejected}
+
+
+# one breaker per process: every client instance talks to the same upstream
+openai_breaker = CircuitBreaker()
+
+
+class OpenAILLMClient:
+    def __init__(self, model: str = "gpt-5.2", reasoning_effort: str = "medium", timeout: Optional[float] = None):
+        self.timeout = float(
+            timeout if timeout is not None
+            else getattr(settings, "ALEX_LLM_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)
+        )
+        # no SDK retries: a slow/failing upstream should trip the breaker, not stall the caller
+        self.client = OpenAI(timeout=self.timeout, max_retries=0)
+        self.model = model
+        self.reasoning_effort = reasoning_effort
+        self.breaker = openai_breaker
+
+    def _fallback(self, *, message: str, symbol: str, timeframe: str) -> str:
+        payload = {
+            "status": "ERROR",
+            "action": "WAIT",
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "confidence": 0,
+            "confirmation": False,
+            "entry_price": None,
+            "user_message": message,
+        }
+        return json.dumps(payload)
+
+    def chat(self, messages: List[Dict[str, str]], symbol:str, timeframe:str, temperature: float = 0.2) -> str:
+        # Convert your list-of-dicts messages into a single input string (simple + reliable)
+        merged = []
+        for m in messages:
+            role = m.get("role", "user")
+            content = m.get("content", "")
+            merged.append(f"{role.upper()}: {content}")
+        input_text = "\n".join(merged).strip()
+
+        if not input_text:
+            return self._fallback(message="Empty prompt sent to LLM.", symbol=symbol, timeframe=timeframe)
+
+        if not self.breaker.allow():
+            return self._fallback(
+                message="WAIT: Alex explanations are temporarily unavailable.",
+                symbol=symbol,
+                timeframe=timeframe,
+            )
+
+        try:
+            res = self.client.responses.create(
+                model=self.model,
+                input=input_text,
+                temperature=temperature,
+            )
+
+            # ALWAYS read plain text only
+            text = (res.output_text or "").strip()
+            self.breaker.record_success()
+
+            if not text:
+                return self._fallback(
+                    message="Empty LLM output returned.",
+                    symbol=symbol,
+                    timeframe=timeframe,
+                )
+
+            return text
+
+        except AuthenticationError:
+            self.breaker.record_failure()
+            return self._fallback(
+                message="OpenAI auth failed (invalid API key).",
+                symbol=symbol,
+                timeframe=timeframe,
+            )
+
+        except RateLimitError:
+            self.breaker.record_failure()
+            return self._fallback(
+                message="WAIT: OpenAI quota/rate-limit reached. Please add billing or retry later.",
+                symbol=symbol,
+                timeframe=timeframe,
+            )
+
+        except BadRequestError as e:
+            # the upstream answered; it's our request that's wrong
+            self.breaker.record_success()
+            return self._fallback(
+                message=f"WAIT: OpenAI bad request: {e}",
+                symbol=symbol,
+                timeframe=timeframe,
+            )
+
+        except APIError as e:
+            # includes timeouts / connection errors
+            self.breaker.record_failure()
+            return self._fallback(
+                message=f"WAIT: OpenAI API error: {e}",
+                symbol=symbol,
+                timeframe=timeframe,
+            )
+
+        except Exception as e:
+            self.breaker.record_failure()
+            return self._fallback(
+                message=f"WAIT: {type(e).__name__}: {e}",
+                symbol=symbol,
+                timeframe=timeframe,
+            )
@@ -0,0 +1,41 @@
+import json
+import re
+import time
+from typing import Dict, List, Optional
+
+
+class StubLLMClient:
+    """
+    Local stand-in for OpenAILLMClient (same chat() signature, no network).
+
+    Answers with a short JSON explanation built from the prompt's Action/Confidence lines,
+    so it passes validate_alex_output. `delay` simulates a slow model, `fail=True` raises.
+    """
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, text: Optional[str] = None):
+        self.delay = float(delay)
+        self.fail = fail
+        self.text = text
+        self.calls = 0
+
+    @staticmethod
+    def _line(prompt: str, name: str) -> str:
+        m = re.search(rf"^{name}: (.*)$", prompt, re.MULTILINE)
+        return m.group(1).strip() if m else ""
+
+    def chat(self, messages: List[Dict[str, str]], symbol: str = "", timeframe: str = "", temperature: float = 0.2) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("stub LLM failure")
+        if self.text is not None:
+            return self.text
+
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        action = self._line(prompt, "Action") or "WAIT"
+        confidence = self._line(prompt, "Confidence") or "0"
+        return json.dumps({
+            "explanation": f"{symbol} {timeframe}: the engine decision is {action} with confidence {confidence}.",
+            "notes": ["stub explanation (no model connected)"],
+        })
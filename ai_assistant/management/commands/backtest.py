@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_assistant.engine.backtest import BacktestConfig, run_backtest, run_many
+from ai_assistant.engine.series import CandleSeries
+
+
+def load_candles(path: Path) -> CandleSeries:
+    try:
+        return CandleSeries.load(path)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+class Command(BaseCommand):
+    help = "Backtest the zone strategy over stored candles (one file per symbol)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Candle files (.npy / .npz / .csv); the file name is the label.")
+        parser.add_argument("--timeframe", default="M15")
+        parser.add_argument("--lookback", type=int, default=150)
+        parser.add_argument("--rr", type=float, default=2.0)
+        parser.add_argument("--sl-atr-buffer", type=float, default=0.25)
+        parser.add_argument("--spread", type=float, default=0.0, help="Price units.")
+        parser.add_argument("--slippage", type=float, default=0.0, help="Price units per market fill.")
+        parser.add_argument("--max-hold-bars", type=int, default=500)
+        parser.add_argument("--mode", choices=["FAST", "MEDIUM", "LONG"], default=None)
+        parser.add_argument("--workers", type=int, default=1, help="Processes (by file, or by date range for one file).")
+        parser.add_argument("--trades", action="store_true", help="Print every trade as JSON lines.")
+
+    def handle(self, *args, **options):
+        cfg = BacktestConfig(
+            timeframe=options["timeframe"].upper(),
+            lookback=options["lookback"],
+            rr=options["rr"],
+            sl_atr_buffer=options["sl_atr_buffer"],
+            spread=options["spread"],
+            slippage=options["slippage"],
+            max_hold_bars=options["max_hold_bars"],
+            mode=options["mode"],
+        )
+        workers = max(1, options["workers"])
+
+        paths = [Path(f) for f in options["files"]]
+        for p in paths:
+            if not p.exists():
+                raise CommandError(f"{p}: no such file")
+
+        if len(paths) == 1:
+            results = {paths[0].stem: run_backtest(load_candles(paths[0]), cfg, workers=workers)}
+        else:
+            results = run_many({p.stem: (load_candles(p), cfg) for p in paths}, workers=workers)
+
+        for name, res in results.items():
+            if options["trades"]:
+                for trade in res["trades"]:
+                    self.stdout.write(json.dumps({"name": name, **trade}))
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {res['bars']} bars, {res['signals']} signals, {res['elapsed_ms']} ms"
+            ))
+            self.stdout.write(json.dumps(res["stats"]))
@@ -0,0 +1,81 @@
+import json
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_assistant.engine.backtest import BacktestConfig
+from ai_assistant.engine.optimize import optimize
+
+from .backtest import load_candles
+
+
+class Command(BaseCommand):
+    help = "Sweep the zone engine thresholds with walk-forward validation; best config per timeframe bucket."
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Candle files as PATH:TIMEFRAME (e.g. xauusd_m15.npy:M15).")
+        parser.add_argument("--grid", help="JSON file {field: [values]} replacing the default grid.")
+        parser.add_argument("--folds", type=int, default=4)
+        parser.add_argument("--train-segments", type=int, default=2, help="Segments per train window.")
+        parser.add_argument("--min-trades", type=int, default=30, help="Fewer train trades = config not eligible.")
+        parser.add_argument("--spread", type=float, default=0.0)
+        parser.add_argument("--slippage", type=float, default=0.0)
+        parser.add_argument("--max-hold-bars", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--out", help="Write the full report as JSON here.")
+
+    def handle(self, *args, **options):
+        datasets = {}
+        for spec in options["files"]:
+            path, sep, tf = spec.rpartition(":")
+            if not sep or not path or not tf:
+                raise CommandError(f"{spec}: expected PATH:TIMEFRAME")
+            p = Path(path)
+            if not p.exists():
+                raise CommandError(f"{p}: no such file")
+            datasets[f"{p.stem}:{tf.upper()}"] = (tf.upper(), load_candles(p))
+
+        grid = None
+        if options["grid"]:
+            grid = {k: tuple(v) for k, v in json.loads(Path(options["grid"]).read_text()).items()}
+
+        base = replace(
+            BacktestConfig(),
+            spread=options["spread"],
+            slippage=options["slippage"],
+            max_hold_bars=options["max_hold_bars"],
+        )
+
+        started = time.monotonic()
+        step = [0]
+
+        def progress(done, total):
+            # ~20 lines for the whole run
+            if done == total or done * 20 // total > step[0]:
+                step[0] = done * 20 // total
+                self.stdout.write(f"{done}/{total} configs, {time.monotonic() - started:.0f}s")
+
+        try:
+            reports = optimize(
+                datasets,
+                grid=grid,
+                base=base,
+                folds=options["folds"],
+                train_segments=options["train_segments"],
+                min_trades=options["min_trades"],
+                workers=max(1, options["workers"]),
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for bucket, report in reports.items():
+            self.stdout.write(self.style.SUCCESS(f"{bucket}: {report['combos']} configs on {', '.join(report['datasets'])}"))
+            self.stdout.write(f"  best: {json.dumps(report['best'])}")
+            self.stdout.write(f"  out of sample: {json.dumps(report['oos'])}")
+
+        if options["out"]:
+            Path(options["out"]).write_text(json.dumps(reports, indent=2))
+            self.stdout.write(f"Report written to {options['out']}")
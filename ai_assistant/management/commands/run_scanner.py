@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_assistant.services.scanner import market_scanner
+
+
+class Command(BaseCommand):
+    help = "Run the bar-close market scanner (zone engine per symbol/timeframe, signals + notifications)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stats-every", type=float, default=60.0, help="Seconds between stats lines (0 = quiet).")
+
+    def handle(self, *args, **options):
+        every = float(options["stats_every"])
+        market_scanner.start()
+        self.stdout.write(self.style.SUCCESS(f"Scanner running: {market_scanner.stats()['pairs']} symbol/timeframe pairs"))
+        try:
+            while True:
+                time.sleep(every if every > 0 else 3600)
+                if every > 0:
+                    self.stdout.write(str(market_scanner.stats()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            market_scanner.stop()
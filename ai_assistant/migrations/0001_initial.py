@@ -0,0 +1,66 @@
+# Generated by Django 5.2.9 on 2026-01-20 07:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=True)),
+                ('min_confidence', models.PositiveIntegerField(default=80)),
+                ('confirmed_only', models.BooleanField(default=True)),
+                ('symbols_csv', models.TextField(blank=True, default='')),
+                ('quiet_hours_start', models.TimeField(blank=True, null=True)),
+                ('quiet_hours_end', models.TimeField(blank=True, null=True)),
+                ('telegram_chat_id', models.CharField(blank=True, default='', max_length=64)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notify_prefs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PushSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.TextField(unique=True)),
+                ('p256dh', models.CharField(max_length=255)),
+                ('auth', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='device_subscriptions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SignalEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('timeframe', models.CharField(max_length=10)),
+                ('side', models.CharField(max_length=10)),
+                ('confidence', models.PositiveIntegerField(default=0)),
+                ('entry', models.FloatField(blank=True, null=True)),
+                ('sl', models.FloatField(blank=True, null=True)),
+                ('tp1', models.FloatField(blank=True, null=True)),
+                ('tp2', models.FloatField(blank=True, null=True)),
+                ('tp3', models.FloatField(blank=True, null=True)),
+                ('fingerprint', models.CharField(db_index=True, max_length=128)),
+                ('payload', models.JSONField(default=dict)),
+                ('webpush_sent', models.BooleanField(default=False)),
+                ('telegram_sent', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signal_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'fingerprint'], name='ai_assistan_user_id_95bded_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-01-21 11:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_assistant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pushsubscription',
+            name='user',
+        ),
+        migrations.RemoveField(
+            model_name='signalevent',
+            name='user',
+        ),
+        migrations.DeleteModel(
+            name='NotificationPreference',
+        ),
+        migrations.DeleteModel(
+            name='PushSubscription',
+        ),
+        migrations.DeleteModel(
+            name='SignalEvent',
+        ),
+    ]
@@ -0,0 +1,7 @@
+# ai_assistant/routing.py
+from django.urls import re_path
+from .consumers import AlexConsumer
+
+websocket_urlpatterns = [
+    re_path(r"^ws/alex/$", AlexConsumer.as_asgi()),
+]
@@ -0,0 +1,42 @@
+# ai_assistant/services/analysis_pool.py
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+
+
+DEFAULT_WORKERS = 4
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def analysis_pool() -> ProcessPoolExecutor:
+    """
+    Bounded process pool for engine work done on behalf of web requests
+    (ALEX_ANALYZE_WORKERS processes, "spawn" so no request/MT5 threads are forked).
+    Created on first use, one per web process.
+    """
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                workers = int(getattr(settings, "ALEX_ANALYZE_WORKERS", DEFAULT_WORKERS))
+                _pool = ProcessPoolExecutor(
+                    max_workers=max(1, workers),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def reset_analysis_pool() -> None:
+    """Drop a broken pool (a worker died); the next call builds a fresh one."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,42 @@
+# ai_assistant/services/container.py
+from __future__ import annotations
+from __future__ import annotations
+
+from trading.mt5.service import MT5Service
+
+import os
+from django.conf import settings
+
+from ai_assistant.llm.openai_client import OpenAILLMClient
+from ai_assistant.llm.stub_client import StubLLMClient
+
+class NoOpAuditLogger:
+    """
+    Safe fallback audit logger.
+    Use this until you connect the real Stage 5 audit logger/model.
+    """
+    def log_event(self, actor_user_id: int, event_type: str, metadata: dict):
+        # Do nothing (or print if you want)
+        # print(f"[AUDIT] {event_type} user={actor_user_id} meta_keys={list(metadata.keys())}")
+        return
+
+
+def get_services():
+    print("DEBUG OPENAI_API_KEY exists?", bool(os.getenv("OPENAI_API_KEY")))
+    print("DEBUG OPENAI_API_KEY startswith sk-?", str(os.getenv("OPENAI_API_KEY", "")).startswith("sk-"))
+    api_key = os.getenv("OPENAI_API_KEY")
+
+    # ALEX_LLM_BACKEND="stub" forces the local stub (tests / load runs without a model)
+    backend = str(getattr(settings, "ALEX_LLM_BACKEND", "")).lower()
+    if api_key and backend != "stub":
+        llm = OpenAILLMClient(model="gpt-5.2")
+    else:
+        llm = StubLLMClient()
+
+
+    return {
+            "mt5": MT5Service(),
+            "audit": NoOpAuditLogger(),
+            "llm": llm,
+        }
+
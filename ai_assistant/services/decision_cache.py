@@ -0,0 +1,191 @@
+# ai_assistant/services/decision_cache.py
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+
+
+DEFAULT_MAX_ENTRIES = 512
+# the key already changes with every new bar / forming-bar move; TTL only bounds staleness
+DEFAULT_TTL_SECONDS = 60.0
+
+
+def decision_key(symbol: str, timeframe: str, bars: int, candles) -> Tuple[Any, ...]:
+    """(symbol, timeframe, bars, last bar time, last bar close): same key -> same deterministic decision."""
+    if candles is None or not len(candles):
+        return (symbol, timeframe, int(bars), None, None)
+    last = candles[-1]
+    return (symbol, timeframe, int(bars), int(last.time), float(last.close))
+
+
+class DecisionCache:
+    """
+    Shared (not per-user) analysis results: LRU + TTL, with single-flight so concurrent
+    identical requests wait for one computation instead of all running it.
+
+    Values are deep-copied on the way out; callers layer the user-specific parts
+    (execution guard, prefs, signals) on their own copy.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        settings_prefix: str = "ALEX_DECISION_CACHE",
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.settings_prefix = settings_prefix
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: Dict[Hashable, Future] = {}  # key -> the leader's result
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+
+    def _max_entries(self) -> int:
+        if self.max_entries is not None:
+            return int(self.max_entries)
+        return int(getattr(settings, f"{self.settings_prefix}_SIZE", DEFAULT_MAX_ENTRIES))
+
+    def _ttl(self) -> float:
+        if self.ttl_seconds is not None:
+            return float(self.ttl_seconds)
+        return float(getattr(settings, f"{self.settings_prefix}_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Cached value (copy) or None; never computes."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        # caller holds the lock
+        self._entries[key] = (time.monotonic() + self._ttl(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries():
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _claim(self, key: Hashable) -> Tuple[Optional[Tuple[Any]], Optional[Future], bool]:
+        """(cached value,) on a hit; else the key's flight and whether this caller leads it."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return (copy.deepcopy(entry[1]),), None, False
+                del self._entries[key]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.shared += 1
+        return None, flight, leader
+
+    def _land(self, key: Hashable, flight: Future, value: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if error is None:
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        if error is None:
+            flight.set_result(value)
+        else:
+            flight.set_exception(error)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (value, hit). hit is True when this call didn't run compute() itself."""
+        cached, flight, leader = self._claim(key)
+        if cached is not None:
+            return cached[0], True
+        if not leader:
+            return copy.deepcopy(flight.result()), True
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._land(key, flight, error=e)
+            raise
+        self._land(key, flight, value)
+        return copy.deepcopy(value), False
+
+    def get_or_submit(self, key: Hashable, submit: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        get_or_compute() for work that runs elsewhere (a process pool): doesn't block.
+        Returns (future of a copy of the value, hit); only a leader calls submit(), everyone
+        else asking for the key meanwhile - here or in get_or_compute() - shares its result.
+        """
+        cached, flight, leader = self._claim(key)
+        if cached is not None:
+            done: Future = Future()
+            done.set_result(cached[0])
+            return done, True
+
+        if leader:
+            try:
+                work = submit()
+            except BaseException as e:
+                self._land(key, flight, error=e)
+                raise
+
+            def landed(f: Future) -> None:
+                try:
+                    value = f.result()
+                except BaseException as e:
+                    self._land(key, flight, error=e)
+                else:
+                    self._land(key, flight, value)
+
+            work.add_done_callback(landed)
+
+        out: Future = Future()
+
+        def copied(f: Future) -> None:
+            try:
+                out.set_result(copy.deepcopy(f.result()))
+            except BaseException as e:
+                out.set_exception(e)
+
+        flight.add_done_callback(copied)
+        return out, not leader
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# one cache per process
+decision_cache = DecisionCache()
@@ -0,0 +1,189 @@
+# ai_assistant/services/explanations.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional, Set
+
+from django.conf import settings
+
+from ai_assistant.alex.explain import build_explain_prompt
+from ai_assistant.alex.guard import validate_alex_output, fallback_explanation
+
+from ..broadcast import broadcast_explanation
+from .decision_cache import DecisionCache
+
+
+DEFAULT_WORKERS = 4
+# "sync": wait up to ALEX_EXPLAIN_WAIT_SECONDS for the LLM, then deliver late over the websocket
+# "deferred": never wait, the explanation always arrives over the websocket
+DEFAULT_MODE = "sync"
+DEFAULT_WAIT_SECONDS = 2.0
+
+
+def prompt_fingerprint(messages: List[Dict[str, str]]) -> str:
+    raw = json.dumps(messages, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# only explanations that passed validate_alex_output go in here
+explanation_cache = DecisionCache(settings_prefix="ALEX_EXPLAIN_CACHE")
+
+
+def explain(decision: Dict[str, Any], *, llm: Any, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+    """LLM explanation of a deterministic decision (cached by prompt fingerprint). Never raises."""
+    # Explain (LLM) but never overwrite deterministic fields
+    if str(decision.get("status", "")).upper() != "OK":
+        return None
+
+    try:
+        messages = build_explain_prompt(decision)
+        fp = prompt_fingerprint(messages)
+        cached = explanation_cache.peek(fp)
+        if cached is not None:
+            return cached
+
+        llm_text = llm.chat(messages, symbol=symbol, timeframe=timeframe)
+
+        guard = validate_alex_output(decision, llm_text)
+        if guard.ok:
+            alex_block = {"text": (llm_text or "").strip()}
+            explanation_cache.put(fp, alex_block)
+            return alex_block
+        alex_block = fallback_explanation(decision)
+        alex_block["guard_blocked_reason"] = guard.reason
+        return alex_block
+    except Exception as e:
+        alex_block = fallback_explanation(decision)
+        alex_block["llm_error"] = str(e)
+        return alex_block
+
+
+class _Job:
+    __slots__ = ("future", "recipients", "symbol", "timeframe")
+
+    def __init__(self, future: Future, symbol: str, timeframe: str):
+        self.future = future
+        self.recipients: Set[int] = set()
+        self.symbol = symbol
+        self.timeframe = timeframe
+
+
+class ExplanationDispatcher:
+    """
+    Runs explanations on a small thread pool so the analyze request never blocks on the model
+    longer than its wait budget. Identical prompts share one job; whoever didn't get the
+    result in time receives it on the alex_user_<id> websocket group when it lands.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, _Job] = {}
+
+        self.submitted = 0
+        self.joined = 0
+        self.deferred = 0
+        self.delivered = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            n = int(self.workers or getattr(settings, "ALEX_EXPLAIN_WORKERS", DEFAULT_WORKERS))
+            self._pool = ThreadPoolExecutor(max_workers=max(1, n), thread_name_prefix="alex-explain")
+        return self._pool
+
+    @staticmethod
+    def wait_budget(mode: Optional[str] = None) -> float:
+        mode = str(mode or getattr(settings, "ALEX_EXPLAIN_MODE", DEFAULT_MODE)).lower()
+        if mode == "deferred":
+            return 0.0
+        return float(getattr(settings, "ALEX_EXPLAIN_WAIT_SECONDS", DEFAULT_WAIT_SECONDS))
+
+    def request(
+        self,
+        decision: Dict[str, Any],
+        *,
+        llm: Any,
+        symbol: str,
+        timeframe: str,
+        user_id: Optional[int],
+        wait: float,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The explanation if it's ready within `wait` seconds (cache hits are immediate),
+        else {"pending": True, "job": <fingerprint>} and it's pushed to the user later.
+        """
+        if str(decision.get("status", "")).upper() != "OK":
+            return None
+
+        messages = build_explain_prompt(decision)
+        fp = prompt_fingerprint(messages)
+        cached = explanation_cache.peek(fp)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            job = self._jobs.get(fp)
+            leader = job is None
+            if leader:
+                future = self._get_pool().submit(explain, decision, llm=llm, symbol=symbol, timeframe=timeframe)
+                job = _Job(future, symbol, timeframe)
+                self._jobs[fp] = job
+                self.submitted += 1
+            else:
+                self.joined += 1
+        if leader:
+            # outside the lock: the callback runs right here if the job is already done
+            job.future.add_done_callback(lambda f, fp=fp: self._finished(fp))
+
+        if wait > 0:
+            try:
+                return job.future.result(timeout=wait)
+            except FutureTimeout:
+                pass
+
+        with self._lock:
+            if self._jobs.get(fp) is job:
+                if user_id is not None:
+                    job.recipients.add(int(user_id))
+                self.deferred += 1
+                return {"pending": True, "job": fp}
+        # finished between the timeout and the lock
+        return job.future.result()
+
+    def _finished(self, fp: str) -> None:
+        with self._lock:
+            job = self._jobs.pop(fp, None)
+        if job is None or not job.recipients:
+            return
+
+        alex_block = job.future.result()  # explain() never raises
+        for user_id in job.recipients:
+            try:
+                broadcast_explanation(user_id, {
+                    "job": fp,
+                    "symbol": job.symbol,
+                    "timeframe": job.timeframe,
+                    "alex": alex_block,
+                })
+                self.delivered += 1
+            except Exception:
+                # no channel layer (tests / management commands)
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._jobs),
+            "submitted": self.submitted,
+            "joined": self.joined,
+            "deferred": self.deferred,
+            "delivered": self.delivered,
+            "cache": explanation_cache.stats(),
+        }
+
+
+# one dispatcher per process
+explanation_dispatcher = ExplanationDispatcher()
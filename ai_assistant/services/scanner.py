@@ -0,0 +1,204 @@
+# ai_assistant/services/scanner.py
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from trading.constants import ALLOWED_SYMBOLS
+from trading.mt5.candles import candle_aggregator
+
+from ..engine.series import CandleSeries
+from ..engine.worker import analyze_columns, series_columns
+from .signals import fan_out_signal
+
+
+DEFAULT_TIMEFRAMES = ("M15", "H1", "H4")
+DEFAULT_BARS = 300
+DEFAULT_WORKERS = 2
+
+
+class MarketScanner:
+    """
+    Runs the zone engine once per closed bar for ALLOWED_SYMBOLS x ALEX_SCAN_TIMEFRAMES,
+    instead of once per user poll.
+
+    - bar_close events come from the candle aggregator (tick-fed, no extra MT5 polling)
+    - the closed history is read through MT5Service.get_symbol_rates: the aggregator's buffers
+      only when they're built from every tick ("ticks" mode), else the terminal via rates_cache.
+      Tick-sampled bars have wrong highs/lows and would go out to every subscriber as signals
+    - the read runs on its own thread, analyze_zones in a process pool ("spawn": no forked
+      MT5/stream threads), so neither stalls the tick stream or the web workers
+    - results are written/notified from one fan-out thread (SignalEvents + notifications)
+
+    Run it in ONE process (manage.py run_scanner), otherwise every worker writes the same signals.
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[List[str]] = None,
+        timeframes: Optional[List[str]] = None,
+        fetch: Optional[Callable[[str, str, int], Any]] = None,
+    ):
+        self.symbols = symbols
+        self.timeframes = timeframes
+        # fetch(symbol, timeframe, bars) -> rates (structured array or list of dict rows)
+        self.fetch = fetch or _fetch_rates
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._reader: Optional[ThreadPoolExecutor] = None
+        self._fanout: Optional[ThreadPoolExecutor] = None
+        self._unsubscribe = None
+        self._last_bar: Dict[Tuple[str, str], int] = {}  # (symbol, tf) -> last scanned bar time
+
+        self.scans = 0
+        self.skipped = 0
+        self.signals = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def _symbols(self) -> List[str]:
+        return [s.upper() for s in (self.symbols or getattr(settings, "ALEX_SCAN_SYMBOLS", ALLOWED_SYMBOLS))]
+
+    def _timeframes(self) -> List[str]:
+        return [tf.upper() for tf in (self.timeframes or getattr(settings, "ALEX_SCAN_TIMEFRAMES", DEFAULT_TIMEFRAMES))]
+
+    def _bars(self) -> int:
+        return int(getattr(settings, "ALEX_SCAN_BARS", DEFAULT_BARS))
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        with self._lock:
+            if self._unsubscribe is not None:
+                return
+            workers = int(getattr(settings, "ALEX_SCAN_WORKERS", DEFAULT_WORKERS))
+            self._pool = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+            self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alex-scan-read")
+            self._fanout = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alex-scan-fanout")
+            self._unsubscribe = candle_aggregator.subscribe(self.on_bar)
+
+        for symbol in self._symbols():
+            for tf in self._timeframes():
+                try:
+                    candle_aggregator.track(symbol, tf, pin=True)
+                except ValueError:
+                    # unsupported timeframe in settings
+                    self.errors += 1
+
+    def stop(self) -> None:
+        with self._lock:
+            unsubscribe, self._unsubscribe = self._unsubscribe, None
+            pool, self._pool = self._pool, None
+            reader, self._reader = self._reader, None
+            fanout, self._fanout = self._fanout, None
+        if unsubscribe:
+            unsubscribe()
+        if reader:
+            reader.shutdown(wait=False, cancel_futures=True)
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if fanout:
+            fanout.shutdown(wait=True)
+
+    # ---------- events ----------
+    def on_bar(self, event: str, symbol: str, timeframe: str, bar: Dict[str, Any]) -> None:
+        """Candle aggregator subscriber (runs on the tick stream thread: only submits, never waits)."""
+        reader = self._reader
+        if event != "bar_close" or reader is None:
+            return
+        if symbol not in self._symbols() or timeframe not in self._timeframes():
+            return
+
+        key = (symbol, timeframe)
+        closed_at = int(bar["time"])
+        with self._lock:
+            if self._last_bar.get(key, -1) >= closed_at:
+                self.skipped += 1
+                return
+            self._last_bar[key] = closed_at
+
+        try:
+            reader.submit(self._scan, symbol, timeframe, closed_at)
+        except RuntimeError:
+            # stopped between the check and the submit
+            pass
+
+    def _scan(self, symbol: str, timeframe: str, closed_at: int) -> None:
+        """Reader thread: closed history up to (and including) the bar that just closed -> pool."""
+        bars = self._bars()
+        try:
+            # the terminal/buffer already has the new forming bar: one extra, dropped below
+            candles = CandleSeries.from_rates(self.fetch(symbol, timeframe, bars + 1))
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{symbol} {timeframe}: {type(e).__name__}: {e}"
+            return
+        n = int(np.searchsorted(candles.time, closed_at, side="right"))
+        if n == 0 or int(candles.time[n - 1]) != closed_at:
+            # the history doesn't have the bar that closed (yet): no guessing
+            self.skipped += 1
+            return
+        candles = candles[max(0, n - bars):n]
+
+        pool = self._pool
+        if pool is None:
+            return
+        try:
+            future = pool.submit(analyze_columns, symbol, timeframe, bars, series_columns(candles))
+        except RuntimeError:
+            # pool shut down between the check and the submit
+            return
+        self.scans += 1
+        future.add_done_callback(lambda f: self._on_result(symbol, timeframe, f))
+
+    def _on_result(self, symbol: str, timeframe: str, future: Future) -> None:
+        try:
+            decision = future.result()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{symbol} {timeframe}: {type(e).__name__}: {e}"
+            return
+        if str(decision.get("action", "WAIT")).upper() not in {"BUY", "SELL"}:
+            return
+        fanout = self._fanout
+        if fanout is not None:
+            fanout.submit(self._publish, symbol, timeframe, decision)
+
+    def _publish(self, symbol: str, timeframe: str, decision: Dict[str, Any]) -> None:
+        close_old_connections()
+        try:
+            decision.setdefault("meta", {})["source"] = "scanner"
+            fan_out_signal(symbol=symbol, timeframe=timeframe, decision=decision)
+            self.signals += 1
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{symbol} {timeframe}: {type(e).__name__}: {e}"
+        finally:
+            close_old_connections()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._unsubscribe is not None,
+            "pairs": len(self._symbols()) * len(self._timeframes()),
+            "scans": self.scans,
+            "skipped": self.skipped,
+            "signals": self.signals,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+def _fetch_rates(symbol: str, timeframe: str, bars: int):
+    from trading.mt5.service import MT5Service  # heavy import, only where MT5 is attached
+
+    return MT5Service().get_symbol_rates(symbol, timeframe, bars)
+
+
+# one scanner per process (start it in one process only)
+market_scanner = MarketScanner()
@@ -0,0 +1,135 @@
+# ai_assistant/services/signals.py
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+from notifications.models import NotificationPreference, NotificationDelivery, SignalEvent
+
+
+def extract_levels(decision: dict) -> dict:
+    """
+    Normalize SL/TPs from decision if present.
+    Adjust these keys to match your zone_engine output.
+    """
+    sl = decision.get("sl") or decision.get("stop_loss")
+    tps = decision.get("tps") or decision.get("take_profits") or []
+    tp1 = tps[0] if len(tps) > 0 else decision.get("tp1")
+    tp2 = tps[1] if len(tps) > 1 else decision.get("tp2")
+    tp3 = tps[2] if len(tps) > 2 else decision.get("tp3")
+    return {"sl": sl, "tp1": tp1, "tp2": tp2, "tp3": tp3}
+
+
+def notify_user(user, *, title: str, body: str, data: dict, prefs: NotificationPreference) -> None:
+    """
+    Sends notifications only if allowed by preferences.
+    Uses your existing notifications/services.py if present.
+    """
+    # Import lazily so server doesn't crash if you haven't finished services wiring
+    try:
+        from notifications.services import send_webpush_to_user
+    except Exception:
+        send_webpush_to_user = None
+
+    try:
+        from notifications.telegram import send_telegram_message  # optional
+    except Exception:
+        send_telegram_message = None
+
+    # WEBPUSH
+    if prefs.webpush_enabled and send_webpush_to_user:
+        res = send_webpush_to_user(user=user, title=title, body=body, data=data)
+        # notifications.services returns a bool, older helpers returned (ok, reason)
+        ok, reason = res if isinstance(res, tuple) else (bool(res), "" if res else "not_sent")
+        NotificationDelivery.objects.create(
+            user=user,
+            channel="WEBPUSH",
+            title=title,
+            body=body,
+            data=data,
+            ok=bool(ok),
+            error="" if ok else str(reason),
+        )
+
+    # TELEGRAM (optional)
+    if prefs.telegram_enabled and send_telegram_message:
+        try:
+            send_telegram_message(user=user, text=f"{title}\n{body}")
+            NotificationDelivery.objects.create(
+                user=user,
+                channel="TELEGRAM",
+                title=title,
+                body=body,
+                data=data,
+                ok=True,
+                error="",
+            )
+        except Exception as e:
+            NotificationDelivery.objects.create(
+                user=user,
+                channel="TELEGRAM",
+                title=title,
+                body=body,
+                data=data,
+                ok=False,
+                error=str(e),
+            )
+
+
+def signal_message(symbol: str, timeframe: str, action: str, confidence: int, levels: Dict[str, Any]) -> Tuple[str, str]:
+    title = f"Alex Signal: {symbol} {action}"
+    body = f"TF: {timeframe} | Conf: {confidence}\nSL: {levels['sl']}\nTP1: {levels['tp1']} | TP2: {levels['tp2']} | TP3: {levels['tp3']}"
+    return title, body
+
+
+def fan_out_signal(*, symbol: str, timeframe: str, decision: Dict[str, Any]) -> Dict[str, int]:
+    """
+    One shared decision -> a SignalEvent for every user with signal alerts on (one bulk insert),
+    then their notifications (per-user cooldown, same channels as the analyze view).
+    """
+    action = str(decision.get("action", "WAIT")).upper()
+    if action not in {"BUY", "SELL"}:
+        return {"events": 0, "notified": 0}
+
+    try:
+        from notifications.services import allow_notify_with_cooldown
+    except Exception:
+        allow_notify_with_cooldown = None
+
+    confidence = int(decision.get("confidence") or 0)
+    levels = extract_levels(decision)
+    subscribers = list(
+        NotificationPreference.objects.filter(signal_alerts_enabled=True).select_related("user")
+    )
+
+    SignalEvent.objects.bulk_create(
+        [
+            SignalEvent(
+                user=prefs.user,
+                symbol=symbol,
+                timeframe=timeframe,
+                action=action,
+                confidence=confidence,
+                sl=levels["sl"],
+                tp1=levels["tp1"],
+                tp2=levels["tp2"],
+                tp3=levels["tp3"],
+                payload=decision,
+            )
+            for prefs in subscribers
+        ],
+        batch_size=500,
+    )
+
+    title, body = signal_message(symbol, timeframe, action, confidence, levels)
+    data = {"symbol": symbol, "timeframe": timeframe, "action": action}
+    notified = 0
+    for prefs in subscribers:
+        if allow_notify_with_cooldown and not allow_notify_with_cooldown(prefs.user_id, symbol, action):
+            continue
+        try:
+            notify_user(prefs.user, title=title, body=body, data=data, prefs=prefs)
+            notified += 1
+        except Exception:
+            # one user's broken channel must not stop the rest
+            pass
+    return {"events": len(subscribers), "notified": notified}
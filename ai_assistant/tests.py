@@ -0,0 +1,748 @@
+import asyncio
+import dataclasses
+import json
+import random
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ai_assistant.engine import indicators as ind
+from ai_assistant.engine.series import CandleSeries
+from ai_assistant.engine.types import Candle
+
+
+def _random_candles(n: int, seed: int = 7, flat_every: int = 0):
+    rnd = random.Random(seed)
+    out = []
+    price = 1900.0
+    for i in range(n):
+        o = price
+        c = o + rnd.uniform(-3, 3)
+        h = max(o, c) + rnd.uniform(0, 2)
+        l = min(o, c) - rnd.uniform(0, 2)
+        if flat_every and i % flat_every == 0:
+            # zero-range bars and repeated highs/lows exercise the edge cases
+            h = l = o = c
+        out.append(Candle(time=i * 60, open=o, high=h, low=l, close=c, tick_volume=rnd.randint(1, 50)))
+        price = c
+    return out
+
+
+class CandleSeriesTests(SimpleTestCase):
+    def test_rates_are_viewed_not_copied(self):
+        dt = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                       ("close", "<f8"), ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+        rates = np.zeros(10, dtype=dt)
+        rates["close"] = np.arange(10)
+        s = CandleSeries.from_rates(rates)
+        self.assertTrue(np.shares_memory(s.close, rates))
+        self.assertEqual(s[-1].close, 9.0)
+        self.assertEqual(len(s[2:5]), 3)
+
+    def test_rows_match_candles(self):
+        candles = _random_candles(50)
+        s = CandleSeries.from_candles(candles)
+        self.assertEqual(s.to_candles(), candles)
+        self.assertTrue(all(a == b for a, b in zip(s, candles)))
+
+
+class IndicatorParityTests(SimpleTestCase):
+    def setUp(self):
+        self.candles = _random_candles(400, flat_every=37)
+        self.series = CandleSeries.from_candles(self.candles)
+
+    def test_true_ranges(self):
+        expected = [ind.true_range(self.candles[i], self.candles[i - 1]) for i in range(1, len(self.candles))]
+        got = ind.true_ranges(self.series.high, self.series.low, self.series.close)
+        self.assertEqual(got.tolist(), expected)
+
+    def test_atr_scalar(self):
+        for period in (1, 5, 14, 50):
+            for n in (0, period, period + 1, 120, 400):
+                candles = self.candles[:n]
+                self.assertEqual(ind.atr_np(CandleSeries.from_candles(candles), period), ind.atr(candles, period))
+        # atr() itself takes the vectorized path for a series
+        self.assertEqual(ind.atr(self.series, 14), ind.atr(self.candles, 14))
+
+    def test_atr_sma_series(self):
+        period = 14
+        got = ind.atr_sma(self.series, period)
+        for k in (0, 1, 100, len(got) - 1):
+            end = k + period + 1
+            self.assertAlmostEqual(got[k], ind.atr(self.candles[:end], period), places=9)
+
+    def test_atr_wilder(self):
+        period = 14
+        trs = [ind.true_range(self.candles[i], self.candles[i - 1]) for i in range(1, len(self.candles))]
+        ref = [sum(trs[:period]) / period]
+        for tr in trs[period:]:
+            ref.append((ref[-1] * (period - 1) + tr) / period)
+        np.testing.assert_allclose(ind.atr_wilder(self.series, period), ref, rtol=1e-12)
+
+    def test_pivots(self):
+        for left, right in ((2, 2), (1, 3), (3, 1), (0, 2), (2, 0)):
+            highs = ind.pivot_high_mask(self.series, left, right)
+            lows = ind.pivot_low_mask(self.series, left, right)
+            for i in range(len(self.candles)):
+                self.assertEqual(bool(highs[i]), ind.is_pivot_high(self.candles, i, left, right), (left, right, i))
+                self.assertEqual(bool(lows[i]), ind.is_pivot_low(self.candles, i, left, right), (left, right, i))
+
+    def test_body_ratio(self):
+        got = ind.body_ratio(self.series)
+        for i, c in enumerate(self.candles):
+            rng = c.high - c.low
+            if rng <= 0:
+                self.assertTrue(np.isnan(got[i]))
+            else:
+                self.assertEqual(got[i], abs(c.close - c.open) / rng)
+
+    def test_ema(self):
+        closes = [c.close for c in self.candles]
+        period = 20
+        alpha = 2.0 / (period + 1)
+        ref = [closes[0]]
+        for x in closes[1:]:
+            ref.append(alpha * x + (1 - alpha) * ref[-1])
+        np.testing.assert_allclose(ind.ema(self.series.close, period), ref, rtol=1e-12)
+
+
+class StreamingIndicatorTests(SimpleTestCase):
+    def setUp(self):
+        self.candles = _random_candles(300, seed=11, flat_every=23)
+
+    def test_atr_matches_batch_with_forming_bar(self):
+        from ai_assistant.engine.streaming import StreamingATR
+
+        s = StreamingATR(14)
+        for i, c in enumerate(self.candles):
+            # the forming bar is revised a few times before it closes
+            for frac in (0.3, 0.7):
+                partial = Candle(c.time, c.open, max(c.open, c.close * frac + c.open * (1 - frac)),
+                                 min(c.open, c.close * frac + c.open * (1 - frac)),
+                                 c.close * frac + c.open * (1 - frac), 1)
+                self.assertEqual(s.update(partial, closed=False), ind.atr(self.candles[:i] + [partial], 14))
+            self.assertEqual(s.update(c, closed=False), ind.atr(self.candles[: i + 1], 14))
+            s.update(c, closed=True)
+        self.assertEqual(s.value, ind.atr(self.candles, 14))
+
+    def test_ema_and_rolling_high_low(self):
+        from ai_assistant.engine.streaming import RollingHighLow, StreamingEMA
+
+        ema = StreamingEMA(20)
+        hl = RollingHighLow(20)
+        ref = ind.ema(np.array([c.close for c in self.candles]), 20)
+        for i, c in enumerate(self.candles):
+            hl.update(c, closed=False)
+            window = self.candles[max(0, i - 19): i + 1]
+            self.assertEqual(hl.value, (max(x.high for x in window), min(x.low for x in window)))
+            hl.update(c, closed=True)
+            self.assertEqual(hl.value, (max(x.high for x in window), min(x.low for x in window)))
+            self.assertAlmostEqual(ema.update(c, closed=True), ref[i], places=9)
+
+    def test_pivots_match_batch(self):
+        from ai_assistant.engine.streaming import PivotDetector
+
+        p = PivotDetector(2, 2, keep=1000)
+        for c in self.candles:
+            p.update(c, closed=True)
+        n = len(self.candles)
+        self.assertEqual([t for t, _ in p.highs],
+                         [self.candles[i].time for i in range(n) if ind.is_pivot_high(self.candles, i, 2, 2)])
+        self.assertEqual([t for t, _ in p.lows],
+                         [self.candles[i].time for i in range(n) if ind.is_pivot_low(self.candles, i, 2, 2)])
+
+    def test_registry_serves_live_value_when_in_sync(self):
+        from ai_assistant.engine.streaming import IndicatorRegistry
+
+        reg = IndicatorRegistry()
+        reg._attached = True  # as if subscribed to the candle aggregator
+        head, nxt = self.candles[:200], self.candles[200]
+        self.assertEqual(reg.atr("xauusd", "m5", head, 14), ind.atr(head, 14))
+        self.assertEqual(reg.misses, 1)
+
+        last = head[-1]  # the forming bar when seeded; now it closes and the next one starts
+        reg.on_bar("bar_close", "XAUUSD", "M5", dataclasses.asdict(last))
+        reg.on_bar("bar_update", "XAUUSD", "M5", {"time": nxt.time, "open": nxt.open, "high": nxt.high,
+                                                  "low": nxt.low, "close": nxt.close})
+        self.assertEqual(reg.atr("XAUUSD", "M5", self.candles[:201], 14), ind.atr(self.candles[:201], 14))
+        self.assertEqual(reg.hits, 1)
+
+    def test_registry_misses_when_earlier_bars_differ(self):
+        from ai_assistant.engine.streaming import IndicatorRegistry
+
+        reg = IndicatorRegistry()
+        reg._attached = True
+        head = self.candles[:200]
+        reg.atr("XAUUSD", "M5", head, 14)
+
+        # same newest bar, different bar 5 back (e.g. rates vs. a tick-built buffer)
+        other = list(head)
+        c = other[-5]
+        other[-5] = dataclasses.replace(c, high=c.high + 1.0)
+        self.assertEqual(reg.atr("XAUUSD", "M5", other, 14), ind.atr(other, 14))
+        self.assertEqual(reg.hits, 0)
+        self.assertEqual(reg.misses, 2)
+
+
+class BuildZonesTests(SimpleTestCase):
+    def test_touches_and_ranking_match_a_full_rescan(self):
+        from ai_assistant.engine.zone_refined import build_zones
+
+        for seed in range(10):
+            candles = _random_candles(600, seed=seed, flat_every=29)
+            zones = build_zones(candles, lookback=None)
+            for z in zones:
+                later = [c.close for c in candles[z.created_index + 1:]]
+                self.assertEqual(z.touches, sum(1 for p in later if z.low <= p <= z.high))
+            strengths = [z.strength for z in zones]
+            self.assertEqual(strengths, sorted(strengths, reverse=True))
+            self.assertEqual(build_zones(CandleSeries.from_candles(candles), lookback=None), zones)
+
+
+class BacktestTests(SimpleTestCase):
+    def test_signals_match_a_bar_by_bar_replay(self):
+        from ai_assistant.engine.backtest import BacktestConfig, find_signals
+        from ai_assistant.engine.zone_engine import _bearish_engulf, _bullish_engulf
+        from ai_assistant.engine.zone_refined import build_zones, detect_rejection
+
+        candles = _random_candles(900, seed=3, flat_every=37)
+        for mode in ("FAST", "MEDIUM", "LONG"):
+            expected = []
+            for t in range(29, len(candles)):
+                window = candles[:t + 1]
+                zones = build_zones(window)
+                if not zones:
+                    continue
+                price = window[-1].close
+                best = min(zones, key=lambda z: (abs(price - (z.low + z.high) / 2.0), -z.strength))
+                if not detect_rejection(window, best):
+                    continue
+                demand = best.zone_type == "DEMAND"
+                level = (best.low + best.high) / 2.0
+                tol = max(ind.atr(window, 14), 1e-6)
+                last, prev = window[-1], window[-2]
+                if mode == "FAST":
+                    ok = last.close > level + tol * 0.1 if demand else last.close < level - tol * 0.1
+                elif mode == "MEDIUM":
+                    ok = _bullish_engulf(prev, last) if demand else _bearish_engulf(prev, last)
+                else:
+                    ok = abs(last.close - level) >= tol
+                if ok:
+                    expected.append((t, 1 if demand else -1, best.low, best.high))
+
+            sig = find_signals(CandleSeries.from_candles(candles), BacktestConfig(mode=mode))
+            got = list(zip(sig["t"].tolist(), sig["side"].tolist(), sig["zone_low"].tolist(), sig["zone_high"].tolist()))
+            self.assertEqual(got, expected, mode)
+            self.assertTrue(expected)
+
+    def test_date_range_split_gives_the_same_result(self):
+        from ai_assistant.engine.backtest import BacktestConfig, run_backtest
+
+        candles = _random_candles(4000, seed=5)
+        cfg = BacktestConfig(timeframe="M15", spread=0.3, slippage=0.1)
+        single = run_backtest(candles, cfg)
+        split = run_backtest(candles, cfg, workers=2)
+        single.pop("elapsed_ms")
+        split.pop("elapsed_ms")
+        self.assertEqual(single, split)
+        self.assertGreater(single["stats"]["trades"], 0)
+        # one position at a time
+        for a, b in zip(single["trades"], single["trades"][1:]):
+            self.assertLessEqual(a["exit_time"], b["signal_time"])
+
+
+class OptimizerTests(SimpleTestCase):
+    def test_walk_forward_picks_the_best_train_config(self):
+        from ai_assistant.engine.optimize import optimize, param_grid
+
+        with self.assertRaises(ValueError):
+            param_grid({"no_such_field": (1, 2)})
+
+        candles = _random_candles(3000, seed=2)
+        grid = {"rr": (1.0, 2.0, 3.0), "min_zone_strength": (0.0,)}
+        report = optimize({"x": ("M15", candles)}, grid=grid, folds=2, min_trades=1)["FAST"]
+        self.assertEqual(report["combos"], 3)
+        self.assertEqual(len(report["folds"]), 2)
+
+        # each config on its own: the fold's pick has the best train result
+        singles = [
+            optimize({"x": ("M15", candles)}, grid={**grid, "rr": (rr,)}, folds=2, min_trades=1)["FAST"]["folds"]
+            for rr in grid["rr"]
+        ]
+        for k, fold in enumerate(report["folds"]):
+            best = max(single[k]["train"]["sum_r"] for single in singles)
+            self.assertAlmostEqual(fold["train"]["sum_r"], best)
+        self.assertEqual(report["oos"]["trades"], sum(f["test"]["trades"] for f in report["folds"]))
+
+
+class BenchTests(SimpleTestCase):
+    def test_run_and_compare_with_a_baseline(self):
+        from ai_assistant.engine import bench
+
+        current = bench.run(bench.load_fixtures(None, [300]), only=["atr", "build_zones"],
+                            target_seconds=0.01, log=lambda line: None)
+        self.assertEqual(sorted(current["results"]), ["atr@synthetic@300", "build_zones@synthetic@300"])
+        self.assertEqual(bench.compare(current, current), [])
+
+        faster = {"results": {k: {**v, "p50_us": v["p50_us"] / 2} for k, v in current["results"].items()}}
+        self.assertEqual(len(bench.compare(current, faster)), 2)
+
+
+    def test_market_data_cases_set_up_django_first(self):
+        import django
+        from django.apps import apps
+
+        from ai_assistant.engine import bench
+
+        rates = bench.synthetic_rates(50)
+        with mock.patch.object(apps, "ready", False), mock.patch.object(django, "setup") as setup, \
+                mock.patch.dict("os.environ", {}, clear=True):
+            self.assertIsNone(bench._provider("ai_assistant.engine.market_data", rates))
+            setup.assert_not_called()
+        with mock.patch.object(apps, "ready", False), mock.patch.object(django, "setup") as setup, \
+                mock.patch.dict("os.environ", {"DJANGO_SETTINGS_MODULE": "config.settings"}):
+            bench._provider("ai_assistant.engine.market_data", rates)
+            setup.assert_called_once_with()
+
+        try:
+            import ai_assistant.engine.market_data  # noqa: F401
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        case = bench.build_cases(rates)["market_data.engine"]
+        self.assertIsNotNone(case)
+        self.assertEqual(len(case()), 50)
+
+
+class ResampleTests(SimpleTestCase):
+    def test_matches_grouping_by_bar_open(self):
+        from ai_assistant.engine.bench import synthetic_rates
+        from ai_assistant.engine.multi_tf import bar_open_times, plan_fetch, resample
+
+        rates = synthetic_rates(20000, timeframe_seconds=60)
+        rates["time"] += 37 * 60  # starts inside an hour: the first H1 bar is partial
+        keep = np.ones(len(rates), dtype=bool)
+        keep[5000:5400] = False  # market closed
+        base = CandleSeries.from_rates(rates[keep])
+
+        for tf in ("M15", "H1", "H4", "D1", "W1"):
+            got = resample(base, "M1", tf)
+            keys = bar_open_times(base.time, tf)
+            opens = sorted(set(keys.tolist()))
+            if opens[0] != int(base.time[0]):
+                opens = opens[1:]
+            self.assertEqual(got.time.tolist(), opens, tf)
+            for i in (0, len(opens) // 2, len(opens) - 1):
+                m = keys == opens[i]
+                self.assertEqual(got.open[i], base.open[m][0])
+                self.assertEqual(got.high[i], base.high[m].max())
+                self.assertEqual(got.low[i], base.low[m].min())
+                self.assertEqual(got.close[i], base.close[m][-1])
+                self.assertEqual(got.tick_volume[i], base.tick_volume[m].sum())
+
+        self.assertEqual(plan_fetch(["H4", "M5", "H1", "D1"], 300, 20000), ("M5", 14448, ["H4", "M5", "H1"], ["D1"]))
+
+
+class DecisionCacheTests(SimpleTestCase):
+    def test_single_flight_shares_one_computation(self):
+        import threading
+        from ai_assistant.services.decision_cache import DecisionCache
+
+        cache = DecisionCache(max_entries=8, ttl_seconds=60)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"action": "WAIT"}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(hit for _, hit in results), [False] + [True] * 7)
+        # every caller gets its own copy
+        results[0][0]["action"] = "BUY"
+        self.assertEqual(cache.get_or_compute("k", compute)[0], {"action": "WAIT"})
+
+    def test_lru_and_ttl(self):
+        from ai_assistant.services.decision_cache import DecisionCache
+
+        cache = DecisionCache(max_entries=2, ttl_seconds=60)
+        for k in ("a", "b"):
+            cache.get_or_compute(k, lambda: k)
+        cache.get_or_compute("a", lambda: "a")       # a is now most recent
+        cache.get_or_compute("c", lambda: "c")       # evicts b
+        self.assertTrue(cache.get_or_compute("a", lambda: "x")[1])
+        self.assertFalse(cache.get_or_compute("b", lambda: "b")[1])
+
+        expired = DecisionCache(max_entries=2, ttl_seconds=0)
+        expired.get_or_compute("a", lambda: 1)
+        self.assertFalse(expired.get_or_compute("a", lambda: 2)[1])
+
+
+    def test_submitted_work_is_shared_until_it_lands(self):
+        from concurrent.futures import Future
+        from ai_assistant.services.decision_cache import DecisionCache
+
+        cache = DecisionCache(max_entries=8, ttl_seconds=60)
+        work = Future()
+        submits = []
+
+        def submit():
+            submits.append(1)
+            return work
+
+        lead, lead_hit = cache.get_or_submit("k", submit)
+        follow, follow_hit = cache.get_or_submit("k", submit)
+        self.assertEqual((lead_hit, follow_hit, len(submits)), (False, True, 1))
+        self.assertFalse(follow.done())
+
+        work.set_result({"action": "WAIT"})
+        self.assertEqual(follow.result(timeout=1), {"action": "WAIT"})
+        lead.result()["action"] = "BUY"  # copies, not the cached value
+        self.assertEqual(cache.get_or_compute("k", lambda: "x"), ({"action": "WAIT"}, True))
+
+        failed = Future()
+        out, _ = cache.get_or_submit("bad", lambda: failed)
+        failed.set_exception(ValueError("boom"))
+        self.assertIsInstance(out.exception(timeout=1), ValueError)
+        self.assertEqual(cache.stats()["inflight"], 0)
+
+
+class ExplanationTests(SimpleTestCase):
+    decision = {"status": "OK", "action": "WAIT", "symbol": "XAUUSD", "timeframe": "M15",
+                "confidence": 40, "confirmation": False, "entry_price": None,
+                "user_message": "Zone spotted", "raw": {"reason": "test"}}
+
+    def setUp(self):
+        from ai_assistant.services.explanations import explanation_cache
+
+        explanation_cache.clear()
+
+    def test_validated_explanations_are_reused(self):
+        from ai_assistant.llm.stub_client import StubLLMClient
+        from ai_assistant.services.explanations import ExplanationDispatcher
+
+        stub = StubLLMClient()
+        dispatcher = ExplanationDispatcher(workers=2)
+        for _ in range(3):
+            block = dispatcher.request(self.decision, llm=stub, symbol="XAUUSD", timeframe="M15", user_id=1, wait=5)
+            self.assertIn("WAIT", block["text"])
+        self.assertEqual(stub.calls, 1)
+
+        # blocked output is not cached
+        bad = StubLLMClient(text="not json")
+        other = dict(self.decision, confidence=41)
+        for _ in range(2):
+            block = dispatcher.request(other, llm=bad, symbol="XAUUSD", timeframe="M15", user_id=1, wait=5)
+            self.assertIn("guard_blocked_reason", block)
+        self.assertEqual(bad.calls, 2)
+
+    def test_deferred_returns_immediately_and_pushes_later(self):
+        from ai_assistant.llm.stub_client import StubLLMClient
+        from ai_assistant.services import explanations
+
+        sent = []
+        original = explanations.broadcast_explanation
+        explanations.broadcast_explanation = lambda user_id, payload: sent.append((user_id, payload))
+        try:
+            stub = StubLLMClient(delay=0.2)
+            dispatcher = explanations.ExplanationDispatcher(workers=2)
+            first = dispatcher.request(self.decision, llm=stub, symbol="XAUUSD", timeframe="M15", user_id=1, wait=0)
+            second = dispatcher.request(self.decision, llm=stub, symbol="XAUUSD", timeframe="M15", user_id=2, wait=0)
+            self.assertTrue(first["pending"])
+            self.assertEqual(first["job"], second["job"])
+            for _ in range(500):
+                if len(sent) == 2:
+                    break
+                time.sleep(0.01)
+        finally:
+            explanations.broadcast_explanation = original
+
+        self.assertEqual(stub.calls, 1)
+        self.assertEqual(sorted(u for u, _ in sent), [1, 2])
+        self.assertIn("text", sent[0][1]["alex"])
+
+    @override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+    async def test_deferred_explanation_reaches_connected_socket(self):
+        from asgiref.testing import ApplicationCommunicator
+        from channels.layers import get_channel_layer
+        from django.utils.asyncio import async_unsafe
+
+        from ai_assistant import broadcast, consumers
+        from ai_assistant.llm.stub_client import StubLLMClient
+        from ai_assistant.services.explanations import ExplanationDispatcher
+
+        class FakeJWT:
+            def get_validated_token(self, raw):
+                return raw
+
+            @async_unsafe  # like the real get_user(): an ORM query
+            def get_user(self, token):
+                return SimpleNamespace(id=7, is_anonymous=False)
+
+        layer = get_channel_layer()
+        loop = asyncio.get_running_loop()
+
+        class SameLoopLayer:
+            # the in-memory layer only works on the loop its consumers run on; the dispatcher
+            # broadcasts from a pool thread (fine with Redis), so hop back onto the test loop
+            async def group_send(self, group, message):
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(layer.group_send(group, message), loop))
+
+        with mock.patch.object(consumers, "JWTAuthentication", FakeJWT), \
+                mock.patch.object(broadcast, "channel_layer", SameLoopLayer()):
+            ws = ApplicationCommunicator(consumers.AlexConsumer.as_asgi(), {
+                "type": "websocket", "path": "/ws/alex/", "query_string": b"token=t",
+                "headers": [], "subprotocols": [],
+            })
+            await ws.send_input({"type": "websocket.connect"})
+            # a failed user lookup closes with 4401 instead
+            self.assertEqual((await ws.receive_output(timeout=5))["type"], "websocket.accept")
+
+            dispatcher = ExplanationDispatcher(workers=1)
+            pending = await sync_to_async(dispatcher.request)(
+                self.decision, llm=StubLLMClient(delay=0.1), symbol="XAUUSD", timeframe="M15", user_id=7, wait=0,
+            )
+            self.assertTrue(pending["pending"])
+
+            out = await ws.receive_output(timeout=5)
+            await ws.send_input({"type": "websocket.disconnect", "code": 1000})
+            await ws.wait(timeout=1)
+
+        self.assertEqual(out["type"], "websocket.send")
+        msg = json.loads(out["text"])
+        self.assertEqual(msg["type"], "explanation")
+        self.assertEqual(msg["job"], pending["job"])
+        self.assertIn("text", msg["alex"])
+
+
+class WorkerTests(SimpleTestCase):
+    def test_analyze_columns_matches_in_process_analysis(self):
+        import pickle
+
+        from ai_assistant.engine.worker import analyze_columns, jsonable, series_columns
+        from ai_assistant.engine.zone_engine import analyze_zones
+
+        series = CandleSeries.from_candles(_random_candles(300, seed=3))
+        # what the pool pickles: the columns, not the bars
+        columns = pickle.loads(pickle.dumps(series_columns(series)))
+        out = analyze_columns("XAUUSD", "M15", 300, columns)
+        self.assertEqual(out, jsonable(analyze_zones(symbol="XAUUSD", timeframe="M15", bars=300, candles=series)))
+        self.assertEqual(json.loads(json.dumps(out)), out)
+
+
+@override_settings(ALEX_SCAN_BARS=100)
+class MarketScannerTests(SimpleTestCase):
+    def setUp(self):
+        try:
+            from ai_assistant.services import scanner
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        self.mod = scanner
+        self.rows = [dataclasses.asdict(c) for c in _random_candles(150, seed=5)]
+        self.analyzed = []
+        self.published = []
+
+        def analyze(symbol, timeframe, bars, columns):
+            self.analyzed.append((symbol, timeframe, bars, CandleSeries(*columns)))
+            return {"action": self.action, "confidence": 70}
+
+        self.action = "BUY"
+        patches = [
+            mock.patch.object(scanner, "analyze_columns", analyze),
+            mock.patch.object(scanner, "fan_out_signal", lambda **kw: self.published.append(kw)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _scanner(self, rows):
+        from concurrent.futures import ThreadPoolExecutor
+
+        fetched = []
+
+        def fetch(symbol, timeframe, bars):
+            fetched.append((symbol, timeframe, bars))
+            return rows
+
+        sc = self.mod.MarketScanner(symbols=["XAUUSD"], timeframes=["M15"], fetch=fetch)
+        # threads instead of the spawn pool, so the patched analyze_columns is the one that runs
+        sc._pool = ThreadPoolExecutor(max_workers=1)
+        sc._reader = ThreadPoolExecutor(max_workers=1)
+        sc._fanout = ThreadPoolExecutor(max_workers=1)
+        return sc, fetched
+
+    @staticmethod
+    def _drain(sc):
+        # reader -> pool -> fan-out, in that order
+        for ex in (sc._reader, sc._pool, sc._fanout):
+            ex.shutdown(wait=True)
+
+    def test_bar_close_scans_the_fetched_closed_history_once(self):
+        sc, fetched = self._scanner(self.rows)
+        closed = self.rows[-2]  # the last row is the new forming bar
+
+        sc.on_bar("bar_update", "XAUUSD", "M15", closed)
+        sc.on_bar("bar_close", "EURUSD", "M15", closed)  # not on the watchlist
+        sc.on_bar("bar_close", "XAUUSD", "M15", closed)
+        sc.on_bar("bar_close", "XAUUSD", "M15", closed)  # duplicate event
+        self._drain(sc)
+
+        self.assertEqual(fetched, [("XAUUSD", "M15", 101)])
+        self.assertEqual(len(self.analyzed), 1)
+        symbol, tf, bars, candles = self.analyzed[0]
+        self.assertEqual((symbol, tf, bars, len(candles)), ("XAUUSD", "M15", 100, 100))
+        self.assertEqual(int(candles.time[-1]), closed["time"])
+        self.assertEqual(float(candles.high[-1]), closed["high"])
+        self.assertEqual(sc.skipped, 1)
+
+        self.assertEqual(len(self.published), 1)
+        self.assertEqual(self.published[0]["decision"]["meta"]["source"], "scanner")
+
+    def test_history_without_the_closed_bar_is_skipped(self):
+        sc, _ = self._scanner(self.rows[:-5])
+        sc.on_bar("bar_close", "XAUUSD", "M15", self.rows[-2])
+        self._drain(sc)
+        self.assertEqual(self.analyzed, [])
+        self.assertEqual(sc.skipped, 1)
+
+    def test_wait_is_not_published(self):
+        self.action = "WAIT"
+        sc, _ = self._scanner(self.rows)
+        sc.on_bar("bar_close", "XAUUSD", "M15", self.rows[-2])
+        self._drain(sc)
+        self.assertEqual(len(self.analyzed), 1)
+        self.assertEqual(self.published, [])
+
+
+class FanOutSignalTests(TestCase):
+    def test_one_event_per_subscriber_then_notifications(self):
+        import sys
+        import types
+
+        from django.contrib.auth import get_user_model
+        from notifications.models import NotificationPreference, SignalEvent
+
+        from ai_assistant.services import signals
+
+        User = get_user_model()
+        users = [User.objects.create(username=f"u{i}") for i in range(3)]
+        for u in users:
+            NotificationPreference.objects.create(user=u)
+        off = User.objects.create(username="off")
+        NotificationPreference.objects.create(user=off, signal_alerts_enabled=False)
+
+        services = types.ModuleType("notifications.services")
+        # users[0] is still cooling down
+        services.allow_notify_with_cooldown = lambda user_id, symbol, action: user_id != users[0].id
+        decision = {"action": "buy", "confidence": 72, "sl": 1890.0, "tps": [1910.0, 1920.0]}
+
+        with mock.patch.dict(sys.modules, {"notifications.services": services}), \
+                mock.patch.object(signals, "notify_user") as notify:
+            self.assertEqual(signals.fan_out_signal(symbol="XAUUSD", timeframe="M15", decision={"action": "WAIT"}),
+                             {"events": 0, "notified": 0})
+            out = signals.fan_out_signal(symbol="XAUUSD", timeframe="M15", decision=decision)
+
+        self.assertEqual(out, {"events": 3, "notified": 2})
+        events = SignalEvent.objects.order_by("user_id")
+        self.assertEqual([e.user_id for e in events], [u.id for u in users])
+        self.assertEqual({(e.action, e.confidence, e.sl, e.tp1, e.tp2, e.tp3) for e in events},
+                         {("BUY", 72, 1890.0, 1910.0, 1920.0, None)})
+        self.assertEqual(sorted(c.args[0].id for c in notify.call_args_list), [users[1].id, users[2].id])
+        self.assertEqual(notify.call_args.kwargs["title"], "Alex Signal: XAUUSD BUY")
+
+
+class BatchStreamTests(SimpleTestCase):
+    def setUp(self):
+        try:
+            from ai_assistant.api import views
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        from concurrent.futures import ThreadPoolExecutor
+
+        from ai_assistant.services.decision_cache import decision_cache
+
+        self.views = views
+        decision_cache.clear()
+        self.addCleanup(decision_cache.clear)
+
+        self.fetches = []
+        self.analyzed = []
+        self.release = __import__("threading").Event()
+        test = self
+
+        class Provider:
+            def __init__(self, mt5_service=None):
+                pass
+
+            def get_candles(self, symbol, timeframe, bars):
+                test.fetches.append((symbol, timeframe, bars))
+                return _random_candles(bars, seed=len(symbol))
+
+        def analyze(symbol, timeframe, bars, columns):
+            test.analyzed.append((symbol, timeframe, bars))
+            test.release.wait(5)
+            return {"action": "WAIT", "symbol": symbol, "timeframe": timeframe, "confidence": 0}
+
+        pool = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(pool.shutdown, wait=True)
+        for name, value in (("MarketDataProvider", Provider), ("analyze_columns", analyze),
+                            ("analysis_pool", lambda: pool)):
+            p = mock.patch.object(views, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _run(self, items):
+        import threading
+
+        lines = []
+        t = threading.Thread(target=lambda: lines.extend(
+            json.loads(b) for b in self.views._batch_stream(items, mt5=None, auto_trade_enabled=False)))
+        t.start()
+        return t, lines
+
+    def test_concurrent_batches_share_in_flight_decisions(self):
+        from ai_assistant.services.decision_cache import decision_cache
+
+        items = [("XAUUSD", "M15", 100), ("XAUUSD", "M15", 200), ("EURUSD", "H1", 100)]
+        first, a = self._run(items)
+        deadline = time.monotonic() + 5
+        while len(self.analyzed) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # a second dashboard asks for the same tiles while the first is still computing
+        second, b = self._run(items)
+        while decision_cache.stats()["shared"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.release.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(sorted(self.analyzed), sorted(items))
+        # one fetch per (symbol, timeframe) per batch, as deep as its deepest item
+        self.assertEqual(sorted(self.fetches), [("EURUSD", "H1", 100)] * 2 + [("XAUUSD", "M15", 200)] * 2)
+        for lines, cached in ((a, False), (b, True)):
+            self.assertEqual(lines[-1]["done"], True)
+            self.assertEqual(lines[-1]["count"], 3)
+            body = lines[:-1]
+            self.assertEqual(sorted((x["symbol"], x["timeframe"], x["bars"]) for x in body), sorted(items))
+            self.assertTrue(all(x["cached"] is cached for x in body))
+            self.assertTrue(all("execution_guard" in x["decision"]["meta"] for x in body))
+
+        # and once landed, a third batch is served from the cache without the pool
+        third, c = self._run(items)
+        third.join(5)
+        self.assertEqual(len(self.analyzed), 3)
+        self.assertTrue(all(x["cached"] for x in c[:-1]))
@@ -0,0 +1,9 @@
+# ai_assistant/urls.py
+from django.urls import path
+from .api.views import AlexAnalyzeView, AlexBatchAnalyzeView, AlexMultiTimeframeAnalyzeView
+
+urlpatterns = [
+    path("alex/analyze/", AlexAnalyzeView.as_view(), name="alex-analyze"),
+    path("alex/analyze/batch/", AlexBatchAnalyzeView.as_view(), name="alex-analyze-batch"),
+    path("alex/analyze/mtf/", AlexMultiTimeframeAnalyzeView.as_view(), name="alex-analyze-mtf"),
+]
@@ -10,10 +10,11 @@ from channels.auth import AuthMiddlewareStack
 django_asgi_app = get_asgi_application()
 
 import trading.routing  # <-- adjust to your app
+import ai_assistant.routing
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
-        URLRouter(trading.routing.websocket_urlpatterns)
+        URLRouter(trading.routing.websocket_urlpatterns + ai_assistant.routing.websocket_urlpatterns)
     ),
 })
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import logging
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterator, List
 
 from django.db import transaction
+from django.utils import timezone
 
 from .models import Trade, TradeAuditEvent
 
 
+logger = logging.getLogger(__name__)
+
+
+class AuditWriteFailed(RuntimeError):
+    """A buffered trade's audit events could not be written (logged with the event types)."""
+
+
 @dataclass
 class AuditCtx:
     actor_id: Optional[int] = None
@@ -15,6 +26,168 @@ class AuditCtx:
     user_agent: Optional[str] = None
 
 
+def _build_event(trade: Trade, event_type: str, payload: Optional[Dict[str, Any]], ctx: Optional[AuditCtx]) -> TradeAuditEvent:
+    ctx = ctx or AuditCtx()
+    return TradeAuditEvent(
+        trade_id=trade.pk,
+        event_type=event_type,
+        at=timezone.now(),
+        payload=payload or {},
+        actor_id=ctx.actor_id,
+        ip_address=ctx.ip,
+        user_agent=ctx.user_agent,
+    )
+
+
+def _write_events(trade_id: int, events: List[TradeAuditEvent]) -> None:
+    """
+    Appends `events` (in order) to the trade's chain in one transaction:
+    lock the trade row, number + hash-chain them in memory from the current tail, one bulk insert.
+    Same seq / prev_hash / hash as TradeAuditEvent.save() would give them one by one.
+    """
+    with transaction.atomic():
+        # the trade row lock serializes every writer of this trade's chain
+        locked = Trade.objects.select_for_update().only("pk", "audit_seq").get(pk=trade_id)
+        seq = locked.audit_seq
+        prev_hash = (
+            TradeAuditEvent.objects.filter(trade_id=trade_id)
+            .order_by("-seq", "-id")
+            .values_list("hash", flat=True)
+            .first()
+        ) or ""
+
+        for ev in events:
+            seq += 1
+            ev.seq = seq
+            ev.prev_hash = prev_hash
+            ev.hash = ev._compute_hash()
+            prev_hash = ev.hash
+
+        TradeAuditEvent.objects.bulk_create(events)
+        Trade.objects.filter(pk=trade_id).update(audit_seq=seq)
+
+
+class AuditBuffer:
+    """
+    Collects one trade's audit events in memory (event time taken when added)
+    and writes them with a single _write_events() on flush().
+    Events get their seq / hash on flush. Once closed, add() writes straight to the chain
+    (after the closing flush), so a late event from a still-running MT5 job isn't lost.
+    """
+
+    def __init__(self, trade: Trade, ctx: Optional[AuditCtx] = None):
+        self.trade = trade
+        self.ctx = ctx
+        self.closed = False
+        self._events: List[TradeAuditEvent] = []
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(
+        self,
+        event_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        ctx: Optional[AuditCtx] = None,
+    ) -> TradeAuditEvent:
+        ev = _build_event(self.trade, event_type, payload, ctx or self.ctx)
+        with self._lock:
+            if not self.closed:
+                self._events.append(ev)
+                return ev
+        # chained after what the buffer held
+        self._drained.wait()
+        _write_events(self.trade.pk, [ev])
+        return ev
+
+    def close(self) -> None:
+        with self._lock:
+            self.closed = True
+
+    def flush(self) -> List[TradeAuditEvent]:
+        with self._lock:
+            events, self._events = self._events, []
+        if events:
+            try:
+                _write_events(self.trade.pk, events)
+            except Exception:
+                # nothing was written (one transaction) -> keep them for the next flush
+                with self._lock:
+                    self._events[:0] = events
+                raise
+        return events
+
+    def flush_each(self) -> List[TradeAuditEvent]:
+        """flush() one event per transaction: what gets through stays written if a later one fails."""
+        with self._lock:
+            events, self._events = self._events, []
+        for i, ev in enumerate(events):
+            try:
+                _write_events(self.trade.pk, [ev])
+            except Exception:
+                with self._lock:
+                    self._events[:0] = events[i:]
+                raise
+        return events
+
+
+def _flush_buffer(buf: AuditBuffer) -> None:
+    try:
+        buf.flush()
+        return
+    except Exception:
+        logger.exception("audit: batched write failed for trade %s, writing %d events one by one", buf.trade.pk, len(buf))
+    try:
+        buf.flush_each()
+    except Exception as e:
+        lost = [ev.event_type for ev in buf._events]
+        logger.exception("audit: %d events for trade %s not written: %s", len(lost), buf.trade.pk, lost)
+        raise AuditWriteFailed(f"{len(lost)} audit events for trade {buf.trade.pk} not written") from e
+
+
+# trade pk -> open buffer. Keyed by trade (not a contextvar) because the events are
+# added on the MT5 thread while the request thread waits on it.
+_buffers: Dict[int, AuditBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+@contextmanager
+def audit_buffer(trade: Trade, ctx: Optional[AuditCtx] = None) -> Iterator[AuditBuffer]:
+    """
+    While open, audit_event() for this trade goes to the buffer (from any thread).
+    Flushed on exit, also when the block raises. Nested blocks share the outer buffer.
+    If the write fails the events are retried one by one; whatever is still not written
+    raises AuditWriteFailed (only logged when the block itself raised).
+    """
+    with _buffers_lock:
+        outer = _buffers.get(trade.pk)
+        if outer is None:
+            buf = _buffers[trade.pk] = AuditBuffer(trade, ctx)
+    if outer is not None:
+        yield outer
+        return
+
+    raised = True
+    try:
+        yield buf
+        raised = False
+    finally:
+        # closed first: events added from here on (e.g. by an MT5 job that outlived a timeout)
+        # are written directly, once this flush is done
+        with _buffers_lock:
+            _buffers.pop(trade.pk, None)
+        buf.close()
+        try:
+            _flush_buffer(buf)
+        except AuditWriteFailed:
+            if not raised:
+                raise
+        finally:
+            buf._drained.set()
+
+
 def audit_event(
     trade: Trade,
     event_type: str,
@@ -23,24 +196,12 @@ def audit_event(
 ) -> TradeAuditEvent:
     """
     Append-only, strict per-trade sequence, race-safe.
+    Inside audit_buffer() the event is only queued (seq / hash are set when the buffer flushes).
     """
-    payload = payload or {}
-    ctx = ctx or AuditCtx()
+    buf = _buffers.get(trade.pk)
+    if buf is not None:
+        return buf.add(event_type, payload, ctx)
 
-    with transaction.atomic():
-        # Lock the trade row to allocate the next seq safely
-        locked = Trade.objects.select_for_update().get(pk=trade.pk)
-        locked.audit_seq += 1
-        seq = locked.audit_seq
-        locked.save(update_fields=["audit_seq"])
-
-        ev = TradeAuditEvent.objects.create(
-            trade=locked,
-            seq=seq,
-            event_type=event_type,
-            payload=payload,
-            actor_id=ctx.actor_id,
-            ip_address=ctx.ip,
-            user_agent=ctx.user_agent,
-        )
-        return ev
+    ev = _build_event(trade, event_type, payload, ctx)
+    _write_events(trade.pk, [ev])
+    return ev
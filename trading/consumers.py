@@ -1,9 +1,27 @@
 import json
 from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth.models import AnonymousUser
 
+from trading.mt5.candles import candle_aggregator
+from trading.mt5.market_broadcast import positions_group
+from trading.mt5.snapshot import positions_push
+from trading.mt5.stream import tick_stream
+
+
+@database_sync_to_async
+def _auth_user(raw_token: str):
+    # get_user() hits the DB: not allowed straight from the event loop
+    try:
+        jwt_auth = JWTAuthentication()
+        validated = jwt_auth.get_validated_token(raw_token)
+        return jwt_auth.get_user(validated)
+    except Exception:
+        return AnonymousUser()
+
+
 class MarketConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         qs = parse_qs(self.scope["query_string"].decode())
@@ -19,19 +37,55 @@ class MarketConsumer(AsyncWebsocketConsumer):
         self.group_name = f"market_{self.symbol}_{self.timeframe}"
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        # one shared poller feeds the group; we just register interest
+        tick_stream.subscribe(self.symbol, self.timeframe)
+        try:
+            # bar updates/closes for this timeframe come from the aggregator's buffers
+            candle_aggregator.track(self.symbol, self.timeframe)
+        except ValueError:
+            pass
 
     async def disconnect(self, close_code):
         if hasattr(self, "group_name"):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            tick_stream.unsubscribe(self.symbol, self.timeframe)
 
     async def market_candle(self, event):
         # event["data"] is dict for candle update
         await self.send(text_data=json.dumps(event["data"]))
 
+    async def market_tick(self, event):
+        # event["data"] is the latest tick (coalesced by the tick stream)
+        await self.send(text_data=json.dumps(event["data"]))
+
     async def _auth_user(self, raw_token: str):
-        try:
-            jwt_auth = JWTAuthentication()
-            validated = jwt_auth.get_validated_token(raw_token)
-            return jwt_auth.get_user(validated)
-        except Exception:
-            return AnonymousUser()
+        return await _auth_user(raw_token)
+
+
+class PositionsConsumer(AsyncWebsocketConsumer):
+    """
+    ws/positions/?token=... -> deltas of the user's own positions as the snapshot refreshes.
+    Catch up / resync over HTTP with live/positions/?since=<version>.
+    """
+
+    async def connect(self):
+        qs = parse_qs(self.scope["query_string"].decode())
+        token = (qs.get("token") or [""])[0]
+
+        user = await _auth_user(token)
+        if not user or user.is_anonymous:
+            await self.close(code=4401)  # unauthorized
+            return
+
+        self.group_name = positions_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        positions_push.attach()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            positions_push.detach()
+
+    async def positions_delta(self, event):
+        await self.send(text_data=json.dumps(event["data"]))
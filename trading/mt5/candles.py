@@ -0,0 +1,302 @@
+# trading/mt5/candles.py
+from __future__ import annotations
+
+import calendar
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import MetaTrader5 as mt5
+from django.conf import settings
+
+from .executor import mt5_executor
+from .market_broadcast import broadcast_candle
+from .stream import tick_stream
+
+
+DEFAULT_BUFFER_BARS = 1000
+# a buffer is only trusted while the tick stream polled its symbol this recently
+DEFAULT_LIVE_MAX_AGE_SECONDS = 5.0
+# symbols tracked only because someone read them stop streaming after this long unread
+DEFAULT_TRACK_TTL_SECONDS = 900.0
+DEFAULT_MAX_TRACKED_SYMBOLS = 50
+
+TIMEFRAME_SECONDS = {
+    "M1": 60, "M2": 120, "M3": 180, "M5": 300, "M10": 600, "M15": 900, "M30": 1800,
+    "H1": 3600, "H2": 7200, "H4": 14400, "H6": 21600, "H8": 28800, "H12": 43200,
+    "D1": 86400,
+    "W1": 604800,
+    "MN1": 0,  # calendar month, see bar_open()
+}
+
+# 1970-01-01 was a Thursday; MT5 weekly bars open on Sunday
+_WEEK_OFFSET = 3 * 86400
+
+
+def bar_open(ts: int, timeframe: str) -> int:
+    """Open time of the bar that contains `ts` (server-time seconds, like the rates)."""
+    if timeframe == "MN1":
+        d = datetime.fromtimestamp(ts, tz=timezone.utc)
+        return calendar.timegm((d.year, d.month, 1, 0, 0, 0))
+    if timeframe == "W1":
+        return (ts - _WEEK_OFFSET) // 604800 * 604800 + _WEEK_OFFSET
+    step = TIMEFRAME_SECONDS[timeframe]
+    return ts - ts % step
+
+
+def _bar_from_rate(r) -> Dict[str, Any]:
+    return {
+        "time": int(r["time"]),
+        "open": float(r["open"]),
+        "high": float(r["high"]),
+        "low": float(r["low"]),
+        "close": float(r["close"]),
+        "tick_volume": int(r["tick_volume"]),
+    }
+
+
+class CandleAggregator:
+    """
+    Per (symbol, timeframe) ring buffers of OHLCV bars, M1 ... MN1.
+
+    - seeded once from copy_rates_from_pos, then updated from the tick stream
+    - emits "bar_update" (coalesced, once per tick batch) and "bar_close" events to
+      subscribers and to the market_<symbol>_<tf> websocket groups
+    - get() reads the buffer without touching the terminal; returns None when the buffer
+      can't be trusted (stream not polling the symbol, or more bars asked than we keep)
+    - symbols tracked through get() expire after MT5_CANDLE_TRACK_TTL_SECONDS unread and are
+      capped at MT5_CANDLE_MAX_TRACKED_SYMBOLS (pinned ones, e.g. the scanner's, never expire)
+
+    Prices are bids, like MT5 charts. With MT5_STREAM_MODE="tick" only the newest tick per poll
+    is seen, so intra-poll extremes are missed and high/low/tick_volume are off: get() only serves
+    buffers in "ticks" mode, or with MT5_CANDLE_SERVE_SAMPLED=True. Bar events are emitted either way.
+    """
+
+    def __init__(self, depth: Optional[int] = None):
+        self.depth = depth
+        self._lock = threading.Lock()
+        self._buffers: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        self._tracked: Dict[str, set] = {}  # symbol -> {timeframe}
+        self._used: Dict[str, float] = {}   # symbol -> last track()/get() (monotonic)
+        self._pinned: set = set()
+        self._subscribers: List[Callable[[str, str, str, Dict[str, Any]], None]] = []
+        self._listening = False
+
+        self.seeds = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _depth(self) -> int:
+        if self.depth is not None:
+            return int(self.depth)
+        return int(getattr(settings, "MT5_CANDLE_BUFFER_BARS", DEFAULT_BUFFER_BARS))
+
+    def _live_max_age(self) -> float:
+        return float(getattr(settings, "MT5_CANDLE_LIVE_MAX_AGE_SECONDS", DEFAULT_LIVE_MAX_AGE_SECONDS))
+
+    def _track_ttl(self) -> float:
+        return float(getattr(settings, "MT5_CANDLE_TRACK_TTL_SECONDS", DEFAULT_TRACK_TTL_SECONDS))
+
+    def _max_tracked(self) -> int:
+        return int(getattr(settings, "MT5_CANDLE_MAX_TRACKED_SYMBOLS", DEFAULT_MAX_TRACKED_SYMBOLS))
+
+    def serves(self) -> bool:
+        """Whether get() may answer from memory (bars built from every tick, or explicit opt-in)."""
+        return tick_stream.gap_free() or bool(getattr(settings, "MT5_CANDLE_SERVE_SAMPLED", False))
+
+    # ---------- tracking / seeding ----------
+    def track(self, symbol: str, timeframe: str, pin: bool = False) -> None:
+        """
+        Start maintaining (symbol, timeframe). Cheap: seeding happens on the first tick batch or get().
+        pin=True keeps the symbol streaming for the life of the process; otherwise it expires
+        once nobody reads it (see _expire).
+        """
+        symbol = (symbol or "").upper().strip()
+        timeframe = (timeframe or "").upper().strip()
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+        with self._lock:
+            self._tracked.setdefault(symbol, set()).add(timeframe)
+            self._used[symbol] = time.monotonic()
+            if pin:
+                self._pinned.add(symbol)
+            listen = not self._listening
+            self._listening = True
+
+        if listen:
+            tick_stream.add_listener(self.on_ticks)
+        tick_stream.watch(symbol)
+        self._expire()
+
+    def _expire(self) -> None:
+        """Untrack unpinned symbols unread for the TTL (and the least recently used over the cap)."""
+        now = time.monotonic()
+        ttl = self._track_ttl()
+        with self._lock:
+            candidates = sorted(
+                (used, s) for s, used in self._used.items()
+                if s not in self._pinned and not tick_stream.has_subscribers(s)
+            )
+            over = len(candidates) - self._max_tracked()
+            drop = [s for i, (used, s) in enumerate(candidates) if i < over or now - used > ttl]
+            for s in drop:
+                self._used.pop(s, None)
+                self._tracked.pop(s, None)
+                # buffers miss every tick from here on -> reseed if the symbol comes back
+                for key in [k for k in self._buffers if k[0] == s]:
+                    self._buffers.pop(key)
+        for s in drop:
+            tick_stream.unwatch(s)
+
+    @staticmethod
+    def _fetch(symbol: str, timeframe: str, count: int):
+        # runs on the MT5 owner thread
+        from .service import MT5Service
+
+        broker = tick_stream.broker_symbol(symbol)
+        return mt5.copy_rates_from_pos(broker, MT5Service.TIMEFRAME_MAP[timeframe], 0, int(count))
+
+    def seed(self, symbol: str, timeframe: str) -> bool:
+        rates = mt5_executor.call(self._fetch, symbol, timeframe, self._depth())
+        if rates is None or len(rates) == 0:
+            return False
+
+        buf: Deque[Dict[str, Any]] = deque((_bar_from_rate(r) for r in rates), maxlen=self._depth())
+        # never hold the lock across the executor call above (the owner thread may need it)
+        with self._lock:
+            self._buffers[(symbol, timeframe)] = buf
+        self.seeds += 1
+        return True
+
+    # ---------- tick updates ----------
+    def on_ticks(self, symbol: str, ticks: List[Dict[str, Any]]) -> None:
+        """Tick stream listener."""
+        tfs = self._tracked.get(symbol)
+        if not tfs:
+            return
+
+        for tf in list(tfs):
+            if (symbol, tf) not in self._buffers and not self.seed(symbol, tf):
+                continue
+
+            events: List[Tuple[str, Dict[str, Any]]] = []
+            with self._lock:
+                buf = self._buffers.get((symbol, tf))
+                if buf is None:
+                    # expired (untracked) since the check above
+                    continue
+                for t in ticks:
+                    price = t["bid"] or t["last"]
+                    if not price:
+                        continue
+                    opened = bar_open(t["time"], tf)
+                    last = buf[-1] if buf else None
+
+                    if last is None or opened > last["time"]:
+                        if last is not None:
+                            events.append(("bar_close", dict(last)))
+                        buf.append({
+                            "time": opened, "open": price, "high": price,
+                            "low": price, "close": price, "tick_volume": 1,
+                        })
+                    elif opened == last["time"]:
+                        last["high"] = max(last["high"], price)
+                        last["low"] = min(last["low"], price)
+                        last["close"] = price
+                        last["tick_volume"] += 1
+                    # ticks older than the forming bar (late/out of order) are ignored
+
+                if buf:
+                    events.append(("bar_update", dict(buf[-1])))
+
+            for event, bar in events:
+                self._emit(event, symbol, tf, bar)
+
+    # ---------- events ----------
+    def subscribe(self, callback: Callable[[str, str, str, Dict[str, Any]], None]) -> Callable[[], None]:
+        """callback(event, symbol, timeframe, bar) with event in {"bar_update", "bar_close"}."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _emit(self, event: str, symbol: str, timeframe: str, bar: Dict[str, Any]) -> None:
+        for cb in list(self._subscribers):
+            try:
+                cb(event, symbol, timeframe, bar)
+            except Exception:
+                pass
+        try:
+            broadcast_candle(symbol, timeframe, {
+                "time": bar["time"],
+                "open": bar["open"],
+                "high": bar["high"],
+                "low": bar["low"],
+                "close": bar["close"],
+                "volume": float(bar["tick_volume"]),
+                "closed": event == "bar_close",
+            })
+        except Exception:
+            # no channel layer (tests / management commands) -> subscribers still got it
+            pass
+
+    # ---------- reads ----------
+    def get(self, symbol: str, timeframe: str, bars: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Last `bars` bars (oldest first) from memory, or None when the caller should go to the terminal.
+        Starts tracking the pair so the next call can be served from memory.
+        """
+        symbol = (symbol or "").upper().strip()
+        timeframe = (timeframe or "").upper().strip()
+        bars = int(bars)
+        if timeframe not in TIMEFRAME_SECONDS or bars <= 0 or bars > self._depth() or not self.serves():
+            self.misses += 1
+            return None
+
+        # (re)tracks and keeps the symbol from expiring while it's being read
+        self.track(symbol, timeframe)
+
+        if tick_stream.latest(symbol, max_age=self._live_max_age()) is None:
+            # stream isn't (yet) delivering this symbol -> buffer may be behind
+            self.misses += 1
+            return None
+
+        buf = self._buffers.get((symbol, timeframe))
+        if buf is None:
+            if not self.seed(symbol, timeframe):
+                self.misses += 1
+                return None
+            buf = self._buffers.get((symbol, timeframe))
+            if buf is None:
+                self.misses += 1
+                return None
+
+        with self._lock:
+            n = len(buf)
+            out = [dict(b) for b in islice(buf, max(0, n - bars), n)]
+        self.hits += 1
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffers": len(self._buffers),
+            "tracked": {s: sorted(tfs) for s, tfs in self._tracked.items()},
+            "pinned": sorted(self._pinned),
+            "serves": self.serves(),
+            "seeds": self.seeds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# one aggregator per process (fed by the one tick stream)
+candle_aggregator = CandleAggregator()
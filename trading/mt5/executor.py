@@ -0,0 +1,271 @@
+# trading/mt5/executor.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_CALL_TIMEOUT_SECONDS = 30.0
+DEFAULT_READ_MAX_AGE_SECONDS = 2.0
+# above this fraction of the queue size we consider the terminal saturated
+SATURATION_RATIO = 0.5
+
+
+class Lane(IntEnum):
+    """Lower value runs first."""
+    CLOSE = 0    # closes + emergency flatten (risk-reducing)
+    MODIFY = 1   # SL/TP modifications
+    ORDER = 2    # new orders
+    READ = 3     # ticks, rates, positions, account info
+
+
+class MT5Busy(RuntimeError):
+    """The MT5 request queue is full (or a stale read was shed); caller should retry later (HTTP 503)."""
+
+
+class MT5OutcomeUnknown(RuntimeError):
+    """
+    The call timed out after the owner thread had already started it: it may still complete
+    (an order may get filled). Callers must reconcile against the terminal, not report failure.
+    """
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "enqueued_at", "lane")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, lane: Lane):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.lane = lane
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MT5Executor:
+    """
+    The MetaTrader5 module is NOT thread-safe. Every terminal call goes through here:
+    one owner thread, one bounded queue, callers get concurrent.futures.Future back.
+
+    The queue has priority lanes (see Lane): closes first, then SL/TP, then new orders,
+    then market data reads. When saturated, queued reads are shed to make room for
+    risk-reducing work, and reads that waited longer than MT5_READ_MAX_AGE_SECONDS are dropped.
+
+    - submit()  -> Future (raises MT5Busy when the queue is full)
+    - call()    -> blocking result; runs inline when already on the owner thread (nested calls).
+                   On timeout a job that hasn't started is cancelled (MT5Busy), one that has
+                   raises MT5OutcomeUnknown
+    - run()     -> awaitable, for ASGI views / Channels consumers
+    - stats()   -> queue depth + counters for monitoring
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, name: str = "mt5-executor"):
+        self.name = name
+        self._maxsize = maxsize
+        self._lanes: List[Deque[_Job]] = [deque() for _ in Lane]
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.shed = 0
+        self.cancelled = 0
+        self.max_depth_seen = 0
+        self._wait_ms_total = 0.0
+        self._run_ms_total = 0.0
+
+    # ---------- lifecycle ----------
+    def _queue_size(self) -> int:
+        if self._maxsize is not None:
+            return int(self._maxsize)
+        return int(getattr(settings, "MT5_EXECUTOR_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+
+    def _read_max_age(self) -> float:
+        return float(getattr(settings, "MT5_READ_MAX_AGE_SECONDS", DEFAULT_READ_MAX_AGE_SECONDS))
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+            self._thread.start()
+
+    def on_owner_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _shed(self, job: _Job, reason: str) -> None:
+        # caller's future fails fast instead of waiting behind risk-reducing work
+        if job.future.set_running_or_notify_cancel():
+            job.future.set_exception(MT5Busy(reason))
+        with self._stats_lock:
+            self.shed += 1
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._cond:
+            while self._pending == 0:
+                self._cond.wait()
+            saturated = self._pending >= self._queue_size() * SATURATION_RATIO
+            for lane in self._lanes:
+                if lane:
+                    job = lane.popleft()
+                    self._pending -= 1
+                    break
+
+        if (
+            job.lane == Lane.READ
+            and saturated
+            and (time.monotonic() - job.enqueued_at) > self._read_max_age()
+        ):
+            self._shed(job, "stale MT5 read shed (terminal saturated)")
+            return None
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is not None:
+                self._run_job(job)
+
+    def _run_job(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            # caller timed out while it was queued
+            with self._stats_lock:
+                self.cancelled += 1
+            return
+        started = time.monotonic()
+        # jobs do ORM work too (audit events, broker lookups): same connection hygiene as a request
+        close_old_connections()
+        try:
+            result = job.fn(*job.args, **job.kwargs)
+        except BaseException as e:
+            job.future.set_exception(e)
+            ok = False
+        else:
+            job.future.set_result(result)
+            ok = True
+        finally:
+            close_old_connections()
+        finished = time.monotonic()
+
+        with self._stats_lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._wait_ms_total += (started - job.enqueued_at) * 1000.0
+            self._run_ms_total += (finished - started) * 1000.0
+
+    # ---------- public API ----------
+    def submit(self, fn: Callable, *args, lane: Optional[Lane] = None, **kwargs) -> Future:
+        """lane=None -> the lane the function was tagged with by @on_mt5_thread, else READ."""
+        self._ensure_started()
+        if lane is None:
+            lane = getattr(fn, "mt5_lane", Lane.READ)
+        job = _Job(fn, args, kwargs, Lane(lane))
+        evicted: List[_Job] = []
+
+        with self._cond:
+            if self._pending >= self._queue_size():
+                reads = self._lanes[Lane.READ]
+                if job.lane == Lane.READ or not reads:
+                    with self._stats_lock:
+                        self.rejected += 1
+                    raise MT5Busy(f"MT5 request queue full ({self._queue_size()})")
+                # make room for risk-reducing / trading work by dropping the oldest queued read
+                evicted.append(reads.popleft())
+                self._pending -= 1
+
+            self._lanes[job.lane].append(job)
+            self._pending += 1
+            depth = self._pending
+            self._cond.notify()
+
+        for old in evicted:
+            self._shed(old, "MT5 read shed to make room for higher-priority request")
+
+        with self._stats_lock:
+            self.submitted += 1
+            if depth > self.max_depth_seen:
+                self.max_depth_seen = depth
+        return job.future
+
+    def call(self, fn: Callable, *args, lane: Optional[Lane] = None, timeout: Optional[float] = None, **kwargs) -> Any:
+        if self.on_owner_thread():
+            return fn(*args, **kwargs)
+        if timeout is None:
+            timeout = float(getattr(settings, "MT5_CALL_TIMEOUT_SECONDS", DEFAULT_CALL_TIMEOUT_SECONDS))
+        future = self.submit(fn, *args, lane=lane, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if future.cancel():
+                # never reached the terminal -> safe to report as a plain failure
+                raise MT5Busy(f"MT5 call timed out in the queue after {timeout:g}s (not sent)")
+            if future.done():
+                # finished right at the deadline
+                return future.result()
+            raise MT5OutcomeUnknown(f"MT5 call still running after {timeout:g}s; outcome unknown")
+
+    async def run(self, fn: Callable, *args, lane: Optional[Lane] = None, **kwargs) -> Any:
+        if self.on_owner_thread():
+            return fn(*args, **kwargs)
+        return await asyncio.wrap_future(self.submit(fn, *args, lane=lane, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            done = self.completed + self.failed
+            return {
+                "queue_depth": self._pending,
+                "lane_depth": {lane.name.lower(): len(self._lanes[lane]) for lane in Lane},
+                "queue_size": self._queue_size(),
+                "max_depth_seen": self.max_depth_seen,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "shed": self.shed,
+                "cancelled": self.cancelled,
+                "avg_wait_ms": round(self._wait_ms_total / done, 3) if done else 0.0,
+                "avg_run_ms": round(self._run_ms_total / done, 3) if done else 0.0,
+                "alive": bool(self._thread and self._thread.is_alive()),
+            }
+
+
+# one owner thread per process (one terminal attachment per process)
+mt5_executor = MT5Executor()
+
+
+def on_mt5_thread(fn: Optional[Callable] = None, *, lane: Lane = Lane.READ) -> Callable:
+    """
+    Decorator: run the wrapped function on the MT5 owner thread (blocking for the caller).
+    Usage: @on_mt5_thread (read lane) or @on_mt5_thread(lane=Lane.CLOSE)
+    """
+
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return mt5_executor.call(func, *args, lane=lane, **kwargs)
+
+        wrapper.mt5_lane = lane
+        return wrapper
+
+    if fn is not None:
+        return decorate(fn)
+    return decorate
@@ -0,0 +1,121 @@
+# trading/mt5/filling.py
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import MetaTrader5 as mt5
+from django.conf import settings
+from django.core.cache import cache
+
+
+# symbol_info().filling_mode is a bit mask (SYMBOL_FILLING_*), NOT an ORDER_FILLING_* value
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+
+DEFAULT_ORDER = (
+    mt5.ORDER_FILLING_IOC,
+    mt5.ORDER_FILLING_FOK,
+    mt5.ORDER_FILLING_RETURN,
+)
+
+# how long a learned mode survives in the shared cache (brokers rarely change this)
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+
+def _cache_key(server: str, symbol: str) -> str:
+    return f"mt5_filling:{server}:{symbol}"
+
+
+def modes_from_flags(filling_flags: int) -> List[int]:
+    """ORDER_FILLING_* modes the symbol advertises, in our preferred order."""
+    modes: List[int] = []
+    if filling_flags & SYMBOL_FILLING_IOC:
+        modes.append(mt5.ORDER_FILLING_IOC)
+    if filling_flags & SYMBOL_FILLING_FOK:
+        modes.append(mt5.ORDER_FILLING_FOK)
+    # RETURN is valid for market/exchange execution when the symbol doesn't restrict it
+    modes.append(mt5.ORDER_FILLING_RETURN)
+    return modes
+
+
+def is_filling_rejection(res) -> bool:
+    """True only when the broker rejected the order *because of* the filling mode."""
+    if res is None:
+        return False
+    if res.retcode == mt5.TRADE_RETCODE_INVALID_FILL:
+        return True
+    return "filling" in (getattr(res, "comment", "") or "").lower()
+
+
+class FillingModeCache:
+    """
+    Remembers which ORDER_FILLING_* mode a broker accepted per (server, symbol).
+    Local dict in front, Django cache behind so it survives restarts and is shared by workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local: Dict[Tuple[str, str], int] = {}
+
+    def _ttl(self) -> int:
+        return int(getattr(settings, "MT5_FILLING_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+    def get(self, server: str, symbol: str) -> Optional[int]:
+        key = (server or "", symbol)
+        mode = self._local.get(key)
+        if mode is not None:
+            return mode
+        if not server:
+            return None
+        try:
+            mode = cache.get(_cache_key(server, symbol))
+        except Exception:
+            return None
+        if mode is not None:
+            with self._lock:
+                self._local[key] = int(mode)
+        return mode
+
+    def remember(self, server: str, symbol: str, mode: int) -> None:
+        key = (server or "", symbol)
+        if self._local.get(key) == mode:
+            return
+        with self._lock:
+            self._local[key] = int(mode)
+        if not server:
+            # unknown server -> don't persist, the key would be shared across brokers
+            return
+        try:
+            cache.set(_cache_key(server, symbol), int(mode), timeout=self._ttl())
+        except Exception:
+            pass
+
+    def forget(self, server: str, symbol: str) -> None:
+        with self._lock:
+            self._local.pop((server or "", symbol), None)
+        if server:
+            try:
+                cache.delete(_cache_key(server, symbol))
+            except Exception:
+                pass
+
+    def candidates(self, server: str, symbol: str, filling_flags: Optional[int] = None) -> List[int]:
+        """
+        Send order: learned mode first, then what symbol_info.filling_mode allows,
+        then the blind IOC -> FOK -> RETURN list when the terminal gives us no flags.
+        """
+        ordered: List[int] = []
+        learned = self.get(server, symbol)
+        if learned is not None:
+            ordered.append(int(learned))
+
+        rest = modes_from_flags(filling_flags) if filling_flags else list(DEFAULT_ORDER)
+        for m in rest:
+            if m not in ordered:
+                ordered.append(m)
+        return ordered
+
+
+# one per process
+filling_modes = FillingModeCache()
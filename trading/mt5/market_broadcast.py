@@ -20,3 +20,42 @@ def broadcast_candle(symbol: str, timeframe: str, candle_dict: dict):
             },
         },
     )
+
+
+def broadcast_tick(symbol: str, timeframe: str, tick_dict: dict):
+    """
+    Broadcast the latest tick to the same market_<symbol>_<timeframe> group
+    (the chart updates the forming candle from it).
+    """
+    group = f"market_{symbol}_{timeframe}"
+
+    async_to_sync(channel_layer.group_send)(
+        group,
+        {
+            "type": "market.tick",
+            "data": {
+                "type": "tick",
+                **tick_dict,
+            },
+        },
+    )
+
+
+def positions_group(user_id: int) -> str:
+    return f"positions_user_{int(user_id)}"
+
+
+def broadcast_positions(user_id: int, payload: dict):
+    """
+    Push a positions delta (only the user's own positions) to ws/positions/.
+    """
+    async_to_sync(channel_layer.group_send)(
+        positions_group(user_id),
+        {
+            "type": "positions.delta",
+            "data": {
+                "type": "positions",
+                **payload,
+            },
+        },
+    )
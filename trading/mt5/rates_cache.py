@@ -0,0 +1,101 @@
+# trading/mt5/rates_cache.py
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import MetaTrader5 as mt5
+import numpy as np
+
+
+class RatesCache:
+    """
+    Per (symbol, timeframe) copy of the last rates we pulled, for pairs the tick-fed
+    candle aggregator isn't serving.
+
+    First call: copy_rates_from_pos(bars) as before (miss).
+    Next calls: copy_rates_range(last_bar_time -> now) only, merged over the cache
+    (the still-forming last bar is replaced), trimmed to the requested depth (hit).
+
+    MUST run on the MT5 owner thread (called from MT5Service.get_symbol_rates / copy_rates).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates: Dict[Tuple[str, int], np.ndarray] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.bars_fetched = 0
+        self.bytes_saved = 0
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._rates.clear()
+            else:
+                for key in [k for k in self._rates if k[0] == symbol]:
+                    self._rates.pop(key, None)
+
+    def _full(self, key: Tuple[str, int], bars: int):
+        symbol, tf = key
+        rates = mt5.copy_rates_from_pos(symbol, tf, 0, int(bars))
+        self.misses += 1
+        if rates is None or len(rates) == 0:
+            with self._lock:
+                self._rates.pop(key, None)
+            return rates
+        self.bars_fetched += len(rates)
+        with self._lock:
+            self._rates[key] = rates
+        return rates
+
+    def get(self, symbol: str, tf: int, bars: int):
+        bars = int(bars)
+        key = (symbol, int(tf))
+        cached = self._rates.get(key)
+
+        # nothing cached, or asked for more history than we hold -> plain fetch
+        if cached is None or len(cached) < bars:
+            return self._full(key, bars)
+
+        last_time = int(cached["time"][-1])
+        # rates are stamped in server time without a tz shift; +1 day covers any server offset
+        date_from = datetime.fromtimestamp(last_time, tz=timezone.utc)
+        date_to = datetime.now(tz=timezone.utc) + timedelta(days=1)
+        newer = mt5.copy_rates_range(symbol, tf, date_from, date_to)
+
+        if newer is None or len(newer) == 0 or int(newer["time"][0]) > last_time:
+            # error, or a gap we can't stitch (first returned bar should be our forming bar)
+            return self._full(key, bars)
+
+        # drop our copy of the forming bar (and anything after it), append the fresh tail
+        keep = cached[cached["time"] < int(newer["time"][0])]
+        merged = np.concatenate([keep, newer.astype(cached.dtype, copy=False)])
+        depth = max(bars, len(cached))
+        if len(merged) > depth:
+            merged = merged[-depth:]
+
+        with self._lock:
+            self._rates[key] = merged
+
+        self.hits += 1
+        self.bars_fetched += len(newer)
+        self.bytes_saved += max(0, bars - len(newer)) * merged.dtype.itemsize
+        return merged[-bars:]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._rates),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "bars_fetched": self.bars_fetched,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+# one cache per process (one terminal attachment per process)
+rates_cache = RatesCache()
@@ -1,7 +1,6 @@
-import re
+import asyncio
 from distutils.log import info
 import MetaTrader5 as mt5
-from datetime import datetime
 import time
 
 from typing_extensions import Self
@@ -16,6 +15,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .market_broadcast import broadcast_candle
+from .symbols import symbol_index
+from .symbol_specs import SymbolSpec, symbol_specs
+from .filling import filling_modes, is_filling_rejection
+from .session import mt5_session
+from .executor import Lane, mt5_executor, on_mt5_thread
+from .snapshot import live_snapshot
+from .candles import candle_aggregator
+from .rates_cache import rates_cache
 
 
 
@@ -47,6 +54,7 @@ class MT5Service:
     #MAGIC = 900001
     COMMENT = "SniperATR"
 
+    @on_mt5_thread(lane=Lane.ORDER)
     def place_market_order(
             self,
             trade,
@@ -81,8 +89,11 @@ class MT5Service:
         self._log(trade, TradeAuditEvent.EventType.MT5_CONNECT_OK, {}, ctx)
 
         symbol = resolved
+
+        # one symbol_info snapshot for the whole order (cached across orders, see symbol_specs)
+        spec = symbol_specs.get(symbol)
         try:
-            self.ensure_symbol(symbol)
+            self.ensure_symbol(symbol, spec=spec)
         except Exception as e:
             return {"ok": False, "error": str(e), "symbol": symbol}
 
@@ -102,7 +113,7 @@ class MT5Service:
         order_type = mt5.ORDER_TYPE_BUY if side_l == "buy" else mt5.ORDER_TYPE_SELL
 
         # 4) Compute deviation (optional)
-        deviation_points = self._compute_slippage_points(symbol, max_slippage_pips)
+        deviation_points = self._compute_slippage_points(symbol, max_slippage_pips, spec=spec)
 
         # 5) Build request (NO manual order_send here)
         request = {
@@ -122,97 +133,185 @@ class MT5Service:
             request["tp"] = float(tp)
 
         # 6) ONLY RETURN should be this:
-        return self._send_with_supported_filling(request)
-
-    def _audit_ctx_from_request(request) -> AuditCtx:
-        user = getattr(request, "user", None)
-        actor_id = user.id if user and user.is_authenticated else None
-        ip = request.META.get("REMOTE_ADDR")
-        ua = request.META.get("HTTP_USER_AGENT")
-        return AuditCtx(actor_id=actor_id, ip=ip, user_agent=ua)
+        return self._send_with_supported_filling(request, spec=spec)
 
+    # retcodes where a fresh tick + one resend is worth it (price moved while the basket was in flight)
+    _REQUOTE_RETCODES = (
+        getattr(mt5, "TRADE_RETCODE_REQUOTE", 10004),
+        getattr(mt5, "TRADE_RETCODE_PRICE_CHANGED", 10020),
+        getattr(mt5, "TRADE_RETCODE_PRICE_OFF", 10021),
+    )
 
+    @on_mt5_thread(lane=Lane.ORDER)
+    def place_basket_orders(
+            self,
+            legs: list,
+            max_slippage_pips: float = 2.0,
+            magic: int | None = None,
+            comment: str | None = None,
+    ) -> list:
+        """
+        Sends a basket of market orders in one trip to the MT5 thread.
+        legs: [{"symbol", "side", "lot", "sl"?, "tp"?}, ...] (already validated by the caller)
 
-    # --- helpers you already have / should have ---
-
-    def _compute_slippage_points(self, symbol: str, max_slippage_pips: float) -> int:
-        info = mt5.symbol_info(symbol)
-        if info is None:
-            return 20  # fallback
-        point = info.point or 0.0
-        if point <= 0:
-            return 20
-        # for many FX symbols: 1 pip = 10 points (if digits=5), for digits=3 same idea
-        # this is safe enough as a general conversion:
-        pip_value = point * 10 if info.digits in (3, 5) else point
-        points = (max_slippage_pips * pip_value) / point
-        return max(1, int(round(points)))
-
-
-    def resolve_symbol(self, symbol: str):
-        raw = (symbol or "").strip()
-        if not raw:
-            return None
-
-        # try exact first
-        if mt5.symbol_info(raw) is not None:
-            return raw
-
-        up = raw.upper()
+        Per distinct symbol: resolve + symbol spec + ensure_symbol + one tick, up front.
+        Then order_send back to back. Returns one result dict per leg, same order as `legs`.
+        """
+        self._ensure_connected()
 
-        # common aliases you can expand anytime
-        aliases = {
-            "XAUUSD": ["XAUUSD", "GOLD", "XAUUSDm", "GOLDm"],
-            "GOLD":   ["GOLD", "XAUUSD", "GOLDm", "XAUUSDm"],
-            "GBPUSD": ["GBPUSD", "GBPUSDm"],
-            "EURUSD": ["EURUSD", "EURUSDm"],
-        }
+        prepared = {}  # requested symbol -> (resolved, spec, tick, deviation) or {"error": ...}
+        for leg in legs:
+            requested = (leg.get("symbol") or "").upper().strip()
+            if requested in prepared:
+                continue
+            resolved = self.resolve_symbol(requested)
+            spec = symbol_specs.get(resolved)
+            try:
+                self.ensure_symbol(resolved, spec=spec)
+            except Exception as e:
+                prepared[requested] = {"error": str(e)}
+                continue
+            tick = mt5.symbol_info_tick(resolved)
+            if tick is None:
+                prepared[requested] = {"error": "No tick data", "last_error": mt5.last_error()}
+                continue
+            prepared[requested] = (resolved, spec, tick, self._compute_slippage_points(resolved, max_slippage_pips, spec=spec))
+
+        results = []
+        for i, leg in enumerate(legs):
+            requested = (leg.get("symbol") or "").upper().strip()
+            prep = prepared[requested]
+            if isinstance(prep, dict):
+                results.append({"leg": i, "ok": False, "symbol": requested, **prep})
+                continue
 
-        for cand in aliases.get(up, []):
-            if mt5.symbol_info(cand) is not None:
-                return cand
+            resolved, spec, tick, deviation = prep
+            side_l = (leg.get("side") or "").strip().lower()
+            request = {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": resolved,
+                "volume": float(leg["lot"]),
+                "type": mt5.ORDER_TYPE_BUY if side_l == "buy" else mt5.ORDER_TYPE_SELL,
+                "price": float(tick.ask if side_l == "buy" else tick.bid),
+                "deviation": int(deviation),
+                "comment": comment or self.COMMENT,
+            }
+            if magic is not None:
+                request["magic"] = int(magic)
+            if leg.get("sl") is not None:
+                request["sl"] = float(leg["sl"])
+            if leg.get("tp") is not None:
+                request["tp"] = float(leg["tp"])
+
+            sent = self._send_with_supported_filling(request, spec=spec)
+
+            if not sent.get("ok") and sent.get("retcode") in self._REQUOTE_RETCODES:
+                # the prefetched tick went stale mid-basket -> refresh it for this and later legs
+                fresh = mt5.symbol_info_tick(resolved)
+                if fresh is not None:
+                    prepared[requested] = (resolved, spec, fresh, deviation)
+                    request["price"] = float(fresh.ask if side_l == "buy" else fresh.bid)
+                    sent = self._send_with_supported_filling(request, spec=spec)
+
+            if sent.get("ok"):
+                sent["position"] = self._position_id(sent.get("result") or {})
+            results.append({"leg": i, "symbol": resolved, "side": side_l, **sent})
+
+        return results
+
+    def _position_id(self, res: dict) -> int | None:
+        """
+        Position opened/increased by a fill. The order ticket is only the position id on
+        hedging accounts; the deal carries the real one (netting accounts reuse the position).
+        MT5 thread only.
+        """
+        deal = int(res.get("deal") or 0)
+        if deal:
+            deals = mt5.history_deals_get(ticket=deal)
+            if deals:
+                return int(deals[0].position_id) or None
+        order = int(res.get("order") or 0)
+        if order:
+            positions = mt5.positions_get(ticket=order)
+            if positions:
+                return int(positions[0].ticket)
+        return None
 
-        # last resort: search ALL broker symbols and pick best match
-        symbols = mt5.symbols_get()
-        if not symbols:
-            return None
+    @on_mt5_thread
+    def find_basket_positions(self, legs: list, magic: int, comment: str) -> list:
+        """
+        Reconciles a basket whose outcome is unknown (timeout / error mid-basket):
+        the open positions tagged with the basket's magic + comment, matched to legs by
+        symbol, side and volume. Returns one position dict (or None) per leg, same order as `legs`.
+        """
+        self._ensure_connected()
+        tagged = [
+            p for p in (mt5.positions_get() or [])
+            if int(p.magic) == int(magic) and str(p.comment or "").startswith(comment)
+        ]
 
-        # normalize
-        def norm(s: str) -> str:
-            return re.sub(r"[^A-Z0-9]", "", (s or "").upper())
+        out = []
+        claimed = set()
+        for leg in legs:
+            resolved = self.resolve_symbol((leg.get("symbol") or "").upper().strip())
+            want_type = mt5.POSITION_TYPE_BUY if (leg.get("side") or "").lower() == "buy" else mt5.POSITION_TYPE_SELL
+            candidates = [
+                p for p in tagged
+                if int(p.ticket) not in claimed and p.symbol == resolved and int(p.type) == want_type
+            ]
+            # exact volume first; netting accounts merge same-symbol legs into one position
+            exact = [p for p in candidates if abs(float(p.volume) - float(leg["lot"])) < 1e-9]
+            hit = (exact or candidates or [None])[0]
+            if hit is None:
+                out.append(None)
+                continue
+            if exact:
+                claimed.add(int(hit.ticket))
+            out.append({
+                "ticket": int(hit.ticket),
+                "symbol": hit.symbol,
+                "volume": float(hit.volume),
+                "price": float(hit.price_open),
+            })
+        return out
 
-        target = norm(up)
+    def _audit_ctx_from_request(request) -> AuditCtx:
+        user = getattr(request, "user", None)
+        actor_id = user.id if user and user.is_authenticated else None
+        ip = request.META.get("REMOTE_ADDR")
+        ua = request.META.get("HTTP_USER_AGENT")
+        return AuditCtx(actor_id=actor_id, ip=ip, user_agent=ua)
 
-        # match if target appears in name (handles suffix like XAUUSDm, GBPUSD.i)
-        matches = [s.name for s in symbols if target in norm(s.name)]
 
-        # also allow GOLD<->XAUUSD
-        if not matches and up in ("XAUUSD", "GOLD"):
-            matches = [s.name for s in symbols if "XAU" in s.name.upper() or "GOLD" in s.name.upper()]
 
-        return matches[0] if matches else None
+    # --- helpers you already have / should have ---
 
     # --- connection helpers ---
     def _ensure_initialized(self) -> bool:
-            # Don’t initialize repeatedly if already connected
-        if mt5.terminal_info() is not None:
-            return True
-        return mt5.initialize()
+        # Don’t initialize repeatedly if already connected
+        try:
+            mt5_session.ensure()
+        except RuntimeError:
+            return False
+        return True
 
-    def ensure_symbol(self, symbol: str) -> str:
+    def ensure_symbol(self, symbol: str, spec: SymbolSpec | None = None) -> str:
         resolved = self.resolve_symbol(symbol) or symbol
-        info = mt5.symbol_info(resolved)
-        if info is None:
+        if spec is None or spec.name != resolved:
+            spec = symbol_specs.get(resolved)
+        if spec is None:
             raise ValueError(f"Symbol not found: {symbol} (resolved={resolved})")
 
-        if not info.visible:
+        if not spec.visible:
             ok = mt5.symbol_select(resolved, True)
             if not ok:
                 err = mt5.last_error()
+                symbol_specs.invalidate(resolved)
                 raise ValueError(f"Symbol not selectable: {resolved}. mt5.last_error={err}")
+            symbol_specs.mark_visible(resolved)
 
         # Optional: trading allowed check
-        if hasattr(info, "trade_mode") and info.trade_mode == 0:
+        if spec.trading_disabled:
             raise ValueError(f"Trading disabled for symbol: {resolved} (trade_mode=0)")
 
         return resolved
@@ -226,68 +325,14 @@ class MT5Service:
             time.sleep(delay)
             return None
 
-    def _compute_slippage_points(self, symbol: str, max_slippage_pips: float) -> int:
-        info = mt5.symbol_info(symbol)
-        if info is None:
-            return 20  # fallback
-            # point = smallest price step
-            # pip -> points conversion depends on digits; safe approach:
-            # 1 pip ~ 10 points for 5-digit FX, but metals vary.
-            # We'll approximate using digits:
-        digits = getattr(info, "digits", 5)
-            # If digits >= 3: use pip = 10 points; else pip = 1 point
-        pip_in_points = 10 if digits >= 3 else 1
-        points = int(max(1, round(max_slippage_pips * pip_in_points)))
-        return points
-
-    def _pick_filling_mode(self, symbol: str) -> int:
-        """
-        Returns a safe filling mode for this broker/symbol.
-        Prefers IOC then FOK then RETURN. Falls back to IOC.
-        """
-        info = mt5.symbol_info(symbol)
-
-        # Some builds use "filling_mode", others use "filling_mode" differently.
-        # We'll handle safely.
-        fm = None
-        if info is not None:
-            if hasattr(info, "filling_mode"):
-                fm = info.filling_mode
-
-        candidates = [
-            mt5.ORDER_FILLING_IOC,
-            mt5.ORDER_FILLING_FOK,
-            mt5.ORDER_FILLING_RETURN,
-        ]
-
-        if fm in candidates:
-            return fm
-
-        # fallback
-        return mt5.ORDER_FILLING_IOC
-
-        # Keep your resolve_symbol if you already wrote it
-
+    @on_mt5_thread(lane=Lane.ORDER)
     def connect(self, login: int | None = None, password: str | None = None, server: str | None = None):
         """
         If login/password/server provided -> initializes MT5 and logs into that account.
         If not provided -> just initializes the terminal.
         """
-        # shutdown any previous session cleanly (important when switching accounts)
-        try:
-            mt5.shutdown()
-        except Exception:
-            pass
-
-        ok = mt5.initialize(
-            path=self.path,
-            login=login,
-            password=password,
-            server=server,
-        )
-
-        if not ok:
-            raise ConnectionError(f"MT5 initialization failed -> {mt5.last_error()}")
+        # the session only shuts down when switching accounts (and drops symbol caches on re-attach)
+        mt5_session.connect(login=login, password=password, server=server)
 
         self.connected = True
         return True
@@ -296,7 +341,9 @@ class MT5Service:
         # ===============================
 
     SYMBOL_ALIASES = {
-        "XAUUSD": ["XAUUSD", "XAUUSDm", "XAUUSD.i", "GOLD", "GOLDm"],
+        "XAUUSD": ["XAUUSD", "XAUUSDm", "XAUUSD.i", "XAUUSD#", "GOLD", "GOLDm", "GOLD.i"],
+        "GOLD": ["GOLD", "XAUUSD", "GOLDm", "XAUUSDm"],
+        "XAGUSD": ["XAGUSD", "XAGUSDm", "SILVER", "SILVERm"],
         "GBPUSD": ["GBPUSD", "GBPUSDm", "GBPUSD.i"],
         "EURUSD": ["EURUSD", "EURUSDm", "EURUSD.i"],
     }
@@ -305,178 +352,22 @@ class MT5Service:
         #mt5.shutdown()
         self.connected = False
 
-    def get_symbol_tick(self, symbol: str):
-        if not self.connected:
-            self.connect()
-
-        if not mt5.symbol_select(symbol, True):
-            raise ValueError(f"Symbol {symbol} not found")
-
-        tick = mt5.symbol_info_tick(symbol)
-
-        if tick is None:
-            raise ValueError("Tick data unavailable")
-
-        return {
-            "symbol": symbol,
-            "bid": tick.bid,
-            "ask": tick.ask,
-            "last": tick.last,
-            "time": datetime.fromtimestamp(tick.time).isoformat()
-        }
-
-    def resolve_symbol(self, symbol: str) -> str | None:
-        """
-        Returns a broker-available symbol for the requested symbol.
-        Example: XAUUSD -> XAUUSDm / GOLD / GOLDm
-        """
-
-        if not symbol:
-            return None
-
-        raw = symbol.strip().upper()
-
-        # 1) Exact match
-        info = mt5.symbol_info(raw)
-        if info is not None:
-            mt5.symbol_select(raw, True)
-            return raw
-
-        # 2) Common aliases (expand anytime)
-        aliases = {
-            "XAUUSD": ["XAUUSD", "GOLD", "XAUUSDm", "GOLDm", "XAUUSD.i", "XAUUSD#", "GOLD.i"],
-            "XAGUSD": ["XAGUSD", "SILVER", "XAGUSDm", "SILVERm"],
-        }
-
-        candidates = aliases.get(raw, [raw])
-
-        # 3) Try direct candidates
-        for cand in candidates:
-            inf = mt5.symbol_info(cand)
-            if inf is not None:
-                mt5.symbol_select(cand, True)
-                return cand
-
-        # 4) Fuzzy search across ALL broker symbols
-        all_syms = mt5.symbols_get()
-        if not all_syms:
-            return None
-
-        # normalize: keep only letters/numbers so "XAUUSD.m" matches "XAUUSD"
-        def norm(s: str) -> str:
-            return re.sub(r"[^A-Z0-9]", "", s.upper())
-
-        target = norm(raw)
-
-        # pick best match that contains target
-        matches = [s.name for s in all_syms if target in norm(s.name)]
-
-        # preference: ones starting with target
-        matches.sort(key=lambda n: (0 if norm(n).startswith(target) else 1, len(n)))
-
-        if matches:
-            best = matches[0]
-            mt5.symbol_select(best, True)
-            return best
-
-        return None
-
-
-
+    @on_mt5_thread
     def get_open_positions(self, symbol: str = None):
+        self._ensure_connected()
         if symbol:
             return mt5.positions_get(symbol=symbol) or []
         return mt5.positions_get() or []
 
+    @on_mt5_thread
     def get_position_by_ticket(self, ticket: int):
+        self._ensure_connected()
         positions = mt5.positions_get(ticket=ticket)
         if not positions:
             return None
         return positions[0]
 
-    def close_position_by_ticket(
-            self,
-            position_ticket: int,
-            deviation: int = 20,
-            magic: int = 123456,
-            comment: str = "api-close",
-    ) -> dict:
-
-        if not mt5.initialize():
-            return {"error": "MT5 initialize failed", "status": 500, "last_error": mt5.last_error()}
-
-        pos_list = mt5.positions_get(ticket=position_ticket)
-        if not pos_list:
-            mt5.shutdown()
-            return {"error": f"Position {position_ticket} not found", "status": 404}
-
-        pos = pos_list[0]
-        symbol = pos.symbol
-
-        tick = mt5.symbol_info_tick(symbol)
-        if tick is None:
-            #mt5.shutdown()
-            return {"error": f"No tick for {symbol}", "status": 404}
-
-        # opposite side to close
-        if pos.type == mt5.POSITION_TYPE_BUY:
-            order_type = mt5.ORDER_TYPE_SELL
-            price = tick.bid
-        else:
-            order_type = mt5.ORDER_TYPE_BUY
-            price = tick.ask
-
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "position": int(pos.ticket),
-            "volume": float(pos.volume),
-            "type": order_type,
-            "price": float(price),
-            "deviation": int(deviation),
-            "magic": int(magic),
-            "comment": comment,
-            "type_time": mt5.ORDER_TIME_GTC,
-            # type_filling will be set by _send_with_supported_filling
-        }
-
-        #result, used_filling = self._send_with_supported_filling(request)
-
-    #@staticmethod
-
-
-
-    def _send_with_supported_filling(self, request: dict):
-        FILLING_CANDIDATES = [
-            mt5.ORDER_FILLING_FOK,
-            mt5.ORDER_FILLING_IOC,
-            mt5.ORDER_FILLING_RETURN,
-        ]
-
-        last_result = None
-        last_filling = None
-
-        for filling in FILLING_CANDIDATES:
-            req = dict(request)
-            req["type_filling"] = filling
-
-            result = mt5.order_send(req)
-            last_result = result
-            last_filling = filling
-
-            # success
-            if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
-                return result, filling
-
-            # unsupported filling => try next
-            if result is not None and result.retcode in (
-                    mt5.TRADE_RETCODE_INVALID_FILL,
-                    mt5.TRADE_RETCODE_INVALID,
-            ):
-                continue
-
-        return last_result, last_filling
-
+    @on_mt5_thread(lane=Lane.CLOSE)
     def close_position_by_ticket(
             self,
             position_ticket: int,
@@ -491,9 +382,11 @@ class MT5Service:
         }
 
         try:
-            if not mt5.initialize():
+            try:
+                self._ensure_connected()
+            except RuntimeError as e:
                 payload["error"] = "MT5 initialize failed"
-                payload["last_error"] = mt5.last_error()
+                payload["last_error"] = str(e)
                 return payload
 
             pos_list = mt5.positions_get(ticket=int(position_ticket))
@@ -505,53 +398,36 @@ class MT5Service:
             pos = pos_list[0]
             symbol = pos.symbol
 
+            spec = symbol_specs.get(symbol)
+
             tick = mt5.symbol_info_tick(symbol)
             if tick is None:
                 payload["error"] = f"No tick for {symbol}"
                 payload["status"] = 404
                 return payload
 
-            # opposite side to close
-            if pos.type == mt5.POSITION_TYPE_BUY:
-                order_type = mt5.ORDER_TYPE_SELL
-                price = tick.bid
-            else:
-                order_type = mt5.ORDER_TYPE_BUY
-                price = tick.ask
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "position": int(pos.ticket),
-                "volume": float(pos.volume),
-                "type": order_type,
-                "price": float(price),
-                "deviation": int(deviation),
-                "magic": int(magic),
-                "comment": comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-            }
+            request = self._close_request(pos, tick, deviation=deviation, magic=magic, comment=comment)
+            sent = self._send_with_supported_filling(request, spec=spec)
 
-            result, used_filling = self._send_with_supported_filling(request)
-
-            payload["used_filling"] = int(used_filling) if used_filling is not None else None
+            payload["used_filling"] = sent.get("used_filling")
 
+            result = sent.get("result")
             if result is None:
-                payload["error"] = "order_send returned None"
-                payload["last_error"] = mt5.last_error()
+                payload["error"] = sent.get("error") or "order_send returned None"
+                payload["last_error"] = sent.get("last_error")
                 payload["status"] = 500
                 return payload
 
             payload["mt5"] = {
-                "retcode": int(result.retcode),
-                "order": int(getattr(result, "order", 0) or 0),
-                "deal": int(getattr(result, "deal", 0) or 0),
-                "price": float(getattr(result, "price", 0.0) or 0.0),
-                "comment": str(getattr(result, "comment", "")),
-                "request_id": int(getattr(result, "request_id", 0) or 0),
+                "retcode": int(result.get("retcode", 0)),
+                "order": int(result.get("order", 0) or 0),
+                "deal": int(result.get("deal", 0) or 0),
+                "price": float(result.get("price", 0.0) or 0.0),
+                "comment": str(result.get("comment", "")),
+                "request_id": int(result.get("request_id", 0) or 0),
             }
 
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if payload["mt5"]["retcode"] != mt5.TRADE_RETCODE_DONE:
                 payload["error"] = "Close failed"
                 payload["details"] = payload["mt5"]["comment"]
                 payload["status"] = 400
@@ -567,12 +443,7 @@ class MT5Service:
             payload["status"] = 500
             return payload
 
-        finally:
-            try:
-                mt5.shutdown()
-            except Exception:
-                pass
-
+    @on_mt5_thread(lane=Lane.MODIFY)
     def modify_position_sl_tp(self, ticket: int, sl: float = None, tp: float = None):
         pos = self.get_position_by_ticket(ticket)
         if pos is None:
@@ -588,113 +459,198 @@ class MT5Service:
 
         result = mt5.order_send(request)
         if result is None:
+            mt5_session.mark_unhealthy()
             raise RuntimeError("order_send returned None (MT5 not ready?)")
 
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             raise RuntimeError(f"Modify SL/TP failed: {result.comment}")
+        live_snapshot.invalidate()
 
         return {"ticket": ticket, "result": "modified", "retcode": result.retcode}
 
-    def close_all_positions(self):
-        positions = mt5.positions_get() or []
-        closed = []
-        errors = []
-
-        for p in positions:
-            try:
-                closed.append(self.close_position(int(p.ticket)))
-            except Exception as e:
-                errors.append({"ticket": int(p.ticket), "error": str(e)})
-
-        return {"closed": closed, "errors": errors, "count": len(positions)}
+    @staticmethod
+    def _close_request(pos, tick, deviation: int = 20, magic: int = 123456, comment: str = "api-close") -> dict:
+        """Opposing market deal for an open position, priced off `tick`."""
+        if pos.type == mt5.POSITION_TYPE_BUY:
+            order_type = mt5.ORDER_TYPE_SELL
+            price = tick.bid
+        else:
+            order_type = mt5.ORDER_TYPE_BUY
+            price = tick.ask
 
-    def list_positions(self, symbol: str = None):
-        import MetaTrader5 as mt5
+        return {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": pos.symbol,
+            "position": int(pos.ticket),
+            "volume": float(pos.volume),
+            "type": order_type,
+            "price": float(price),
+            "deviation": int(deviation),
+            "magic": int(magic),
+            "comment": comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+        }
 
-        if not mt5.initialize():
-            raise RuntimeError("MT5 initialization failed")
+    @on_mt5_thread(lane=Lane.CLOSE)
+    def close_all_positions(
+            self,
+            tickets=None,
+            magic: int | None = None,
+            comment: str | None = None,
+            symbol: str | None = None,
+            deviation: int = 20,
+    ) -> dict:
+        """
+        Flatten engine. Runs as ONE job on the MT5 thread (close lane), so nothing else
+        gets between the deals:
+        - one positions_get(), filtered by scope (tickets / magic / comment prefix / symbol)
+        - positions grouped by symbol: one spec + one tick per symbol
+        - opposing deals sent back to back; a requote refreshes that symbol's tick and resends once
+
+        Returns {"closed": [...], "errors": [...], "missing": [...], "count": n, "elapsed_ms": ...}.
+        `missing` = requested tickets that are no longer open on the terminal.
+        """
+        started = time.monotonic()
+        self._ensure_connected()
 
-        positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
-        positions = positions or []
+        positions = mt5.positions_get() or []
+        wanted = {int(t) for t in tickets} if tickets is not None else None
+        if symbol:
+            # callers pass the plain symbol (XAUUSD), the terminal has the broker's (XAUUSDm)
+            symbol = self.resolve_symbol(symbol)
 
-        data = []
+        by_symbol = {}
         for p in positions:
-            data.append({
-                "ticket": p.ticket,
-                "symbol": p.symbol,
-                "type": "buy" if p.type == mt5.POSITION_TYPE_BUY else "sell",
-                "volume": float(p.volume),
-                "price_open": float(p.price_open),
-                "sl": float(p.sl),
-                "tp": float(p.tp),
-                "profit": float(p.profit),
-                "time": int(p.time),
-                "magic": int(p.magic),
-                "comment": str(p.comment),
-            })
+            if wanted is not None and int(p.ticket) not in wanted:
+                continue
+            if magic is not None and int(p.magic) != int(magic):
+                continue
+            if comment and not str(p.comment or "").startswith(comment):
+                continue
+            if symbol and p.symbol != symbol:
+                continue
+            by_symbol.setdefault(p.symbol, []).append(p)
+
+        closed, errors = [], []
+        seen = set()
+        for sym, group in by_symbol.items():
+            spec = symbol_specs.get(sym)
+            tick = mt5.symbol_info_tick(sym)
+            for pos in group:
+                seen.add(int(pos.ticket))
+                if tick is None:
+                    errors.append({"ticket": int(pos.ticket), "symbol": sym, "error": f"No tick for {sym}"})
+                    continue
+
+                request = self._close_request(pos, tick, deviation=deviation)
+                sent = self._send_with_supported_filling(request, spec=spec)
+                if not sent.get("ok") and sent.get("retcode") in self._REQUOTE_RETCODES:
+                    fresh = mt5.symbol_info_tick(sym)
+                    if fresh is not None:
+                        tick = fresh
+                        sent = self._send_with_supported_filling(self._close_request(pos, tick, deviation=deviation), spec=spec)
+
+                res = sent.get("result") or {}
+                if sent.get("ok"):
+                    closed.append({
+                        "ticket": int(pos.ticket),
+                        "symbol": sym,
+                        "volume": float(pos.volume),
+                        "price": float(res.get("price", 0.0) or request["price"]),
+                        "deal": int(res.get("deal", 0) or 0),
+                        "profit": float(pos.profit),  # last known floating P/L, the deal may differ by slippage
+                    })
+                else:
+                    errors.append({
+                        "ticket": int(pos.ticket),
+                        "symbol": sym,
+                        "retcode": sent.get("retcode"),
+                        "error": sent.get("error") or sent.get("comment") or "Close failed",
+                    })
+
+        missing = sorted(wanted - {int(p.ticket) for p in positions}) if wanted is not None else []
+        return {
+            "closed": closed,
+            "errors": errors,
+            "missing": missing,
+            "count": len(seen),
+            "elapsed_ms": round((time.monotonic() - started) * 1000.0, 1),
+        }
 
-        #mt5.shutdown()
-        return data
+    def list_positions(self, symbol: str = None):
+        """Served from the shared in-memory snapshot (one positions_get per interval per process)."""
+        return live_snapshot.positions(symbol=symbol)
 
     def list_orders(self, symbol: str = None):
-        import MetaTrader5 as mt5
-
-        if not mt5.initialize():
-            raise RuntimeError("MT5 initialization failed")
-
-        orders = mt5.orders_get(symbol=symbol) if symbol else mt5.orders_get()
-        orders = orders or []
-
-        data = []
-        for o in orders:
-            data.append({
-                "ticket": o.ticket,
-                "symbol": o.symbol,
-                "type": int(o.type),
-                "volume_initial": float(o.volume_initial),
-                "price_open": float(o.price_open),
-                "sl": float(o.sl),
-                "tp": float(o.tp),
-                "time_setup": int(o.time_setup),
-                "magic": int(o.magic),
-                "comment": str(o.comment),
-            })
+        return live_snapshot.orders(symbol=symbol)
 
-        #mt5.shutdown()
-        return data
-
-    def _send_with_supported_filling(self, request: dict) -> dict:
-        info = mt5.symbol_info(request["symbol"])
-        if info is None:
-            return {"ok": False, "error": f"Symbol not found: {request['symbol']}"}
-
-        # Try the most common filling modes
-        candidates = [
-            mt5.ORDER_FILLING_IOC,
-            mt5.ORDER_FILLING_FOK,
-            mt5.ORDER_FILLING_RETURN,
-        ]
+    def _send_with_supported_filling(self, request: dict, spec: SymbolSpec | None = None) -> dict:
+        """
+        order_send with the filling mode this broker accepted last time for (server, symbol).
+        Falls through to the next mode ONLY when the broker says the filling mode is wrong,
+        and remembers whichever mode went through.
+        """
+        symbol = request["symbol"]
+        spec = spec or symbol_specs.get(symbol)
+        if spec is None:
+            return {"ok": False, "error": f"Symbol not found: {symbol}"}
+
+        server = symbol_index.server or ""
+        candidates = filling_modes.candidates(server, symbol, spec.filling_mode)
 
         last = None
+        last_fill = None
+        attempts = 0
         for fill in candidates:
             req = dict(request)
             req["type_filling"] = fill
 
             res = mt5.order_send(req)
+            attempts += 1
             last = res
+            last_fill = fill
 
             if res is not None and res.retcode in (mt5.TRADE_RETCODE_DONE, mt5.TRADE_RETCODE_PLACED):
-                return {"ok": True, "retcode": res.retcode, "comment": res.comment, "result": res._asdict()}
+                filling_modes.remember(server, symbol, fill)
+                live_snapshot.invalidate()  # positions/orders changed, next read re-pulls
+                return {
+                    "ok": True,
+                    "retcode": res.retcode,
+                    "comment": res.comment,
+                    "used_filling": int(fill),
+                    "attempts": attempts,
+                    "request": req,
+                    "result": res._asdict(),
+                }
 
             # If it failed for a reason other than filling mode, stop early
-            if res is not None and "filling" not in (res.comment or "").lower():
+            if not is_filling_rejection(res):
                 break
 
-        # failed all candidates
+            # learned mode stopped working -> drop it so the next order doesn't lead with it
+            if fill == filling_modes.get(server, symbol):
+                filling_modes.forget(server, symbol)
+
+        # failed all candidates -> spec may be stale (trade_mode/filling changed), re-read next time
+        symbol_specs.invalidate(symbol)
         if last is None:
-            return {"ok": False, "error": "order_send returned None", "last_error": mt5.last_error()}
+            mt5_session.mark_unhealthy()
+            return {
+                "ok": False,
+                "error": "order_send returned None",
+                "last_error": mt5.last_error(),
+                "used_filling": int(last_fill) if last_fill is not None else None,
+                "attempts": attempts,
+            }
 
-        return {"ok": False, "retcode": last.retcode, "comment": last.comment, "result": last._asdict()}
+        return {
+            "ok": False,
+            "retcode": last.retcode,
+            "comment": last.comment,
+            "used_filling": int(last_fill),
+            "attempts": attempts,
+            "result": last._asdict(),
+        }
 
     def _get_tick_with_retry(self, symbol: str, retries: int = 10, delay: float = 0.2):
         tick = None
@@ -705,51 +661,36 @@ class MT5Service:
             time.sleep(delay)
         return None
 
-    def _compute_slippage_points(self, symbol: str, max_slippage_pips: float) -> int:
+    def _compute_slippage_points(self, symbol: str, max_slippage_pips: float, spec: SymbolSpec | None = None) -> int:
         """
         Convert 'pips' into MT5 'points' deviation.
         For most FX pairs: 1 pip = 10 points when digits=5 or 3.
         For digits=4 or 2: 1 pip = 1 point.
         """
-        info = mt5.symbol_info(symbol)
-        if not info:
+        spec = spec or symbol_specs.get(symbol)
+        if not spec:
             return 20  # fallback
 
-        digits = info.digits or 5
+        digits = spec.digits or 5
         # pip->point factor
         pip_factor = 10 if digits in (3, 5) else 1
         return int(max_slippage_pips * pip_factor)
 
     def resolve_symbol(self, symbol: str) -> str:
+        """
+        Broker symbol for the requested one (XAUUSD -> XAUUSDm / GOLD / XAUUSD.i ...).
+        Served from the process-wide symbol index: one symbols_get() per TTL, then dict hits.
+        """
         base = (symbol or "").upper().strip()
-
-        # If exact exists, use it
-        info = mt5.symbol_info(base)
-        if info:
+        if not base:
             return base
 
-        # Try alias list
-        for cand in self.SYMBOL_ALIASES.get(base, []):
-            info = mt5.symbol_info(cand)
-            if info:
-                return cand
-
-        # Last resort: scan all symbols for prefix match
-        all_syms = mt5.symbols_get()
-        if all_syms:
-            for s in all_syms:
-                name = getattr(s, "name", "")
-                if name.upper() == base:
-                    return name
-            for s in all_syms:
-                name = getattr(s, "name", "")
-                if name.upper().startswith(base):
-                    return name
-
-        return base  # fallback (will fail gracefully later)
+        resolved = symbol_index.resolve(base, aliases=self.SYMBOL_ALIASES)
+        return resolved or base  # fallback (will fail gracefully later)
 
+    @on_mt5_thread
     def get_account_info(self):
-        import MetaTrader5 as mt5
+        self._ensure_connected()
 
         acc = mt5.account_info()
         if acc is None:
@@ -766,55 +707,32 @@ class MT5Service:
         """
         Ensures MT5 is initialized and usable inside THIS Django process.
         Raises RuntimeError with a useful message if it cannot connect.
+        Cheap between heartbeats (see MT5Session.ensure).
         """
-        # Already initialized in this process?
-        ti = mt5.terminal_info()
-        ai = mt5.account_info()
-        if ti is not None and ai is not None:
-            return
-
-        # Try initialize (attach to running terminal first)
-        if not mt5.initialize():
-            # Try with explicit path
-            if not mt5.initialize(path=self.DEFAULT_MT5_PATH):
-                code, msg = mt5.last_error()
-                raise RuntimeError(f"MT5 initialize failed: ({code}) {msg}")
-
-        # Wait until terminal/account becomes available (MT5 can be slow on startup)
-        start = time.time()
-        while time.time() - start < max_wait_sec:
-            if mt5.terminal_info() is not None and mt5.account_info() is not None:
-                return
-            time.sleep(0.25)
-
-
-        # If still not ready:
-        code, msg = mt5.last_error()
-        raise RuntimeError(f"MT5 not ready after init: ({code}) {msg}")
-
-       #self._log(trade, TradeAuditEvent.EventType.MT5_CONNECT_OK, {}, ctx)
+        mt5_session.ensure(max_wait_sec=max_wait_sec)
+        self.connected = True
 
     def ensure_connected(self) -> None:
-        if mt5.initialize():
-            return
-        raise RuntimeError(f"MT5 initialize failed: {mt5.last_error()}")
+        self._ensure_connected()
 
     def copy_rates(self, symbol: str, timeframe: int, bars: int):
         """
         Returns list-like rates from MT5 or [] if none.
         timeframe must be an MT5 TIMEFRAME_* constant.
+        Served like get_symbol_rates: live buffers first, else the incremental rates cache.
         """
-        self.ensure_connected()
-
         symbol = symbol.strip().upper()
 
-        # Ensure symbol is available in Market Watch
-        if not mt5.symbol_select(symbol, True):
-            raise RuntimeError(f"symbol_select failed for {symbol}: {mt5.last_error()}")
+        name = self.TIMEFRAME_NAMES.get(timeframe)
+        if name is not None:
+            live = candle_aggregator.get(symbol, name, bars)
+            if live is not None:
+                # the aggregator broadcasts its own bar updates
+                return live
 
-        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, int(bars))
+        rates = self._copy_rates_terminal(symbol, timeframe, bars)
 
-        if rates:
+        if rates is not None and len(rates) > 0:
             last = rates[-1]
             candle = {
                 "time": int(last["time"]),
@@ -822,38 +740,28 @@ class MT5Service:
                 "high": float(last["high"]),
                 "low": float(last["low"]),
                 "close": float(last["close"]),
-                "volume": float(last.get("tick_volume", 0)),
+                "volume": float(last["tick_volume"]),
             }
 
             broadcast_candle(symbol, timeframe, candle)
 
         if rates is None:
             # failure case
-            print("copy_rates_from_pos returned None:", mt5.last_error())
+            print("copy_rates returned None:", mt5.last_error())
             return []
 
         # can be empty array too
         return rates
 
-    def _resolve_filling_mode(self, symbol: str) -> int:
-        info = mt5.symbol_info(symbol)
-        if not info:
-            return mt5.ORDER_FILLING_RETURN  # safest fallback
-
-        fm = info.filling_mode
-
-        # Prefer IOC → FOK → RETURN
-        candidates = [
-            mt5.ORDER_FILLING_IOC,
-            mt5.ORDER_FILLING_FOK,
-            mt5.ORDER_FILLING_RETURN,
-        ]
+    @on_mt5_thread
+    def _copy_rates_terminal(self, symbol: str, timeframe: int, bars: int):
+        self.ensure_connected()
 
-        for c in candidates:
-            if fm == c:
-                return c
+        # Ensure symbol is available in Market Watch
+        if not mt5.symbol_select(symbol, True):
+            raise RuntimeError(f"symbol_select failed for {symbol}: {mt5.last_error()}")
 
-        return mt5.ORDER_FILLING_RETURN
+        return rates_cache.get(symbol, timeframe, int(bars))
 
     def _log(self, trade, event_type, payload=None, ctx=None):
         try:
@@ -880,9 +788,12 @@ class MT5Service:
         "W1": mt5.TIMEFRAME_W1,
         "MN1": mt5.TIMEFRAME_MN1,
     }
+    TIMEFRAME_NAMES = {v: k for k, v in TIMEFRAME_MAP.items()}
 
     # TICK = symbol only
+    @on_mt5_thread
     def get_symbol_tick(self, symbol: str):
+        self._ensure_connected()
         tick = mt5.symbol_info_tick(symbol)
         if tick is None:
             return None
@@ -895,35 +806,48 @@ class MT5Service:
 
     #  RATES/CANDLES = symbol + timeframe + bars
     def get_symbol_rates(self, symbol: str, timeframe: str, bars: int = 300):
-        self.ensure_connected()
-
         symbol = (symbol or "").strip().upper()
         timeframe = (timeframe or "").strip().upper()
-        tf = TIMEFRAMES.get(timeframe)
+        tf = self.TIMEFRAME_MAP.get(timeframe)
 
         if tf is None:
             raise ValueError(f"Unsupported timeframe: {timeframe}")
 
+        # live pairs are served from the tick-fed ring buffers (list of dicts, same keys as the rates),
+        # read here on the caller's thread: no executor slot behind orders / closes
+        live = candle_aggregator.get(symbol, timeframe, bars)
+        if live is not None:
+            return live
+
+        return self._symbol_rates_terminal(symbol, timeframe, tf, bars)
+
+    @on_mt5_thread
+    def _symbol_rates_terminal(self, symbol: str, timeframe: str, tf: int, bars: int):
+        self.ensure_connected()
+
         # Make sure symbol is available in Market Watch
-        info = mt5.symbol_info(symbol)
-        if info is None:
+        spec = symbol_specs.get(symbol)
+        if spec is None:
             raise ValueError(f"Symbol not found in MT5: {symbol}")
 
-        if not info.visible:
+        if not spec.visible:
             if not mt5.symbol_select(symbol, True):
                 raise RuntimeError(f"symbol_select failed for {symbol}: {mt5.last_error()}")
+            symbol_specs.mark_visible(symbol)
 
-        rates = mt5.copy_rates_from_pos(symbol, tf, 0, int(bars))
+        # only the bars newer than the cached tail go over the wire after the first call
+        rates = rates_cache.get(symbol, tf, int(bars))
 
         # Debug info (this is the key)
         err = mt5.last_error()
-        print(f"[MT5] copy_rates_from_pos symbol={symbol} tf={timeframe} bars={bars} "
+        print(f"[MT5] rates symbol={symbol} tf={timeframe} bars={bars} "
               f"rates_len={(0 if rates is None else len(rates))} last_error={err}", flush=True)
 
         return rates
     # ==========================
     # Alex / Zone Engine Candles
     # ==========================
+    @on_mt5_thread
     def get_candles(self, symbol: str, timeframe: str, bars: int):
         """
         Alex-friendly candles:
@@ -944,23 +868,56 @@ class MT5Service:
         except Exception:
             return []
 
-        # Use your existing wrapper (count -> bars)
-        return self.get_rates(symbol=resolved, timeframe=timeframe, count=int(bars))
+        rates = self.get_symbol_rates(symbol=resolved, timeframe=timeframe, bars=int(bars))
+        if rates is None:
+            return []
+        return [
+            {
+                "time": int(r["time"]),
+                "open": float(r["open"]),
+                "high": float(r["high"]),
+                "low": float(r["low"]),
+                "close": float(r["close"]),
+            }
+            for r in rates
+        ]
 
+    # ==========================
+    # Async facade (ASGI views / Channels consumers)
+    # Same methods, queued onto the MT5 owner thread without blocking the event loop.
+    # ==========================
+    async def aplace_market_order(self, *args, **kwargs) -> dict:
+        return await mt5_executor.run(self.place_market_order, *args, **kwargs)
 
+    async def aget_symbol_tick(self, symbol: str):
+        return await mt5_executor.run(self.get_symbol_tick, symbol)
 
+    async def alist_positions(self, symbol: str = None):
+        # snapshot read; a refresh (if due) hops to the MT5 thread by itself
+        return await asyncio.to_thread(self.list_positions, symbol)
+
+    async def acopy_rates(self, symbol: str, timeframe: int, bars: int):
+        # buffer hits answer in place; the terminal path hops to the MT5 thread by itself
+        return await asyncio.to_thread(self.copy_rates, symbol, timeframe, bars)
+
+
+
+@on_mt5_thread
 def get_market_tick(symbol: str) -> dict:
-    if not mt5.initialize():
-        return {"error": "MT5 initialize failed", "status": 500, "last_error": mt5.last_error()}
+    try:
+        mt5_session.ensure()
+    except RuntimeError as e:
+        return {"error": "MT5 initialize failed", "status": 500, "last_error": str(e)}
 
-    info = mt5.symbol_info(symbol)
-    if info is None:
+    spec = symbol_specs.get(symbol)
+    if spec is None:
         #mt5.shutdown()
         return {"error": f"Symbol {symbol} not found", "status": 404}
 
     # Ensure symbol is visible in Market Watch
-    if not info.visible:
-        mt5.symbol_select(symbol, True)
+    if not spec.visible:
+        if mt5.symbol_select(symbol, True):
+            symbol_specs.mark_visible(symbol)
 
     tick = mt5.symbol_info_tick(symbol)
     if tick is None:
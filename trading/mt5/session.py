@@ -0,0 +1,176 @@
+# trading/mt5/session.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional, Tuple
+
+import MetaTrader5 as mt5
+from django.conf import settings
+
+from .symbols import symbol_index
+from .symbol_specs import symbol_specs
+from .rates_cache import rates_cache
+
+
+DEFAULT_MT5_PATH = r"C:\Program Files\MetaTrader 5\terminal64.exe"
+
+DEFAULT_HEARTBEAT_SECONDS = 5.0
+DEFAULT_BACKOFF_MIN_SECONDS = 0.5
+DEFAULT_BACKOFF_MAX_SECONDS = 30.0
+
+
+class MT5Session:
+    """
+    Process-wide owner of the single MetaTrader5 terminal attachment.
+
+    - initialize() once, never shutdown() per request
+    - ensure() is a timestamp check between heartbeats; the heartbeat itself is one terminal_info()
+    - when the link is lost, reconnects with exponential backoff (callers fail fast inside the window)
+    - every (re)attach drops the symbol index/spec/rates caches, the broker may have changed
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._healthy = False
+        self._last_ok = 0.0
+        self._credentials: Tuple[Optional[int], Optional[str]] = (None, None)  # (login, server)
+        self._password: Optional[str] = None
+
+        self._failures = 0
+        self._next_attempt_at = 0.0
+        self.reconnects = 0
+
+    # ---------- settings ----------
+    def _path(self) -> str:
+        return self.path or getattr(settings, "MT5_TERMINAL_PATH", DEFAULT_MT5_PATH)
+
+    def _heartbeat_interval(self) -> float:
+        return float(getattr(settings, "MT5_HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS))
+
+    def _backoff_delay(self) -> float:
+        lo = float(getattr(settings, "MT5_RECONNECT_BACKOFF_MIN_SECONDS", DEFAULT_BACKOFF_MIN_SECONDS))
+        hi = float(getattr(settings, "MT5_RECONNECT_BACKOFF_MAX_SECONDS", DEFAULT_BACKOFF_MAX_SECONDS))
+        return min(hi, lo * (2 ** max(0, self._failures - 1)))
+
+    # ---------- health ----------
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    def heartbeat(self) -> bool:
+        """One cheap terminal call. terminal_info().connected is False when the broker link drops."""
+        ti = mt5.terminal_info()
+        ok = ti is not None and bool(getattr(ti, "connected", True))
+        self._healthy = ok
+        if ok:
+            self._last_ok = time.monotonic()
+        return ok
+
+    def mark_unhealthy(self) -> None:
+        """Call when a terminal call returned None unexpectedly; the next ensure() re-checks."""
+        self._healthy = False
+
+    # ---------- attach / reconnect ----------
+    def _attach(self, login: Optional[int] = None, password: Optional[str] = None, server: Optional[str] = None) -> bool:
+        kwargs = {}
+        if login is not None:
+            kwargs.update(login=int(login), password=password, server=server)
+
+        # attach to a running terminal first, then by explicit path
+        ok = mt5.initialize(**kwargs) or mt5.initialize(path=self._path(), **kwargs)
+        if not ok:
+            return False
+
+        symbol_index.invalidate()
+        symbol_specs.invalidate()
+        rates_cache.invalidate()
+        self.reconnects += 1
+        return True
+
+    def _wait_ready(self, max_wait_sec: float) -> bool:
+        start = time.monotonic()
+        while time.monotonic() - start < max_wait_sec:
+            if self.heartbeat():
+                return True
+            time.sleep(0.25)
+        return False
+
+    def ensure(self, max_wait_sec: float = 10) -> None:
+        """
+        Ensures the terminal is attached and usable inside THIS process.
+        Raises RuntimeError with a useful message if it cannot connect.
+        """
+        if self._healthy and (time.monotonic() - self._last_ok) < self._heartbeat_interval():
+            return
+
+        with self._lock:
+            # someone else may have fixed it while we waited for the lock
+            if self._healthy and (time.monotonic() - self._last_ok) < self._heartbeat_interval():
+                return
+            if self.heartbeat():
+                self._failures = 0
+                return
+
+            now = time.monotonic()
+            if now < self._next_attempt_at:
+                raise RuntimeError(
+                    f"MT5 reconnect backoff: next attempt in {self._next_attempt_at - now:.1f}s "
+                    f"(failures={self._failures})"
+                )
+
+            login, server = self._credentials
+            ok = self._attach(login=login, password=self._password, server=server)
+            if ok and self._wait_ready(max_wait_sec):
+                self._failures = 0
+                self._next_attempt_at = 0.0
+                return
+
+            self._failures += 1
+            self._next_attempt_at = time.monotonic() + self._backoff_delay()
+            code, msg = mt5.last_error()
+            raise RuntimeError(f"MT5 initialize failed: ({code}) {msg}")
+
+    def connect(self, login: Optional[int] = None, password: Optional[str] = None, server: Optional[str] = None) -> bool:
+        """
+        Explicit (re)login. Only tears the attachment down when switching accounts;
+        re-connecting to the same account just re-checks health.
+        """
+        with self._lock:
+            same_account = (login is None or (int(login), server) == self._credentials)
+            if same_account and self.heartbeat():
+                return True
+
+            if not same_account:
+                # switching accounts: shutdown any previous session cleanly
+                try:
+                    mt5.shutdown()
+                except Exception:
+                    pass
+                self._healthy = False
+
+            if not self._attach(login=login, password=password, server=server):
+                raise ConnectionError(f"MT5 initialization failed -> {mt5.last_error()}")
+
+            if login is not None:
+                self._credentials = (int(login), server)
+                self._password = password
+
+            self.heartbeat()
+            self._failures = 0
+            self._next_attempt_at = 0.0
+            return True
+
+    def shutdown(self) -> None:
+        """Process teardown only (not per request)."""
+        with self._lock:
+            try:
+                mt5.shutdown()
+            except Exception:
+                pass
+            self._healthy = False
+
+
+# one terminal attachment per process
+mt5_session = MT5Session()
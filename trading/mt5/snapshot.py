@@ -0,0 +1,329 @@
+# trading/mt5/snapshot.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import MetaTrader5 as mt5
+from django.conf import settings
+from django.db import close_old_connections
+
+from .executor import mt5_executor
+from .session import mt5_session
+
+
+DEFAULT_INTERVAL_SECONDS = 1.0
+# how many refreshes worth of deltas we keep for changes_since()
+DEFAULT_HISTORY = 120
+
+KINDS = ("positions", "orders")
+
+
+def position_row(p) -> Dict[str, Any]:
+    return {
+        "ticket": p.ticket,
+        "symbol": p.symbol,
+        "type": "buy" if p.type == mt5.POSITION_TYPE_BUY else "sell",
+        "volume": float(p.volume),
+        "price_open": float(p.price_open),
+        "sl": float(p.sl),
+        "tp": float(p.tp),
+        "profit": float(p.profit),
+        "time": int(p.time),
+        "magic": int(p.magic),
+        "comment": str(p.comment),
+    }
+
+
+def order_row(o) -> Dict[str, Any]:
+    return {
+        "ticket": o.ticket,
+        "symbol": o.symbol,
+        "type": int(o.type),
+        "volume_initial": float(o.volume_initial),
+        "price_open": float(o.price_open),
+        "sl": float(o.sl),
+        "tp": float(o.tp),
+        "time_setup": int(o.time_setup),
+        "magic": int(o.magic),
+        "comment": str(o.comment),
+    }
+
+
+def diff(prev: Dict[int, dict], curr: Dict[int, dict]) -> Dict[str, list]:
+    """add/update/remove between two {ticket: row} maps."""
+    added = [row for t, row in curr.items() if t not in prev]
+    updated = [row for t, row in curr.items() if t in prev and prev[t] != row]
+    removed = [t for t in prev if t not in curr]
+    return {"added": added, "updated": updated, "removed": removed}
+
+
+def _empty(delta: Dict[str, list]) -> bool:
+    return not (delta["added"] or delta["updated"] or delta["removed"])
+
+
+class LiveSnapshot:
+    """
+    In-memory positions/orders keyed by ticket, refreshed at most once per interval.
+
+    - readers (any number of dashboards) get the snapshot from memory
+    - the terminal sees one positions_get() + one orders_get() per interval, whoever asks
+    - each refresh computes add/update/remove deltas, pushes them to subscribers
+      and keeps a short history so pollers can ask for changes_since(version)
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._data: Dict[str, Dict[int, dict]] = {k: {} for k in KINDS}
+        self.version = 0
+        self.refreshed_at = 0.0
+        self._history: Deque[Tuple[int, Dict[str, dict]]] = deque(maxlen=DEFAULT_HISTORY)
+        self._subscribers: List[Callable[[int, Dict[str, dict]], None]] = []
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.terminal_reads = 0
+        self.served = 0
+
+    def _interval(self) -> float:
+        if self.interval is not None:
+            return float(self.interval)
+        return float(getattr(settings, "MT5_SNAPSHOT_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS))
+
+    def is_stale(self) -> bool:
+        return (time.monotonic() - self.refreshed_at) >= self._interval()
+
+    # ---------- refresh ----------
+    @staticmethod
+    def _fetch() -> Dict[str, Dict[int, dict]]:
+        # runs on the MT5 owner thread
+        mt5_session.ensure()
+        positions = mt5.positions_get() or []
+        orders = mt5.orders_get() or []
+        return {
+            "positions": {int(p.ticket): position_row(p) for p in positions},
+            "orders": {int(o.ticket): order_row(o) for o in orders},
+        }
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Pulls from the terminal if the snapshot is stale. Concurrent callers wait for the
+        one refresh in flight instead of issuing their own. Returns the current version.
+        """
+        if not force and not self.is_stale():
+            return self.version
+
+        # on the MT5 thread we can't wait for a refresh that is queued behind us -> serve what we have
+        if not self._refresh_lock.acquire(blocking=not mt5_executor.on_owner_thread()):
+            return self.version
+        try:
+            if not force and not self.is_stale():
+                return self.version
+
+            fresh = mt5_executor.call(self._fetch)
+            self.terminal_reads += 1
+
+            delta = {k: diff(self._data[k], fresh[k]) for k in KINDS}
+            changed = not all(_empty(d) for d in delta.values())
+            with self._lock:
+                self._data = fresh
+                self.refreshed_at = time.monotonic()
+                if changed:
+                    self.version += 1
+                    self._history.append((self.version, delta))
+                version = self.version
+        finally:
+            self._refresh_lock.release()
+
+        if changed:
+            self._publish(version, delta)
+        return version
+
+    def invalidate(self) -> None:
+        """Next read refreshes (call after anything that opens/closes/modifies positions)."""
+        self.refreshed_at = 0.0
+
+    # ---------- reads ----------
+    def _rows(self, kind: str, symbol: Optional[str]) -> List[dict]:
+        self.refresh()
+        self.served += 1
+        rows = list(self._data[kind].values())
+        if symbol:
+            rows = [r for r in rows if r["symbol"] == symbol]
+        return rows
+
+    def positions(self, symbol: Optional[str] = None) -> List[dict]:
+        return self._rows("positions", symbol)
+
+    def orders(self, symbol: Optional[str] = None) -> List[dict]:
+        return self._rows("orders", symbol)
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """
+        Merged deltas after `version`. If `version` fell out of the history window
+        the caller gets {"full": True, ...} with the whole snapshot instead.
+        """
+        self.refresh()
+        with self._lock:
+            current = self.version
+            history = list(self._history)
+            data = self._data
+
+        if version >= current:
+            return {"version": current, "full": False, **{k: {"upserted": [], "removed": []} for k in KINDS}}
+
+        if not history or history[0][0] > version + 1:
+            return {"version": current, "full": True, **{k: list(data[k].values()) for k in KINDS}}
+
+        out: Dict[str, Any] = {"version": current, "full": False}
+        for kind in KINDS:
+            touched: Dict[int, dict] = {}
+            removed = set()
+            for v, delta in history:
+                if v <= version:
+                    continue
+                for row in delta[kind]["added"] + delta[kind]["updated"]:
+                    touched[int(row["ticket"])] = row
+                    removed.discard(int(row["ticket"]))
+                for t in delta[kind]["removed"]:
+                    touched.pop(t, None)
+                    removed.add(t)
+            # report current rows for touched tickets (later refreshes may have changed them again)
+            out[kind] = {
+                "upserted": [data[kind][t] for t in touched if t in data[kind]],
+                "removed": sorted(removed),
+            }
+        return out
+
+    # ---------- subscribers ----------
+    def subscribe(self, callback: Callable[[int, Dict[str, dict]], None]) -> Callable[[], None]:
+        """callback(version, {"positions": delta, "orders": delta}); returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _publish(self, version: int, delta: Dict[str, dict]) -> None:
+        for cb in list(self._subscribers):
+            try:
+                cb(version, delta)
+            except Exception:
+                # a broken subscriber must not stop the others (or the refresh loop)
+                pass
+
+    # ---------- background refresh ----------
+    def start(self) -> None:
+        """Refresh on a timer so subscribers get deltas even when nobody polls (see PositionsPush)."""
+        # cleared first: a loop that was asked to stop but is still sleeping keeps going
+        self._stop.clear()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="mt5-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # terminal down / executor busy -> try again next tick
+                pass
+            self._stop.wait(self._interval())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "positions": len(self._data["positions"]),
+            "orders": len(self._data["orders"]),
+            "terminal_reads": self.terminal_reads,
+            "served": self.served,
+            "subscribers": len(self._subscribers),
+            "age_ms": round((time.monotonic() - self.refreshed_at) * 1000.0, 1) if self.refreshed_at else None,
+        }
+
+
+# one snapshot per process (one terminal attachment per process)
+live_snapshot = LiveSnapshot()
+
+
+def owners(tickets) -> Dict[int, int]:
+    """position ticket -> user id of the Trade behind it (positions we didn't open have none)."""
+    from trading.models import Trade
+
+    tickets = [int(t) for t in tickets]
+    if not tickets:
+        return {}
+    return dict(
+        Trade.objects.filter(position_ticket__in=tickets, user__isnull=False)
+        .values_list("position_ticket", "user_id")
+    )
+
+
+class PositionsPush:
+    """
+    Pushes every positions delta to the owners' ws/positions/ sockets.
+    The first socket subscribes it to the snapshot and starts the timed refresh,
+    the last one to leave stops both.
+    """
+
+    def __init__(self, snapshot: LiveSnapshot):
+        self.snapshot = snapshot
+        self._lock = threading.Lock()
+        self._clients = 0
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    def attach(self) -> None:
+        with self._lock:
+            self._clients += 1
+            if self._unsubscribe is None:
+                self._unsubscribe = self.snapshot.subscribe(self.on_delta)
+        self.snapshot.start()
+
+    def detach(self) -> None:
+        with self._lock:
+            self._clients = max(0, self._clients - 1)
+            if self._clients or self._unsubscribe is None:
+                return
+            self._unsubscribe()
+            self._unsubscribe = None
+        self.snapshot.stop()
+
+    def on_delta(self, version: int, delta: Dict[str, dict]) -> None:
+        from .market_broadcast import broadcast_positions
+
+        pos = delta["positions"]
+        rows = pos["added"] + pos["updated"]
+        # runs on the refresh thread, not in a request
+        close_old_connections()
+        by_ticket = owners([r["ticket"] for r in rows] + list(pos["removed"]))
+
+        per_user: Dict[int, Dict[str, list]] = {}
+        for key, items in (("added", pos["added"]), ("updated", pos["updated"])):
+            for row in items:
+                uid = by_ticket.get(int(row["ticket"]))
+                if uid is not None:
+                    per_user.setdefault(uid, {"added": [], "updated": [], "removed": []})[key].append(row)
+        for t in pos["removed"]:
+            uid = by_ticket.get(int(t))
+            if uid is not None:
+                per_user.setdefault(uid, {"added": [], "updated": [], "removed": []})["removed"].append(t)
+
+        for uid, payload in per_user.items():
+            broadcast_positions(uid, {"version": version, **payload})
+
+
+# one pusher per process, driven by ws/positions/ connections
+positions_push = PositionsPush(live_snapshot)
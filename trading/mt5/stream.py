@@ -0,0 +1,274 @@
+# trading/mt5/stream.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import MetaTrader5 as mt5
+from django.conf import settings
+
+from .executor import mt5_executor
+from .market_broadcast import broadcast_tick
+from .session import mt5_session
+from .symbols import symbol_index
+
+
+DEFAULT_INTERVAL_SECONDS = 0.25
+DEFAULT_MAX_TICKS_PER_POLL = 1000
+# "tick"  -> symbol_info_tick (latest only, cheapest)
+# "ticks" -> copy_ticks_from since the last time_msc (gap-free, for the candle aggregator)
+DEFAULT_MODE = "tick"
+
+
+def _field(t, name: str, default=None):
+    # symbol_info_tick() gives a namedtuple, copy_ticks_from() a numpy record
+    try:
+        return getattr(t, name)
+    except AttributeError:
+        try:
+            return t[name]
+        except (KeyError, IndexError, ValueError, TypeError):
+            return default
+
+
+def tick_dict(symbol: str, t) -> Dict[str, Any]:
+    bid = float(_field(t, "bid", 0.0) or 0.0)
+    ask = float(_field(t, "ask", 0.0) or 0.0)
+    return {
+        "symbol": symbol,
+        "bid": bid,
+        "ask": ask,
+        "last": float(_field(t, "last", 0.0) or 0.0),
+        "volume": float(_field(t, "volume", 0) or 0),
+        "spread": (ask - bid) if (bid and ask) else None,
+        "time": int(_field(t, "time", 0) or 0),
+        "time_msc": int(_field(t, "time_msc", 0) or 0),
+    }
+
+
+class TickStream:
+    """
+    One background poller for every websocket client.
+
+    - symbols come from MarketConsumer subscriptions (refcounted per timeframe)
+      plus settings.MT5_STREAM_SYMBOLS (always streamed, e.g. for the candle aggregator)
+    - one executor job per cycle reads all symbols (one queue hop for N symbols)
+    - ticks are deduped on time_msc; per cycle only the newest tick per symbol is published
+      (coalesced) to market_<symbol>_<tf>; listeners get every new tick
+    """
+
+    def __init__(self, interval: Optional[float] = None, mode: Optional[str] = None):
+        self.interval = interval
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Dict[str, int]] = {}     # symbol -> {timeframe: refcount}
+        self._watched: set = set()                       # streamed without a websocket (candle aggregator)
+        self._resolved: Dict[str, str] = {}             # requested -> broker symbol
+        self._last_msc: Dict[str, int] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._latest_at: Dict[str, float] = {}          # last poll that covered the symbol (tick times are server time)
+        self._listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.polls = 0
+        self.ticks_seen = 0
+        self.published = 0
+        self.errors = 0
+
+    # ---------- settings ----------
+    def _interval(self) -> float:
+        if self.interval is not None:
+            return float(self.interval)
+        return float(getattr(settings, "MT5_STREAM_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS))
+
+    def _mode(self) -> str:
+        return self.mode or getattr(settings, "MT5_STREAM_MODE", DEFAULT_MODE)
+
+    def symbols(self) -> List[str]:
+        static = [s.upper() for s in getattr(settings, "MT5_STREAM_SYMBOLS", [])]
+        with self._lock:
+            return sorted(set(static) | set(self._subs) | self._watched)
+
+    # ---------- subscriptions ----------
+    def subscribe(self, symbol: str, timeframe: str) -> None:
+        symbol = (symbol or "").upper().strip()
+        with self._lock:
+            tfs = self._subs.setdefault(symbol, {})
+            tfs[timeframe] = tfs.get(timeframe, 0) + 1
+        self.start()
+
+    def unsubscribe(self, symbol: str, timeframe: str) -> None:
+        symbol = (symbol or "").upper().strip()
+        with self._lock:
+            tfs = self._subs.get(symbol)
+            if not tfs:
+                return
+            tfs[timeframe] = tfs.get(timeframe, 0) - 1
+            if tfs[timeframe] <= 0:
+                tfs.pop(timeframe)
+            if not tfs:
+                self._subs.pop(symbol)
+
+    def watch(self, symbol: str) -> None:
+        """Keep streaming `symbol` even when no websocket is subscribed (until unwatch())."""
+        with self._lock:
+            self._watched.add((symbol or "").upper().strip())
+        self.start()
+
+    def unwatch(self, symbol: str) -> None:
+        symbol = (symbol or "").upper().strip()
+        with self._lock:
+            self._watched.discard(symbol)
+            if symbol not in self._subs:
+                # if it comes back, start from the current tick instead of a stale time_msc
+                self._last_msc.pop(symbol, None)
+
+    def has_subscribers(self, symbol: str) -> bool:
+        return bool(self._subs.get((symbol or "").upper().strip()))
+
+    def gap_free(self) -> bool:
+        """Every tick is delivered ("ticks" mode), not just the newest one per poll."""
+        return self._mode() == "ticks"
+
+    def add_listener(self, callback: Callable[[str, List[Dict[str, Any]]], None]) -> Callable[[], None]:
+        """callback(symbol, [tick, ...]) for every batch of new ticks; returns a remove function."""
+        with self._lock:
+            self._listeners.append(callback)
+        self.start()
+
+        def remove():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+
+        return remove
+
+    def latest(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Last streamed tick (None if we don't stream it or it is older than max_age seconds)."""
+        symbol = (symbol or "").upper().strip()
+        tick = self._latest.get(symbol)
+        if tick is None:
+            return None
+        if max_age is not None and (time.monotonic() - self._latest_at.get(symbol, 0.0)) > max_age:
+            return None
+        return tick
+
+    # ---------- polling (MT5 thread) ----------
+    def broker_symbol(self, symbol: str) -> str:
+        """Requested symbol -> broker symbol (cached until the next reconnect)."""
+        hit = self._resolved.get(symbol)
+        if hit is None:
+            from .service import MT5Service  # service imports a lot; keep this module light
+            hit = symbol_index.resolve(symbol, aliases=MT5Service.SYMBOL_ALIASES) or symbol
+            self._resolved[symbol] = hit
+        return hit
+
+    def _poll(self, symbols: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        mt5_session.ensure()
+        if symbol_index.built_at == 0.0:
+            # reconnect dropped the index -> broker names may have changed
+            self._resolved.clear()
+
+        gap_free = self.gap_free()
+        limit = int(getattr(settings, "MT5_STREAM_MAX_TICKS_PER_POLL", DEFAULT_MAX_TICKS_PER_POLL))
+        out: Dict[str, List[Dict[str, Any]]] = {}
+
+        for symbol in symbols:
+            broker = self.broker_symbol(symbol)
+            last = self._last_msc.get(symbol, 0)
+
+            if gap_free and last:
+                raw = mt5.copy_ticks_from(broker, last // 1000, limit, mt5.COPY_TICKS_ALL)
+                ticks = [] if raw is None else [tick_dict(symbol, t) for t in raw]
+            else:
+                t = mt5.symbol_info_tick(broker)
+                ticks = [] if t is None else [tick_dict(symbol, t)]
+
+            fresh = [t for t in ticks if t["time_msc"] > last]
+            if fresh:
+                self._last_msc[symbol] = fresh[-1]["time_msc"]
+                out[symbol] = fresh
+        return out
+
+    def poll_once(self) -> int:
+        """One cycle: read, dedupe, fan out. Returns how many new ticks were seen."""
+        symbols = self.symbols()
+        if not symbols:
+            return 0
+
+        batch = mt5_executor.call(self._poll, symbols)
+        self.polls += 1
+        now = time.monotonic()
+        for symbol in symbols:
+            # no new tick is still an answer: the latest one is current as of this poll
+            self._latest_at[symbol] = now
+
+        with self._lock:
+            listeners = list(self._listeners)
+            subs = {s: list(tfs) for s, tfs in self._subs.items()}
+
+        count = 0
+        for symbol, ticks in batch.items():
+            count += len(ticks)
+            newest = ticks[-1]
+            self._latest[symbol] = newest
+
+            for cb in listeners:
+                try:
+                    cb(symbol, ticks)
+                except Exception:
+                    self.errors += 1
+
+            for tf in subs.get(symbol, ()):
+                try:
+                    broadcast_tick(symbol, tf, newest)
+                    self.published += 1
+                except Exception:
+                    self.errors += 1
+
+        self.ticks_seen += count
+        return count
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="mt5-tick-stream", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                # terminal down / queue saturated (MT5Busy) / timeout -> skip this cycle
+                self.errors += 1
+            self._stop.wait(self._interval())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subs = {s: dict(tfs) for s, tfs in self._subs.items()}
+        return {
+            "mode": self._mode(),
+            "symbols": self.symbols(),
+            "subscriptions": subs,
+            "polls": self.polls,
+            "ticks_seen": self.ticks_seen,
+            "published": self.published,
+            "errors": self.errors,
+            "alive": bool(self._thread and self._thread.is_alive()),
+        }
+
+
+# one poller per process (one terminal attachment per process)
+tick_stream = TickStream()
@@ -0,0 +1,118 @@
+# trading/mt5/symbol_specs.py
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+import MetaTrader5 as mt5
+from django.conf import settings
+
+
+DEFAULT_TTL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class SymbolSpec:
+    """
+    The parts of mt5.symbol_info() the order pipeline needs.
+    Fetched once and passed down so one order costs one symbol_info call (or none).
+    """
+    name: str
+    digits: int
+    point: float
+    filling_mode: int
+    trade_mode: int
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    visible: bool
+    fetched_at: float = 0.0
+
+    @classmethod
+    def from_info(cls, info) -> "SymbolSpec":
+        return cls(
+            name=str(info.name),
+            digits=int(getattr(info, "digits", 5) or 5),
+            point=float(getattr(info, "point", 0.0) or 0.0),
+            filling_mode=int(getattr(info, "filling_mode", 0) or 0),
+            trade_mode=int(getattr(info, "trade_mode", 0) or 0),
+            volume_min=float(getattr(info, "volume_min", 0.0) or 0.0),
+            volume_max=float(getattr(info, "volume_max", 0.0) or 0.0),
+            volume_step=float(getattr(info, "volume_step", 0.0) or 0.0),
+            visible=bool(getattr(info, "visible", False)),
+            fetched_at=time.monotonic(),
+        )
+
+    @property
+    def trading_disabled(self) -> bool:
+        return self.trade_mode == 0
+
+
+class SymbolSpecCache:
+    """
+    Per-symbol SymbolSpec cache.
+    - entries expire after `ttl_seconds` (scheduled refresh happens lazily on the next read,
+      or eagerly via refresh_all() from a periodic task)
+    - invalidate(symbol) on any order error so the next order re-reads the spec
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._specs: Dict[str, SymbolSpec] = {}
+
+    def _ttl(self) -> float:
+        if self.ttl_seconds is not None:
+            return float(self.ttl_seconds)
+        return float(getattr(settings, "MT5_SYMBOL_SPEC_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+    def _fresh(self, spec: SymbolSpec) -> bool:
+        return (time.monotonic() - spec.fetched_at) <= self._ttl()
+
+    def fetch(self, symbol: str) -> Optional[SymbolSpec]:
+        """Always hits the terminal and stores the result."""
+        info = mt5.symbol_info(symbol)
+        if info is None:
+            self.invalidate(symbol)
+            return None
+        spec = SymbolSpec.from_info(info)
+        with self._lock:
+            self._specs[symbol] = spec
+        return spec
+
+    def get(self, symbol: str, *, refresh: bool = False) -> Optional[SymbolSpec]:
+        if not symbol:
+            return None
+        if not refresh:
+            spec = self._specs.get(symbol)
+            if spec is not None and self._fresh(spec):
+                return spec
+        return self.fetch(symbol)
+
+    def mark_visible(self, symbol: str) -> None:
+        """After a successful symbol_select() we know it's visible; no need to re-fetch."""
+        with self._lock:
+            spec = self._specs.get(symbol)
+            if spec is not None and not spec.visible:
+                self._specs[symbol] = replace(spec, visible=True)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._specs.clear()
+            else:
+                self._specs.pop(symbol, None)
+
+    def refresh_all(self) -> int:
+        """Re-read every cached symbol (for a periodic task). Returns how many were refreshed."""
+        count = 0
+        for symbol in list(self._specs):
+            if self.fetch(symbol) is not None:
+                count += 1
+        return count
+
+
+# one cache per process (one terminal attachment per process)
+symbol_specs = SymbolSpecCache()
@@ -0,0 +1,194 @@
+# trading/mt5/symbols.py
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import MetaTrader5 as mt5
+from django.conf import settings
+
+
+# Suffix conventions per broker, keyed by a lowercase BrokerPortal.server_keywords entry.
+# When the connected server matches one of these, "EURUSD" can resolve to "EURUSDm" etc.
+BROKER_SYMBOL_SUFFIXES: Dict[str, Tuple[str, ...]] = {
+    "exness": ("M", "C", "Z"),
+    "icmarkets": ("I", "A"),
+    "pepperstone": ("A",),
+    "xm": ("MICRO", "M"),
+}
+
+DEFAULT_TTL_SECONDS = 300
+
+
+def normalize_symbol(s: str) -> str:
+    """keep only letters/numbers so "XAUUSD.m" and "XAUUSDm" compare equal to "XAUUSDM"."""
+    return re.sub(r"[^A-Z0-9]", "", (s or "").upper())
+
+
+def _broker_suffixes(server: str) -> Tuple[str, ...]:
+    """
+    Suffix hints for the connected server.
+    Looks up BrokerPortal.server_keywords first, then falls back to BROKER_SYMBOL_SUFFIXES keys.
+    """
+    server_l = (server or "").lower()
+    if not server_l:
+        return ()
+
+    keywords: List[str] = []
+    try:
+        from accounts.models import BrokerPortal
+
+        for portal in BrokerPortal.objects.filter(is_active=True).only("name", "server_keywords"):
+            kws = [str(k).lower() for k in (portal.server_keywords or [])]
+            if any(k and k in server_l for k in kws):
+                keywords.extend(kws)
+                keywords.append(portal.name.lower())
+    except Exception:
+        # DB not ready / app not loaded -> hints from the static table only
+        pass
+
+    keywords.extend(k for k in BROKER_SYMBOL_SUFFIXES if k in server_l)
+
+    suffixes: List[str] = []
+    for k in keywords:
+        for sfx in BROKER_SYMBOL_SUFFIXES.get(k.replace(" ", ""), ()):
+            if sfx not in suffixes:
+                suffixes.append(sfx)
+    return tuple(suffixes)
+
+
+class SymbolIndex:
+    """
+    In-memory map of requested symbol -> broker symbol, built once per terminal/server.
+
+    Build cost is one symbols_get() call; after that resolve() is a dict hit
+    (or a bisect over the sorted names for prefix matches, memoized).
+    The index expires after `ttl_seconds` and is dropped by invalidate() on reconnect.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.server: Optional[str] = None
+        self.built_at: float = 0.0
+        self._exact: Dict[str, str] = {}      # upper broker name -> broker name
+        self._by_norm: Dict[str, str] = {}    # normalized name -> broker name
+        self._aliases: Dict[str, str] = {}    # requested (normalized) -> broker name
+        self._sorted_norm: List[str] = []     # for prefix lookups
+        self._memo: Dict[str, Optional[str]] = {}
+
+    # ---------- lifecycle ----------
+    def _ttl(self) -> float:
+        if self.ttl_seconds is not None:
+            return float(self.ttl_seconds)
+        return float(getattr(settings, "MT5_SYMBOL_INDEX_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+    def is_stale(self) -> bool:
+        if not self.built_at:
+            return True
+        return (time.monotonic() - self.built_at) > self._ttl()
+
+    def invalidate(self) -> None:
+        """Drop the index (call on reconnect / account switch)."""
+        with self._lock:
+            self._reset()
+
+    def build(self, aliases: Optional[Dict[str, Iterable[str]]] = None) -> bool:
+        """
+        Pulls all broker symbols once and rebuilds the lookup tables.
+        Returns False if the terminal gave us nothing (index stays empty).
+        """
+        all_syms = mt5.symbols_get()
+        if not all_syms:
+            return False
+
+        acc = mt5.account_info()
+        server = str(getattr(acc, "server", "") or "")
+
+        exact: Dict[str, str] = {}
+        by_norm: Dict[str, str] = {}
+        for s in all_syms:
+            name = getattr(s, "name", "")
+            if not name:
+                continue
+            exact.setdefault(name.upper(), name)
+            n = normalize_symbol(name)
+            # prefer the shortest broker name for a normalized key ("XAUUSD" over "XAUUSD.i")
+            if n not in by_norm or len(name) < len(by_norm[n]):
+                by_norm[n] = name
+
+        alias_map: Dict[str, str] = {}
+
+        # 1) broker suffix hints: EURUSD -> EURUSDm on Exness, etc.
+        for sfx in _broker_suffixes(server):
+            for n, name in by_norm.items():
+                if n.endswith(sfx) and len(n) > len(sfx):
+                    alias_map.setdefault(n[: -len(sfx)], name)
+
+        # 2) explicit aliases win over suffix guesses (first available candidate)
+        for requested, candidates in (aliases or {}).items():
+            for cand in candidates:
+                hit = exact.get(cand.upper()) or by_norm.get(normalize_symbol(cand))
+                if hit:
+                    alias_map[normalize_symbol(requested)] = hit
+                    break
+
+        with self._lock:
+            self._reset()
+            self.server = server
+            self._exact = exact
+            self._by_norm = by_norm
+            self._aliases = alias_map
+            self._sorted_norm = sorted(by_norm)
+            self.built_at = time.monotonic()
+        return True
+
+    def ensure_built(self, aliases: Optional[Dict[str, Iterable[str]]] = None) -> bool:
+        if self.is_stale():
+            return self.build(aliases)
+        return True
+
+    # ---------- lookups ----------
+    def _prefix_match(self, target: str) -> Optional[str]:
+        names = self._sorted_norm
+        i = bisect.bisect_left(names, target)
+        best = None
+        while i < len(names) and names[i].startswith(target):
+            cand = self._by_norm[names[i]]
+            if best is None or len(cand) < len(best):
+                best = cand
+            i += 1
+        return best
+
+    def lookup(self, symbol: str) -> Optional[str]:
+        """Pure in-memory resolution. Returns None if the symbol is unknown to this index."""
+        base = (symbol or "").strip().upper()
+        if not base:
+            return None
+
+        hit = self._exact.get(base)
+        if hit:
+            return hit
+
+        target = normalize_symbol(base)
+        if target in self._memo:
+            return self._memo[target]
+
+        hit = self._aliases.get(target) or self._by_norm.get(target) or self._prefix_match(target)
+        with self._lock:
+            self._memo[target] = hit
+        return hit
+
+    def resolve(self, symbol: str, aliases: Optional[Dict[str, Iterable[str]]] = None) -> Optional[str]:
+        self.ensure_built(aliases)
+        return self.lookup(symbol)
+
+
+# one index per process (one terminal attachment per process)
+symbol_index = SymbolIndex()
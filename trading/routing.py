@@ -1,7 +1,8 @@
 # market/routing.py
 from django.urls import re_path
-from .consumers import MarketConsumer
+from .consumers import MarketConsumer, PositionsConsumer
 
 websocket_urlpatterns = [
     re_path(r"^ws/market/(?P<symbol>[^/]+)/(?P<tf>[^/]+)/$", MarketConsumer.as_asgi()),
+    re_path(r"^ws/positions/$", PositionsConsumer.as_asgi()),
 ]
@@ -0,0 +1,500 @@
+import calendar
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from trading import audit
+from trading.audit import AuditCtx, AuditWriteFailed, audit_buffer, audit_event
+from trading.mt5.executor import Lane, MT5Busy, MT5Executor, MT5OutcomeUnknown
+from trading.models import Trade, TradeAuditEvent
+
+
+class AuditBufferTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="trader")
+        self.trade = Trade.objects.create(user=self.user, symbol="XAUUSD", side="buy", lot=0.1)
+        self.ctx = AuditCtx(actor_id=self.user.id, ip="10.0.0.1", user_agent="tests")
+
+    def _chain(self):
+        return list(
+            TradeAuditEvent.objects.filter(trade=self.trade).order_by("seq").values_list("seq", "prev_hash", "hash")
+        )
+
+    @staticmethod
+    def _clock():
+        # fixed event times, so two runs hash the same
+        start = datetime(2026, 1, 5, 9, 30, tzinfo=dt_timezone.utc)
+        times = (start + timedelta(milliseconds=i) for i in range(100))
+        return mock.patch.object(audit, "timezone", SimpleNamespace(now=lambda: next(times)))
+
+    def _events(self, write, mt5_thread=False):
+        write(TradeAuditEvent.EventType.VALIDATION_OK, {"lot": 0.1})
+
+        def send():
+            for i in range(3):
+                write(TradeAuditEvent.EventType.ORDER_SEND_ATTEMPT, {"try": i})
+
+        if mt5_thread:
+            # buffered: the MT5 thread adds to the request's buffer while the request thread waits
+            th = threading.Thread(target=send)
+            th.start()
+            th.join()
+        else:
+            send()
+        write(TradeAuditEvent.EventType.ORDER_SEND_RESULT, {"retcode": 10009})
+
+    def _run(self, buffered):
+        TradeAuditEvent.objects.filter(trade=self.trade).delete()
+        Trade.objects.filter(pk=self.trade.pk).update(audit_seq=0)
+        with self._clock():
+            # an existing tail the buffer has to chain onto
+            audit_event(self.trade, TradeAuditEvent.EventType.TRADE_CREATED, {}, self.ctx)
+            if buffered:
+                with audit_buffer(self.trade, self.ctx) as buf:
+                    self._events(lambda kind, payload: audit_event(self.trade, kind, payload), mt5_thread=True)
+                    self.assertEqual(len(buf), 5)
+                    self.assertEqual(len(self._chain()), 1)
+            else:
+                self._events(lambda kind, payload: audit_event(self.trade, kind, payload, self.ctx))
+        return self._chain()
+
+    def test_buffered_chain_matches_unbuffered(self):
+        unbuffered = self._run(buffered=False)
+        buffered = self._run(buffered=True)
+
+        self.assertEqual(buffered, unbuffered)
+        self.assertEqual([seq for seq, _, _ in buffered], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([prev for _, prev, _ in buffered[1:]], [h for _, _, h in buffered[:-1]])
+        for ev in TradeAuditEvent.objects.filter(trade=self.trade):
+            self.assertEqual(ev.hash, ev._compute_hash())
+        self.trade.refresh_from_db()
+        self.assertEqual(self.trade.audit_seq, 6)
+
+    def test_flush_failure_falls_back_to_one_event_per_write(self):
+        real = audit._write_events
+
+        def batch_fails(trade_id, events):
+            if len(events) > 1:
+                raise RuntimeError("deadlock")
+            return real(trade_id, events)
+
+        with mock.patch.object(audit, "_write_events", batch_fails), \
+                self.assertLogs("trading.audit", "ERROR") as logs:
+            with audit_buffer(self.trade, self.ctx):
+                self._events(lambda kind, payload: audit_event(self.trade, kind, payload), mt5_thread=True)
+
+        self.assertEqual([seq for seq, _, _ in self._chain()], [1, 2, 3, 4, 5])
+        self.assertIn("one by one", logs.output[0])
+        self.assertNotIn(self.trade.pk, audit._buffers)
+
+    def test_unwritten_events_raise(self):
+        with mock.patch.object(audit, "_write_events", side_effect=RuntimeError("db down")), \
+                self.assertLogs("trading.audit", "ERROR") as logs:
+            with self.assertRaises(AuditWriteFailed):
+                with audit_buffer(self.trade, self.ctx):
+                    audit_event(self.trade, TradeAuditEvent.EventType.VALIDATION_OK, {})
+            # the block's own error wins; the lost events are still logged
+            with self.assertRaises(ValueError):
+                with audit_buffer(self.trade, self.ctx):
+                    audit_event(self.trade, TradeAuditEvent.EventType.ERROR, {})
+                    raise ValueError("order failed")
+
+        self.assertIn("VALIDATION_OK", logs.output[1])
+        self.assertIn("ERROR", logs.output[3])
+        self.assertEqual(self._chain(), [])
+
+
+    def test_late_event_after_close_is_chained_not_lost(self):
+        with audit_buffer(self.trade, self.ctx) as buf:
+            audit_event(self.trade, TradeAuditEvent.EventType.VALIDATION_OK, {})
+        # the request timed out and closed the buffer; the MT5 job still holds it
+        self.assertTrue(buf.closed)
+        late = buf.add(TradeAuditEvent.EventType.ORDER_SEND_RESULT, {"retcode": 10009})
+
+        self.assertEqual(len(buf), 0)
+        chain = self._chain()
+        self.assertEqual([seq for seq, _, _ in chain], [1, 2])
+        self.assertEqual((late.seq, late.prev_hash), (2, chain[0][2]))
+        self.assertEqual(late.ip_address, "10.0.0.1")
+
+
+class LiveExecuteAuditTests(TestCase):
+    """The routed order views buffer the trade's audit events (one insert per trade)."""
+
+    def setUp(self):
+        try:
+            from trading.views import live
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        self.live = live
+        self.user = get_user_model().objects.create(username="trader")
+        self.factory = APIRequestFactory()
+        self.force_authenticate = force_authenticate
+
+    def _post(self, view, data, svc):
+        request = self.factory.post("/", data, format="json", HTTP_USER_AGENT="tests")
+        self.force_authenticate(request, user=self.user)
+        with mock.patch.object(self.live, "MT5Service", lambda: svc):
+            return view(request)
+
+    def _assert_chain(self, trade, kinds):
+        events = list(TradeAuditEvent.objects.filter(trade=trade).order_by("seq"))
+        self.assertEqual([ev.event_type for ev in events], kinds)
+        prev = ""
+        for ev in events:
+            self.assertEqual((ev.prev_hash, ev.hash), (prev, ev._compute_hash()))
+            prev = ev.hash
+        self.assertEqual(events[0].actor_id, self.user.id)
+
+    def test_execute_trade_writes_the_order_events_once(self):
+        test = self
+
+        class Service:
+            def place_market_order(self, trade, symbol, side, lot, ctx=None, **kwargs):
+                # service events come from the MT5 thread; they wait in the request's buffer
+                def log():
+                    for kind in (TradeAuditEvent.EventType.VALIDATION_OK, TradeAuditEvent.EventType.ORDER_SEND_RESULT):
+                        audit_event(trade, kind, {}, ctx)
+
+                th = threading.Thread(target=log)
+                th.start()
+                th.join()
+                test.assertIn(trade.pk, audit._buffers)
+                return {"ok": True, "order": 11, "retcode": 10009, "request": {"price": 2000.5}}
+
+        writes = []
+        real = audit._write_events
+        with mock.patch.object(audit, "_write_events", lambda pk, evs: (writes.append(len(evs)), real(pk, evs))):
+            resp = self._post(self.live.execute_trade, {"symbol": "XAUUSD", "side": "buy", "lot": 0.1}, Service())
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(writes, [2])
+        self._assert_chain(Trade.objects.get(pk=resp.data["trade_id"]),
+                           ["VALIDATION_OK", "ORDER_SEND_RESULT"])
+
+    def test_unrouted_live_execute_survives_a_failed_audit_write(self):
+        svc = SimpleNamespace(place_market_order=lambda **kw: (
+            audit_event(kw["trade"], TradeAuditEvent.EventType.VALIDATION_OK, {}), {"ok": True})[1])
+        request = self.factory.post("/", {"symbol": "XAUUSD", "side": "buy", "lot": 0.1}, format="json")
+        self.force_authenticate(request, user=self.user)
+        with mock.patch.object(self.live, "mt5_service", svc), \
+                mock.patch.object(audit, "_write_events", side_effect=RuntimeError("db down")), \
+                self.assertLogs("trading.audit", "ERROR"):
+            resp = self.live.LiveExecuteView.as_view()(request)
+        self.assertEqual((resp.status_code, resp.data), (200, {"ok": True}))
+
+    def test_execute_basket_audits_every_leg(self):
+        class Service:
+            def place_basket_orders(self, legs, **kwargs):
+                return [
+                    {"leg": 0, "ok": True, "symbol": "XAUUSD", "retcode": 10009,
+                     "result": {"order": 21, "price": 2000.5}, "position": 21},
+                    {"leg": 1, "ok": False, "symbol": "EURUSD", "retcode": 10019, "comment": "No money"},
+                ]
+
+        legs = [{"symbol": "XAUUSD", "side": "buy", "lot": 0.1}, {"symbol": "EURUSD", "side": "sell", "lot": 0.2}]
+        resp = self._post(self.live.execute_basket, {"legs": legs}, Service())
+
+        self.assertEqual(resp.status_code, 200)
+        for leg, status in zip(resp.data["legs"], (Trade.STATUS_OPEN, Trade.STATUS_FAILED)):
+            trade = Trade.objects.get(pk=leg["trade_id"])
+            self.assertEqual(trade.status, status)
+            self._assert_chain(trade, ["VALIDATION_OK", "ORDER_SEND_RESULT", "TRADE_STATUS_UPDATED"])
+        self.assertEqual(audit._buffers, {})
+
+
+class MT5ExecutorTests(SimpleTestCase):
+    def setUp(self):
+        self.ex = MT5Executor(maxsize=4, name="mt5-executor-test")
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _block(self):
+        """Parks the owner thread on a running job until self.release is set."""
+        started = threading.Event()
+        self.ex.submit(lambda: (started.set(), self.release.wait(5)), lane=Lane.CLOSE)
+        self.assertTrue(started.wait(5))
+
+    def test_timeout_while_queued_cancels_the_job(self):
+        ran = []
+        self._block()
+        with self.assertRaisesRegex(MT5Busy, "not sent"):
+            self.ex.call(ran.append, "order", lane=Lane.ORDER, timeout=0.05)
+        self.release.set()
+        self.ex.call(lambda: None, timeout=5)  # the queue behind it drained
+        self.assertEqual(ran, [])
+        self.assertEqual(self.ex.stats()["cancelled"], 1)
+
+    def test_timeout_while_running_is_outcome_unknown(self):
+        started = threading.Event()
+
+        def order():
+            started.set()
+            self.release.wait(5)
+            return "filled"
+
+        with self.assertRaises(MT5OutcomeUnknown):
+            self.ex.call(order, lane=Lane.ORDER, timeout=0.1)
+        self.assertTrue(started.is_set())
+
+    def test_lanes_run_close_before_read(self):
+        ran = []
+        self._block()
+        futures = [self.ex.submit(ran.append, name, lane=lane)
+                   for name, lane in (("read", Lane.READ), ("order", Lane.ORDER), ("close", Lane.CLOSE))]
+        self.release.set()
+        for f in futures:
+            f.result(timeout=5)
+        self.assertEqual(ran, ["close", "order", "read"])
+
+    @override_settings(MT5_READ_MAX_AGE_SECONDS=0)
+    def test_stale_read_is_shed_when_saturated(self):
+        self._block()
+        stale = self.ex.submit(lambda: "old")
+        fresh = self.ex.submit(lambda: "new")
+        time.sleep(0.01)
+        self.release.set()
+        # 2 of 4 queued when the first read is picked -> saturated; the second runs with 1 left
+        with self.assertRaisesRegex(MT5Busy, "stale"):
+            stale.result(timeout=5)
+        self.assertEqual(fresh.result(timeout=5), "new")
+        self.assertEqual(self.ex.stats()["shed"], 1)
+
+    def test_full_queue_evicts_a_read_for_an_order(self):
+        self._block()
+        reads = [self.ex.submit(lambda i=i: i) for i in range(4)]
+        with self.assertRaisesRegex(MT5Busy, "queue full"):
+            self.ex.submit(lambda: "late read")
+        order = self.ex.submit(lambda: "sent", lane=Lane.ORDER)
+        self.release.set()
+
+        self.assertEqual(order.result(timeout=5), "sent")
+        with self.assertRaisesRegex(MT5Busy, "make room"):
+            reads[0].result(timeout=5)
+        self.assertEqual([f.result(timeout=5) for f in reads[1:]], [1, 2, 3])
+        self.assertEqual(self.ex.stats()["rejected"], 1)
+
+    def test_nested_call_runs_inline_on_the_owner_thread(self):
+        def outer():
+            # queued again it would wait on itself forever
+            return self.ex.call(lambda: threading.current_thread().name, timeout=0.5)
+
+        self.assertEqual(self.ex.call(outer, timeout=5), "mt5-executor-test")
+
+
+class CandleAggregatorTests(SimpleTestCase):
+    def setUp(self):
+        try:
+            from trading.mt5 import candles
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        self.candles = candles
+        p = mock.patch.object(candles, "broadcast_candle", lambda *a, **kw: None)
+        p.start()
+        self.addCleanup(p.stop)
+
+    @staticmethod
+    def _ts(*parts):
+        return calendar.timegm(parts + (0,) * (6 - len(parts)))
+
+    def test_bar_open(self):
+        bar_open = self.candles.bar_open
+        self.assertEqual(bar_open(self._ts(2024, 1, 10, 10, 7, 30), "M15"), self._ts(2024, 1, 10, 10))
+        self.assertEqual(bar_open(self._ts(2024, 1, 10, 10, 7, 30), "H4"), self._ts(2024, 1, 10, 8))
+        # weekly bars open on Sunday 00:00
+        sunday = self._ts(2024, 1, 7)
+        self.assertEqual(bar_open(self._ts(2024, 1, 10, 12), "W1"), sunday)
+        self.assertEqual(bar_open(sunday, "W1"), sunday)
+        self.assertEqual(bar_open(sunday - 1, "W1"), self._ts(2023, 12, 31))
+        # monthly bars follow the calendar, leap day included
+        self.assertEqual(bar_open(self._ts(2024, 2, 29, 23, 59), "MN1"), self._ts(2024, 2, 1))
+        self.assertEqual(bar_open(self._ts(2024, 3, 1), "MN1"), self._ts(2024, 3, 1))
+
+    def _aggregator(self, timeframes):
+        agg = self.candles.CandleAggregator(depth=3)
+        agg._tracked["XAUUSD"] = set(timeframes)
+        events = []
+        agg.subscribe(lambda event, symbol, tf, bar: events.append((event, tf, bar)))
+        return agg, events
+
+    @staticmethod
+    def _bar(t, price):
+        return {"time": t, "open": price, "high": price, "low": price, "close": price, "tick_volume": 1}
+
+    def test_ticks_fold_into_bars(self):
+        agg, events = self._aggregator(["M1"])
+        t0 = self._ts(2024, 1, 10, 10, 0)
+        agg._buffers[("XAUUSD", "M1")] = deque([self._bar(t0 - 120, 1.0), self._bar(t0 - 60, 1.5), self._bar(t0, 2000.0)],
+                                               maxlen=3)
+
+        agg.on_ticks("XAUUSD", [
+            {"time": t0 + 5, "bid": 2001.0, "last": 0.0},
+            {"time": t0 + 10, "bid": 1999.0, "last": 0.0},
+            {"time": t0 + 20, "bid": 0.0, "last": 0.0},        # no price
+            {"time": t0 + 61, "bid": 2000.5, "last": 0.0},     # next minute
+            {"time": t0 + 30, "bid": 1990.0, "last": 0.0},     # late tick for the closed bar
+            {"time": t0 + 70, "bid": 2002.0, "last": 0.0},
+        ])
+
+        closed = {"time": t0, "open": 2000.0, "high": 2001.0, "low": 1999.0, "close": 1999.0, "tick_volume": 3}
+        forming = {"time": t0 + 60, "open": 2000.5, "high": 2002.0, "low": 2000.5, "close": 2002.0, "tick_volume": 2}
+        # one bar_close per finished bar, one coalesced bar_update per batch
+        self.assertEqual(events, [("bar_close", "M1", closed), ("bar_update", "M1", forming)])
+        self.assertEqual(list(agg._buffers[("XAUUSD", "M1")]), [self._bar(t0 - 60, 1.5), closed, forming])
+
+    def test_buffer_expired_mid_batch_skips_only_that_timeframe(self):
+        agg, events = self._aggregator(["M1", "M5"])
+        t0 = self._ts(2024, 1, 10, 10, 0)
+        agg._buffers[("XAUUSD", "M5")] = deque([self._bar(t0, 2000.0)], maxlen=3)
+        # M1 "seeds" but is expired before the update takes the lock
+        agg.seed = lambda symbol, tf: True
+
+        agg.on_ticks("XAUUSD", [{"time": t0 + 5, "bid": 2001.0, "last": 0.0}])
+
+        self.assertEqual([(e, tf, bar["high"]) for e, tf, bar in events], [("bar_update", "M5", 2001.0)])
+
+
+class SymbolRatesTests(SimpleTestCase):
+    def setUp(self):
+        try:
+            from trading.mt5 import service
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        self.service = service
+        self.bars = [{"time": 60, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "tick_volume": 1}]
+
+    def test_buffer_hits_never_queue_on_the_mt5_thread(self):
+        svc = self.service.MT5Service()
+        with mock.patch.object(self.service.candle_aggregator, "get", return_value=self.bars) as get, \
+                mock.patch.object(self.service.mt5_executor, "submit", side_effect=AssertionError("queued")):
+            self.assertEqual(svc.get_symbol_rates("xauusd", "m15", 1), self.bars)
+            self.assertEqual(svc.copy_rates("XAUUSD", svc.TIMEFRAME_MAP["M15"], 1), self.bars)
+        self.assertEqual([c.args for c in get.call_args_list], [("XAUUSD", "M15", 1)] * 2)
+
+    def test_misses_go_through_the_rates_cache_on_the_mt5_thread(self):
+        svc = self.service.MT5Service()
+        submitted = []
+
+        def submit(fn, *args, **kwargs):
+            submitted.append(fn.__name__)
+            done = Future()
+            done.set_result("rates")
+            return done
+
+        with mock.patch.object(self.service.candle_aggregator, "get", return_value=None), \
+                mock.patch.object(self.service.mt5_executor, "submit", submit):
+            self.assertEqual(svc.get_symbol_rates("XAUUSD", "M15", 10), "rates")
+        self.assertEqual(submitted, ["_symbol_rates_terminal"])
+
+
+class RatesCacheTests(SimpleTestCase):
+    dtype = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+             ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+
+    def setUp(self):
+        try:
+            from trading.mt5 import rates_cache
+        except ImportError as e:
+            # MetaTrader5 only installs on Windows
+            self.skipTest(str(e))
+        import numpy as np
+
+        self.np = np
+        self.module = rates_cache
+        self.cache = rates_cache.RatesCache()
+        self.history = self._rates(range(0, 20 * 60, 60))  # the terminal's M1 bars, last one forming
+        self.calls = []
+
+        def copy_rates_from_pos(symbol, tf, start, count):
+            self.calls.append(("pos", count))
+            return None if self.history is None else self.history[-count:]
+
+        def copy_rates_range(symbol, tf, date_from, date_to):
+            self.calls.append(("range", int(date_from.timestamp())))
+            if self.history is None:
+                return None
+            return self.history[self.history["time"] >= int(date_from.timestamp())]
+
+        p = mock.patch.object(rates_cache, "mt5", SimpleNamespace(
+            copy_rates_from_pos=copy_rates_from_pos, copy_rates_range=copy_rates_range))
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _rates(self, times, close=1.0):
+        out = self.np.zeros(len(times), dtype=self.dtype)
+        out["time"] = list(times)
+        out["close"] = close
+        return out
+
+    def _tick(self, close, new_bars=0):
+        """The forming bar moves; new_bars more open after it."""
+        last = int(self.history["time"][-1])
+        self.history["close"][-1] = close
+        self.history = self.np.concatenate(
+            [self.history, self._rates(range(last + 60, last + 60 * (new_bars + 1), 60), close)])
+
+    def test_first_call_is_a_full_fetch(self):
+        out = self.cache.get("XAUUSD", 1, 10)
+        self.assertEqual(self.calls, [("pos", 10)])
+        self.assertEqual(list(out["time"]), list(self.history["time"][-10:]))
+        self.assertEqual((self.cache.misses, self.cache.hits, self.cache.bars_fetched), (1, 0, 10))
+
+    def test_next_calls_merge_only_the_newer_bars(self):
+        self.cache.get("XAUUSD", 1, 10)
+        forming = int(self.history["time"][-1])
+        self._tick(2.0, new_bars=2)
+        self.calls.clear()
+
+        out = self.cache.get("XAUUSD", 1, 10)
+
+        # asked from our forming bar on; our stale copy of it is replaced
+        self.assertEqual(self.calls, [("range", forming)])
+        self.assertEqual(list(out["time"]), list(self.history["time"][-10:]))
+        self.assertEqual(list(out["close"][-3:]), [2.0, 2.0, 2.0])
+        self.assertEqual(len(set(out["time"])), 10)
+        self.assertEqual((self.cache.misses, self.cache.hits, self.cache.bars_fetched), (1, 1, 13))
+        self.assertEqual(self.cache.bytes_saved, 7 * out.dtype.itemsize)
+
+    def test_depth_is_trimmed_to_the_deepest_request(self):
+        self.cache.get("XAUUSD", 1, 10)
+        self._tick(2.0, new_bars=5)
+        out = self.cache.get("XAUUSD", 1, 4)
+        self.assertEqual(len(out), 4)
+        self.assertEqual(len(self.cache._rates[("XAUUSD", 1)]), 10)
+        self.assertEqual(list(self.cache._rates[("XAUUSD", 1)]["time"]), list(self.history["time"][-10:]))
+
+    def test_unstitchable_tail_falls_back_to_a_full_fetch(self):
+        self.cache.get("XAUUSD", 1, 10)
+        # the terminal no longer has our forming bar (history gap / reconnect)
+        self.history = self._rates(range(60 * 40, 60 * 60, 60))
+        self.calls.clear()
+        out = self.cache.get("XAUUSD", 1, 10)
+        self.assertEqual([c[0] for c in self.calls], ["range", "pos"])
+        self.assertEqual(list(out["time"]), list(self.history["time"][-10:]))
+        self.assertEqual((self.cache.misses, self.cache.hits), (2, 0))
+
+    def test_deeper_request_or_failed_range_refetches(self):
+        self.cache.get("XAUUSD", 1, 10)
+        self.calls.clear()
+        self.cache.get("XAUUSD", 1, 15)  # more than we hold
+        self.assertEqual(self.calls, [("pos", 15)])
+
+        self.history = None
+        self.calls.clear()
+        self.assertIsNone(self.cache.get("XAUUSD", 1, 10))
+        self.assertEqual([c[0] for c in self.calls], ["range", "pos"])
+        # nothing usable came back -> the stale copy is dropped
+        self.assertEqual(self.cache.stats()["entries"], 0)
+        self.assertEqual(self.cache.misses, 3)
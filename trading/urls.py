@@ -4,10 +4,10 @@ from trading.views.live import trade_history
 
 from .views.market import mt5_market_view
 from .views.live import market_live  # keep whatever you already have
-from .views.live import execute_trade, trade_list
+from .views.live import execute_trade, execute_basket, trade_list
 from trading.views.live import close_trade, modify_trade, emergency_close_all
 
-from trading.views.live import  live_orders, live_positions
+from trading.views.live import  live_orders, live_positions, mt5_executor_stats
 from trading.views.history import TradeHistoryListView, TradeDetailView
 from trading.views.live import AuditExportView
 from trading.views.audit_export import audit_export, AuditVerifyView
@@ -22,6 +22,7 @@ urlpatterns = [
     path("mt5/market/", mt5_market_view, name="mt5_market"),
 
     path("live/execute/", execute_trade, name="trade-execute"),
+    path("live/execute/basket/", execute_basket, name="trade-execute-basket"),
     path("live/trades/", trade_list, name="trade-list"),
 
     path("live/close/", close_trade, name="close-trade"),
@@ -42,6 +43,7 @@ urlpatterns = [
     path("audit/verify", AuditVerifyView.as_view(), name="audit-verify"),
     #path("audit/trades/<int:trade_id>/export", TradeAuditExportView.as_view(), name="trade-audit-export"),
     path("connect/", MT5ConnectView.as_view(), name="mt5-connect"),
+    path("mt5/executor/stats/", mt5_executor_stats, name="mt5-executor-stats"),
 ]
 
 
@@ -1,3 +1,5 @@
+import secrets
+from contextlib import ExitStack
 from decimal import Decimal, InvalidOperation
 
 from rest_framework.views import APIView
@@ -13,10 +15,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from trading.utils import json_safe
 from trading.mt5.service import MT5Service
+from trading.mt5.executor import MT5Busy, MT5OutcomeUnknown, mt5_executor
+from trading.mt5.snapshot import live_snapshot
 from trading.models import Trade, TradeExecutionAudit
 from trading.serializers import TradeSerializer, TradeAuditEventSerializer
 from .._service_old import execute_trade
-from trading.audit import AuditCtx
+from trading.audit import AuditCtx, AuditWriteFailed, audit_buffer
 import csv
 import json
 from django.http import StreamingHttpResponse
@@ -72,18 +76,26 @@ def execute_trade(request):
     sl = float(sl_raw) if sl_raw not in (None, "", "null") else None
     tp = float(tp_raw) if tp_raw not in (None, "", "null") else None
 
+    ctx = _audit_ctx_from_request(request)
     try:
         svc = MT5Service()
-        result = svc.place_market_order(
-            symbol=symbol,
-            side=side,
-            lot=float(lot),
-            sl=sl,
-            tp=tp,
-            max_slippage_pips=2.0,
-            magic=900001,
-            comment="SniperATR",
-        )
+        try:
+            # audit events from the MT5 thread go out in one insert after the order
+            with audit_buffer(trade, ctx):
+                result = svc.place_market_order(
+                    trade=trade,
+                    symbol=symbol,
+                    side=side,
+                    lot=float(lot),
+                    sl=sl,
+                    tp=tp,
+                    max_slippage_pips=2.0,
+                    magic=900001,
+                    comment="SniperATR",
+                    ctx=ctx,
+                )
+        except AuditWriteFailed:
+            pass  # logged by audit_buffer; the order went out, record it below
 
         TradeExecutionAudit.objects.create(
             trade=trade,
@@ -118,6 +130,13 @@ def execute_trade(request):
 
         return Response({"trade_id": trade.id, "mt5": result}, status=200)
 
+    except MT5OutcomeUnknown as e:
+        # the order may still fill: leave the trade pending for reconciliation, don't report failure
+        return Response(
+            {"ok": None, "trade_id": trade.id, "status": trade.status,
+             "error": "Order outcome unknown", "details": str(e)},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
     except Exception as e:
 
@@ -129,6 +148,211 @@ def execute_trade(request):
 
         )
 
+
+MAX_BASKET_LEGS = 20
+
+
+def _validate_basket_leg(leg) -> dict:
+    """Returns a clean leg dict or raises ValueError (nothing is sent unless every leg passes)."""
+    if not isinstance(leg, dict):
+        raise ValueError("leg must be an object")
+
+    symbol = (leg.get("symbol") or "").upper().strip()
+    side = (leg.get("side") or "").strip().lower()
+    lot = _to_decimal(leg.get("lot"), "lot")
+
+    if not symbol or not side or lot is None:
+        raise ValueError("symbol, side, lot are required")
+    if symbol not in ALLOWED_SYMBOLS:
+        raise ValueError(f"Symbol not allowed: {symbol}")
+    if side not in ("buy", "sell"):
+        raise ValueError("Invalid side (use 'buy' or 'sell')")
+    if lot < MIN_LOT or lot > MAX_LOT:
+        raise ValueError(f"lot must be between {MIN_LOT} and {MAX_LOT}")
+
+    return {
+        "symbol": symbol,
+        "side": side,
+        "lot": lot,
+        "sl": _to_float_or_none(leg.get("sl"), "sl"),
+        "tp": _to_float_or_none(leg.get("tp"), "tp"),
+    }
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def execute_basket(request):
+    """
+    POST /trading/live/execute/basket/
+    {"legs": [{"symbol": "EURUSD", "side": "buy", "lot": 0.1, "sl": ..., "tp": ...}, ...],
+     "max_slippage_pips": 2.0}
+
+    All legs are validated first; then one trip to the MT5 thread for the whole basket,
+    one bulk_create for the Trades and one for the audits. Returns per-leg results.
+    If the basket's outcome is unknown (timeout mid-basket), legs are matched to open positions
+    by the basket's magic + comment; unmatched legs stay pending with ok=null.
+    """
+    if not getattr(settings, "TRADING_ENABLED", True):
+        return Response({"error": "Trading is disabled"}, status=403)
+
+    data = request.data or {}
+    raw_legs = data.get("legs")
+    if not isinstance(raw_legs, list) or not raw_legs:
+        return Response({"error": "legs must be a non-empty list"}, status=400)
+    if len(raw_legs) > MAX_BASKET_LEGS:
+        return Response({"error": f"At most {MAX_BASKET_LEGS} legs per basket"}, status=400)
+
+    legs, errors = [], []
+    for i, raw in enumerate(raw_legs):
+        try:
+            legs.append(_validate_basket_leg(raw))
+        except ValueError as e:
+            errors.append({"leg": i, "error": str(e)})
+    if errors:
+        return Response({"ok": False, "error": "Invalid legs", "legs": errors}, status=400)
+
+    try:
+        max_slippage_pips = float(data.get("max_slippage_pips", 2.0))
+    except (TypeError, ValueError):
+        return Response({"error": "Invalid max_slippage_pips"}, status=400)
+
+    magic = 900001
+    # per-basket tag: lets us find the basket's positions if its outcome is unknown
+    comment = f"SniperATR-B{secrets.token_hex(3)}"
+
+    trades = Trade.objects.bulk_create([
+        Trade(
+            user=request.user,
+            symbol=leg["symbol"],
+            side=leg["side"],
+            lot=leg["lot"],
+            sl=leg["sl"],
+            tp=leg["tp"],
+            magic=magic,
+            comment=comment,
+            status=Trade.STATUS_PENDING,
+        )
+        for leg in legs
+    ])
+
+    ctx = _audit_ctx_from_request(request)
+    try:
+        # one audit buffer per leg's trade, each written in one insert once the basket is recorded
+        with ExitStack() as stack:
+            buffers = [stack.enter_context(audit_buffer(trade, ctx)) for trade in trades]
+            for buf, leg in zip(buffers, legs):
+                buf.add(TradeAuditEvent.EventType.VALIDATION_OK,
+                        {"symbol": leg["symbol"], "side": leg["side"], "lot": float(leg["lot"]), "basket": comment})
+
+            svc = MT5Service()
+            mt5_legs = [{**leg, "lot": float(leg["lot"])} for leg in legs]
+            try:
+                results = svc.place_basket_orders(
+                    mt5_legs,
+                    max_slippage_pips=max_slippage_pips,
+                    magic=magic,
+                    comment=comment,
+                )
+            except MT5Busy as e:
+                # never reached the terminal -> the whole basket failed
+                results = [{"leg": i, "ok": False, "error": "Basket execution failed", "details": str(e)}
+                           for i in range(len(legs))]
+            except Exception as e:
+                # some legs may have filled (timeout / error mid-basket) -> ask the terminal
+                results = _reconcile_basket(svc, mt5_legs, magic, comment, e)
+
+            # position_ticket is unique: netting accounts put same-symbol legs in one position
+            positions = [r.get("position") for r in results if r.get("ok") and r.get("position")]
+            taken = set(Trade.objects.filter(position_ticket__in=positions).values_list("position_ticket", flat=True))
+
+            now = timezone.now()
+            audits = []
+            for trade, buf, result in zip(trades, buffers, results):
+                mt5_res = result.get("result") or {}
+                if result.get("ok"):
+                    trade.status = Trade.STATUS_OPEN
+                    trade.order_ticket = mt5_res.get("order") or None
+                    position = result.get("position")
+                    if position and position not in taken:
+                        trade.position_ticket = position
+                        taken.add(position)
+                    trade.entry_price = mt5_res.get("price") or (result.get("request") or {}).get("price")
+                    trade.opened_at = now
+                elif result.get("ok") is None:
+                    # outcome unknown: stays pending until reconciled, a live position may be behind it
+                    trade.status = Trade.STATUS_PENDING
+                else:
+                    trade.status = Trade.STATUS_FAILED
+                trade.raw_response = json_safe(result)
+                buf.add(TradeAuditEvent.EventType.ORDER_SEND_RESULT, json_safe(result))
+                buf.add(TradeAuditEvent.EventType.TRADE_STATUS_UPDATED, {"status": trade.status})
+
+                audits.append(TradeExecutionAudit(
+                    trade=trade,
+                    user=request.user,
+                    ok=bool(result.get("ok")),
+                    action="execute_basket",
+                    request_json=json_safe(result.get("request")),
+                    response_json=json_safe(mt5_res or result),
+                    error=result.get("error") or (None if result.get("ok") else result.get("comment")),
+                ))
+
+            Trade.objects.bulk_update(
+                trades,
+                ["status", "order_ticket", "position_ticket", "entry_price", "opened_at", "raw_response"],
+            )
+            TradeExecutionAudit.objects.bulk_create(audits)
+    except AuditWriteFailed:
+        pass  # logged by audit_buffer; the basket is recorded
+
+    out = [
+        {
+            "leg": i,
+            "trade_id": trade.id,
+            "ok": None if result.get("ok") is None else bool(result.get("ok")),
+            "status": trade.status,
+            "symbol": result.get("symbol", trade.symbol),
+            "order_ticket": trade.order_ticket,
+            "position_ticket": trade.position_ticket,
+            "retcode": result.get("retcode"),
+            "comment": result.get("comment"),
+            "error": result.get("error"),
+        }
+        for i, (trade, result) in enumerate(zip(trades, results))
+    ]
+    filled = sum(1 for r in out if r["ok"])
+    unknown = sum(1 for r in out if r["ok"] is None)
+    return Response(
+        {"ok": filled == len(out), "filled": filled, "unknown": unknown, "total": len(out), "legs": out},
+        status=200 if filled else 202 if unknown else 502,
+    )
+
+
+def _reconcile_basket(svc, legs, magic, comment, error) -> list:
+    """
+    Per-leg results for a basket whose outcome we don't know: legs with a matching open
+    position (basket magic + comment) count as filled, the rest stay unknown (ok=None).
+    """
+    try:
+        found = svc.find_basket_positions(legs, magic=magic, comment=comment)
+    except Exception:
+        found = [None] * len(legs)
+
+    results = []
+    for i, pos in enumerate(found):
+        if pos is None:
+            results.append({"leg": i, "ok": None, "error": "Outcome unknown", "details": str(error)})
+        else:
+            results.append({
+                "leg": i,
+                "ok": True,
+                "reconciled": True,
+                "symbol": pos["symbol"],
+                "position": pos["ticket"],
+                "result": {"price": pos["price"], "volume": pos["volume"]},
+            })
+    return results
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def trade_list(request):
@@ -233,15 +457,69 @@ def emergency_close_all(request):
     if not getattr(settings, "TRADING_ENABLED", True):
         return Response({"error": "Trading is disabled"}, status=403)
 
+    data = request.data or {}
+    symbol = (data.get("symbol") or "").upper().strip() or None
+    magic = data.get("magic")
+    if magic not in (None, ""):
+        try:
+            magic = int(magic)
+        except (TypeError, ValueError):
+            return Response({"error": "magic must be an integer"}, status=400)
+    else:
+        magic = None
+
+    # default scope: the positions behind this user's open trades.
+    # staff can pass {"scope": "all"} (optionally with magic/comment) to flatten the whole account.
+    open_trades = list(
+        Trade.objects.filter(user=request.user, status=Trade.STATUS_OPEN, position_ticket__isnull=False)
+    )
     svc = MT5Service()
-    result = svc.close_all_positions()
+    try:
+        if data.get("scope") == "all" and request.user.is_staff:
+            result = svc.close_all_positions(magic=magic, comment=data.get("comment"), symbol=symbol)
+        else:
+            if not open_trades:
+                return Response({"message": "Nothing to close", "result": {"closed": [], "errors": [], "count": 0}})
+            result = svc.close_all_positions(tickets=[t.position_ticket for t in open_trades], symbol=symbol)
+    except MT5OutcomeUnknown as e:
+        # closes may still be going through: trades stay open until positions say otherwise
+        return Response({"error": "Close outcome unknown, check positions", "details": str(e)}, status=504)
 
-    Trade.objects.filter(user=request.user, status="open").update(
-        status="closed",
-        closed_at=timezone.now()
-    )
+    updated = _reconcile_closed_trades(open_trades, result)
+
+    return Response({
+        "message": "Emergency close all executed",
+        "closed": len(result["closed"]),
+        "failed": len(result["errors"]),
+        "trades_updated": updated,
+        "result": result,
+    }, status=200 if not result["errors"] else 207)
 
-    return Response({"message": "Emergency close all executed", "result": result})
+
+def _reconcile_closed_trades(trades, result) -> int:
+    """
+    Marks Trade rows closed from a close_all_positions() result, one bulk_update.
+    Only positions that actually closed (or are already gone from the terminal) are touched.
+    """
+    closed = {c["ticket"]: c for c in result.get("closed", [])}
+    missing = set(result.get("missing", []))
+    now = timezone.now()
+
+    changed = []
+    for trade in trades:
+        hit = closed.get(trade.position_ticket)
+        if hit is not None:
+            trade.close_price = hit["price"]
+            trade.profit = round(hit["profit"], 2)
+        elif trade.position_ticket not in missing:
+            continue
+        trade.status = Trade.STATUS_CLOSED
+        trade.closed_at = now
+        changed.append(trade)
+
+    if changed:
+        Trade.objects.bulk_update(changed, ["status", "closed_at", "close_price", "profit"])
+    return len(changed)
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def close_trade(request):
@@ -279,8 +557,49 @@ def trade_history(request):
     return Response(TradeSerializer(qs, many=True).data)
 
 @api_view(["GET"])
+@permission_classes([IsAdminUser])
+def mt5_executor_stats(request):
+    """
+    GET /trading/mt5/executor/stats/
+    Queue depth + counters of the MT5 owner thread (for monitoring).
+    """
+    return Response(mt5_executor.stats())
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
 def live_positions(request):
-    return Response({"status": "ok", "message": "live_positions endpoint placeholder"})
+    """
+    GET /trading/live/positions/?symbol=EURUSD
+    GET /trading/live/positions/?since=<version>   -> only what changed after that version
+
+    Served from the shared in-memory snapshot; the terminal is hit at most once per interval.
+    Only the positions behind the user's own trades (the account is shared).
+    """
+    own = set(
+        Trade.objects.filter(user=request.user, position_ticket__isnull=False)
+        .values_list("position_ticket", flat=True)
+    )
+
+    since = request.query_params.get("since")
+    if since not in (None, ""):
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            return Response({"error": "since must be an integer"}, status=400)
+        changes = live_snapshot.changes_since(since)
+        out = {"version": changes["version"], "full": changes["full"]}
+        if changes["full"]:
+            out["positions"] = [p for p in changes["positions"] if p["ticket"] in own]
+        else:
+            out["positions"] = {
+                "upserted": [p for p in changes["positions"]["upserted"] if p["ticket"] in own],
+                "removed": [t for t in changes["positions"]["removed"] if t in own],
+            }
+        return Response(out)
+
+    symbol = request.query_params.get("symbol")
+    data = [p for p in live_snapshot.positions(symbol=symbol) if p["ticket"] in own]
+    return Response({"version": live_snapshot.version, "count": len(data), "positions": data})
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -321,20 +640,24 @@ class LiveExecuteView(APIView):
             symbol=symbol,
             side=side,
             lot=float(lot),
-            status=Trade.Status.PENDING,
+            status=Trade.STATUS_PENDING,
         )
 
         # 3Build audit context
         ctx = _audit_ctx_from_request(request)
 
-        # 4Execute via MT5 service
-        result = mt5_service.place_market_order(
-            trade=trade,
-            symbol=symbol,
-            side=side,
-            lot=float(lot),
-            ctx=ctx,
-        )
+        # 4Execute via MT5 service (audit events are written in one insert after the order)
+        try:
+            with audit_buffer(trade, ctx):
+                result = mt5_service.place_market_order(
+                    trade=trade,
+                    symbol=symbol,
+                    side=side,
+                    lot=float(lot),
+                    ctx=ctx,
+                )
+        except AuditWriteFailed:
+            pass  # logged by audit_buffer; the order went out
 
         return Response(result)
 
@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 
 from .. import mt5
 from ..mt5.service import get_market_tick
+from ..mt5.stream import tick_stream
 
 from ..mt5.service import MT5Service
 from django.http import JsonResponse
@@ -35,6 +36,10 @@ class LiveMarketDataView(APIView):
 @api_view(["GET"])
 def mt5_market_view(request):
     symbol = request.GET.get("symbol", "EURUSD")
+    # streamed symbols are answered from memory, no terminal round trip
+    streamed = tick_stream.latest(symbol, max_age=2.0)
+    if streamed is not None:
+        return Response({k: streamed[k] for k in ("symbol", "bid", "ask", "spread", "time_msc")})
     data = get_market_tick(symbol)
     status = 200 if "error" not in data else data.get("status", 400)
     return Response(data, status=status)
\ No newline at end of file